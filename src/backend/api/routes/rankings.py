@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Query
+from services.ranking_service import get_rankings
+from typing import Optional
+
+rankings_router = APIRouter()
+
+@rankings_router.get("/rankings/{metric}")
+async def get_ranking_page(metric: str, genre: Optional[str] = None, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+
+    page = await get_rankings(metric, genre, cursor, limit)
+    return page
@@ -1,63 +1,156 @@
 import os
+import httpx
 from fastapi import APIRouter, Query, BackgroundTasks, Header, HTTPException, Depends, FastAPI
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
-from services.tmdb_service import tmdb_get_show_details, tmdb_get_shows, tmdb_get_episodes_all_seasons
-from crud.modeledQueries import db_get_show_by_id,db_insert_show, db_delete_show, db_delete_many_shows, db_get_cursor
-from core.metrics import getShowMetrics
+from typing import Optional
+from services.tmdb_service import get_tmdb_client, tmdb_healthy
+from services.refresh_service import build_show, RefreshProgress
+from services.suggestion_service import get_cached_suggestions
+from services.response_service import show_response
+from services.stream_service import stored_events, refresh_events, stream_response
+from services.refresh_scheduler import RefreshScheduler, get_refresh_scheduler
+from crud.modeledQueries import db_get_show_by_id, db_get_show_summary_by_id, db_get_episode_page, episode_page, show_summary, db_upsert_show, db_save_show_changes, db_delete_many_shows, db_get_expired_show_ids
+from core.singleflight import SingleFlight
+from core.tracing import StageTimer, span
+from core.freshness import is_fresh, SHOW_RETENTION
+from core.instrumentation import CLEANUP_DELETED, CLEANUP_BATCHES, CLEANUP_LAST_RUN_DELETED
 from db.mongodb import db, DatabaseCollections
 
 shows_router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+refresh_flight = SingleFlight("refresh")
+
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "1000"))
 
 @shows_router.get("/suggestions")
-async def get_suggestions(query: str = Query(..., min_length=2)):
+async def get_suggestions(query: str = Query(..., min_length=2), client: httpx.AsyncClient = Depends(get_tmdb_client)):
 
-    res = await tmdb_get_shows(query)
+    res = await get_cached_suggestions(query, client)
     return res
 
-async def full_refresh(show_id: int):
+async def full_refresh(show_id: int, client: httpx.AsyncClient = None, progress: Optional[RefreshProgress] = None):
 
-    show = await tmdb_get_show_details(show_id)
-    episodes = await tmdb_get_episodes_all_seasons(show_id, show.number_of_seasons)
-    metrics = getShowMetrics(episodes)
-    
-    show.episodes = episodes
-    show.metrics = metrics
-    show.last_updated = datetime.now(timezone.utc)
-    
-    await db_delete_show(show_id)
-    id = await db_insert_show(show) 
+    stages = StageTimer()
+    try:
+        with span("refresh", show_id=show_id):
+            with stages.stage("db_read"):
+                previous = await db_get_show_by_id(show_id, hot=False)
+            show = await build_show(show_id, previous, client, stages, progress)
+
+            with stages.stage("db_write"):
+                if previous:
+                    await db_save_show_changes(previous, show)
+                else:
+                    await db_upsert_show(show)
+    finally:
+        stages.finish()
 
     return show
 
+async def refresh_show(show_id: int, client: httpx.AsyncClient = None, progress: Optional[RefreshProgress] = None):
+    return await refresh_flight.do(show_id, lambda: full_refresh(show_id, client, progress))
+
+def schedule_refresh(show, scheduler: Optional[RefreshScheduler], backgroundTasks: BackgroundTasks, client: httpx.AsyncClient = None):
+
+    # While TMDB is failing the stored copy is served as is rather than queueing refreshes that cannot succeed
+    if not tmdb_healthy():
+        return
+
+    if scheduler:
+        scheduler.schedule(show)
+    elif not is_fresh(show):
+        backgroundTasks.add_task(refresh_show, show.id, client)
+
 @shows_router.get("/show_details")
-async def get_show(show_id: int, backgroundTasks: BackgroundTasks):
+async def get_show(show_id: int, backgroundTasks: BackgroundTasks, episodes: bool = True, if_none_match: Optional[str] = Header(None),
+                   client: httpx.AsyncClient = Depends(get_tmdb_client), scheduler: Optional[RefreshScheduler] = Depends(get_refresh_scheduler)):
+
+    if not episodes:
+        return await get_show_summary(show_id, backgroundTasks, client, scheduler)
 
     show = await db_get_show_by_id(show_id)
     if show:
-        if (datetime.now(timezone.utc) - show.last_updated.replace(tzinfo=timezone.utc)) < timedelta(hours=24):
-            return show
-        
-        backgroundTasks.add_task(full_refresh, show_id)
-        return show
+        schedule_refresh(show, scheduler, backgroundTasks, client)
+        return show_response(show, if_none_match)
             
-    show = await full_refresh(show_id)
-    return show
+    show = await refresh_show(show_id, client)
+    if scheduler:
+        scheduler.observe(show)
+    return show_response(show, if_none_match)
 
-async def cleanup():
-    
-    projection = {"id": 1, "last_updated": 1}
-    cursor = db_get_cursor(projection) 
+@shows_router.get("/show_details/stream")
+async def stream_show(show_id: int, backgroundTasks: BackgroundTasks, format: Optional[str] = Query(None, pattern="^(ndjson|sse)$"), accept: Optional[str] = Header(None),
+                      client: httpx.AsyncClient = Depends(get_tmdb_client), scheduler: Optional[RefreshScheduler] = Depends(get_refresh_scheduler)):
+
+    format = format or ("sse" if accept and "text/event-stream" in accept else "ndjson")
+
+    show = await db_get_show_by_id(show_id)
+    if show:
+        schedule_refresh(show, scheduler, backgroundTasks, client)
+        return await stream_response(stored_events(show), format)
+
+    async def refresh(progress):
+        show = await refresh_show(show_id, client, progress)
+        if scheduler:
+            scheduler.observe(show)
+        return show
+
+    return await stream_response(refresh_events(refresh), format)
+
+async def get_show_summary(show_id: int, backgroundTasks: BackgroundTasks, client: httpx.AsyncClient = None, scheduler: Optional[RefreshScheduler] = None):
+
+    summary = await db_get_show_summary_by_id(show_id)
+    if summary:
+        schedule_refresh(summary, scheduler, backgroundTasks, client)
+        return summary
+
+    show = await refresh_show(show_id, client)
+    if scheduler:
+        scheduler.observe(show)
+    return show_summary(show)
+
+@shows_router.get("/show_details/{show_id}/episodes")
+async def get_show_episodes(show_id: int, backgroundTasks: BackgroundTasks, season: int = Query(1, ge=1), client: httpx.AsyncClient = Depends(get_tmdb_client)):
+
+    page = await db_get_episode_page(show_id, season)
+    if page:
+        if season > page.number_of_seasons:
+            raise HTTPException(status_code=404, detail="Season not found")
+        return page
+
+    show = await refresh_show(show_id, client)
+    if season > show.number_of_seasons:
+        raise HTTPException(status_code=404, detail="Season not found")
+    return episode_page(show_id, season, show.number_of_seasons, [episode for episode in show.episodes if episode.season_number == season])
+
+async def cleanup(batch_size: int = CLEANUP_BATCH_SIZE) -> int:
+
+    # Shows cannot be refreshed while TMDB is down, so expired copies are kept to be served stale
+    if not tmdb_healthy():
+        return 0
+
+    cutoff = datetime.now(timezone.utc) - SHOW_RETENTION
+    deleted = 0
+    CLEANUP_LAST_RUN_DELETED.set(0)
+
+    while True:
+        ids = await db_get_expired_show_ids(cutoff, batch_size)
+        if not ids:
+            break
+
+        # Re-checking the cutoff keeps a show refreshed since the lookup from being deleted
+        result = await db_delete_many_shows(ids, updated_before=cutoff)
+        deleted += result.deleted_count
 
-    ids_to_delete = []
+        CLEANUP_BATCHES.inc()
+        CLEANUP_DELETED.inc(result.deleted_count)
+        CLEANUP_LAST_RUN_DELETED.set(deleted)
 
-    async for show in cursor:
-        if (datetime.now(timezone.utc) - show["last_updated"].replace(tzinfo=timezone.utc)) > timedelta(days=30):
-            ids_to_delete.append(show["id"])
+        if len(ids) < batch_size:
+            break
 
-    if ids_to_delete:
-        await db_delete_many_shows(ids_to_delete) 
+    return deleted
     
 @shows_router.post("/cleanup")
 async def trigger_cleanup(backgroundTasks: BackgroundTasks, token: str = Depends(oauth2_scheme)):
@@ -0,0 +1,91 @@
+"""Cleanup cost: the old full-collection scan with client-side filtering vs the batched server-side expiry delete.
+
+Runs against a real mongod with --uri, on 1,000,000 documents by default. Without --uri it falls back to
+mongomock-motor on 20,000 documents: mongomock has no indexes and matches $in lists by linear scan, so a
+million rows would take hours and its timings say nothing about Mongo anyway; the mongomock run is only a
+correctness check. Both strategies are run on the same seeded collection and checked to remove exactly
+the expired rows.
+
+    python -m bench.cleanup_bench --uri mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from crud import baseQueries, modeledQueries
+from api.routes import shows
+
+def make_docs(rng, count, expired_ratio, now):
+    docs = []
+    for i in range(count):
+        age = rng.uniform(31, 400) if rng.random() < expired_ratio else rng.uniform(0, 29)
+        docs.append({"_id": i, "title": f"Show {i}", "episodes": [], "last_updated": now - timedelta(days=age)})
+    return docs
+
+async def seed(docs):
+    await baseQueries.db["shows"].delete_many({})
+    for start in range(0, len(docs), 10000):
+        await baseQueries.db["shows"].insert_many(docs[start:start + 10000])
+
+async def scan_cleanup():
+
+    # The pre-batching implementation: stream every row and filter in Python
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    ids = []
+    scanned = 0
+    async for show in baseQueries.get_cursor("shows", {"_id": 1, "last_updated": 1}):
+        scanned += 1
+        if show["last_updated"].replace(tzinfo=timezone.utc) < cutoff:
+            ids.append(show["_id"])
+    await baseQueries.db["shows"].delete_many({"_id": {"$in": ids}})
+    return scanned
+
+async def remaining_ids():
+    docs = await baseQueries.db["shows"].find({}, {"_id": 1}).to_list(length=None)
+    return sorted(doc["_id"] for doc in docs)
+
+async def run(count, expired_ratio, batch_size):
+
+    now = datetime.now(timezone.utc)
+    docs = make_docs(random.Random(3), count, expired_ratio, now)
+    expected = sorted(doc["_id"] for doc in docs if now - doc["last_updated"] <= timedelta(days=30))
+    report = {"docs": count, "expired": count - len(expected), "batch_size": batch_size}
+
+    await seed(docs)
+    start = time.perf_counter()
+    scanned = await scan_cleanup()
+    report["scan"] = {"ms": round((time.perf_counter() - start) * 1000, 1), "rows_returned": scanned,
+                      "correct": await remaining_ids() == expected}
+
+    await seed(docs)
+    await baseQueries.db["shows"].create_index("last_updated")
+    modeledQueries.show_cache.clear()
+    start = time.perf_counter()
+    deleted = await shows.cleanup(batch_size)
+    report["batched"] = {"ms": round((time.perf_counter() - start) * 1000, 1), "deleted": deleted,
+                         "rows_returned": deleted, "batches": -(-deleted // batch_size),
+                         "correct": await remaining_ids() == expected}
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=None, help="defaults to 1000000 with --uri, 20000 on mongomock")
+    parser.add_argument("--expired", type=float, default=0.3)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    if args.uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        baseQueries.db = AsyncIOMotorClient(args.uri).get_database("bingelogic_bench")
+    else:
+        from bench.mongomock_db import use_mock_database
+        use_mock_database()
+
+    docs = args.docs or (1_000_000 if args.uri else 20_000)
+    print(json.dumps(asyncio.run(run(docs, args.expired, args.batch_size)), indent=2))
@@ -0,0 +1,61 @@
+"""Stored document size and load+score time for the episode array layout vs packed episode columns.
+
+Times start from raw BSON bytes, as a driver would hand them over, so they include decoding.
+
+    python -m bench.episode_columns_bench --episodes 100 1000 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import bson
+from core import episode_columns
+from core.episode_columns import episode_arrays
+from core.metrics import EpisodeBatch, getBatchShowMetrics, getShowMetrics
+from crud.modeledQueries import show_document, show_from_document
+from models.show_model import ShowModel, Episode
+
+def make_show(rng, count):
+    episodes = [Episode(id=100000 + i, season_number=1 + i // 22, episode_number=i % 22 + 1, title=f"Episode title {i}",
+                        rating=round(rng.uniform(5, 9.5), 3), air_date="2019-09-14", vote_count=rng.randint(1, 900))
+                for i in range(count)]
+    return ShowModel(id=1, title="Bench", number_of_seasons=episodes[-1].season_number, episodes=episodes)
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat * 1000, 3)
+
+def measure(count, repeat):
+
+    show = make_show(random.Random(9), count)
+
+    episode_columns.EPISODE_STORAGE = "documents"
+    rows = bson.encode(show_document(show))
+    episode_columns.EPISODE_STORAGE = "columnar"
+    packed = bson.encode(show_document(show))
+
+    def score_from_columns():
+        arrays = episode_arrays(bson.decode(packed)["episode_columns"])
+        return getBatchShowMetrics(EpisodeBatch.fromArrays([arrays]))[0]
+
+    assert score_from_columns() == getShowMetrics(show.episodes)
+
+    return {
+        "bytes_documents": len(rows),
+        "bytes_columnar": len(packed),
+        "ms_load_score_documents": timed(lambda: getShowMetrics(show_from_document(bson.decode(rows)).episodes), repeat),
+        "ms_load_score_columnar_models": timed(lambda: getShowMetrics(show_from_document(bson.decode(packed)).episodes), repeat),
+        "ms_load_score_columnar_arrays": timed(score_from_columns, repeat)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps({str(count): measure(count, args.repeat) for count in args.episodes}, indent=2))
@@ -0,0 +1,91 @@
+"""Allocations and time per 1000 episodes for parse + filter + score of TMDB season payloads.
+
+Compares building an Episode model per item and filtering afterwards with filtering the raw
+items first and scoring lightweight EpisodeRecord tuples.
+
+    python -m bench.episode_record_bench --episodes 1000 10000 --unrated 0.2
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from core.metrics import getShowMetrics
+from models.show_model import Episode
+from services.tmdb_service import parse_season_episodes
+
+def make_seasons(rng, count, unrated):
+    seasons = []
+    for start in range(0, count, 22):
+        season = len(seasons) + 1
+        seasons.append((season, {"episodes": [
+            {"id": 100000 + i, "episode_number": i - start + 1, "name": f"Episode title {i}", "air_date": "2019-09-14",
+             "vote_average": 0 if rng.random() < unrated else round(rng.uniform(5, 9.5), 3),
+             "vote_count": rng.randint(1, 900)}
+            for i in range(start, min(start + 22, count))
+        ]}))
+    return seasons
+
+def parse_models(data, season):
+
+    episodes = [
+        Episode(
+            id=item["id"],
+            season_number=season,
+            episode_number=item["episode_number"],
+            title=item["name"],
+            rating=item["vote_average"],
+            air_date=item.get("air_date"),
+            vote_count=item["vote_count"]
+        )
+        for item in data.get("episodes", [])
+    ]
+
+    return [e for e in episodes if e.rating > 0 and e.vote_count > 0]
+
+def parse_all(parse, seasons):
+    return [episode for season, data in seasons for episode in parse(data, season)]
+
+def score(parse, seasons):
+    return getShowMetrics(parse_all(parse, seasons))
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def allocations(parse, seasons):
+
+    # Blocks held by the parsed episodes, and the peak across parse + filter + score
+    tracemalloc.start()
+    episodes = parse_all(parse, seasons)
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    getShowMetrics(episodes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return blocks, peak
+
+def measure(count, unrated, repeat):
+
+    seasons = make_seasons(random.Random(5), count, unrated)
+    assert score(parse_models, seasons) == score(parse_season_episodes, seasons)
+
+    report = {"episodes": count}
+    for name, parse in (("models", parse_models), ("records", parse_season_episodes)):
+        blocks, peak = allocations(parse, seasons)
+        report[f"ms_per_1000_{name}"] = round(timed(lambda: score(parse, seasons), repeat) / count * 1000 * 1000, 3)
+        report[f"held_blocks_per_1000_{name}"] = round(blocks / count * 1000)
+        report[f"peak_kb_per_1000_{name}"] = round(peak / count * 1000 / 1024, 1)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--unrated", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps([measure(count, args.unrated, args.repeat) for count in args.episodes], indent=2))
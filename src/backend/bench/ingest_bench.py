@@ -0,0 +1,48 @@
+"""Bulk ingestion throughput (shows/min) against the local TMDB stub with injected 429s.
+
+Writes go to mongomock-motor by default, or a real mongod with --uri mongodb://localhost:27017.
+
+    python -m bench.ingest_bench --shows 300 --latency-ms 20 --rate-limit-ratio 0.05 --rate 200
+"""
+
+import argparse
+import asyncio
+import json
+
+from bench.tmdb_stub import create_stub_app, run_stub_server
+from crud import baseQueries, modeledQueries
+from services import tmdb_service
+from services.ingest_service import ingest_shows, create_ingest_client
+
+async def run(shows, workers, rate, batch_size):
+    modeledQueries.show_cache.clear()
+    await baseQueries.db["shows"].delete_many({})
+    async with create_ingest_client(rate) as client:
+        report = await ingest_shows(list(range(1, shows + 1)), client, workers, batch_size, force=True)
+    return report.model_dump(exclude={"failed"}) | {"failed": len(report.failed)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shows", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.05)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    if args.uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        baseQueries.db = AsyncIOMotorClient(args.uri).get_database("bingelogic_bench")
+    else:
+        from bench.mongomock_db import use_mock_database
+        use_mock_database()
+
+    stub = create_stub_app(args.latency_ms / 1000, rate_limit_ratio=args.rate_limit_ratio)
+    with run_stub_server(stub) as base_url:
+        tmdb_service.TMDB_BASE_URL = base_url
+        report = {f"workers_{workers}": asyncio.run(run(args.shows, workers, args.rate, args.batch_size)) for workers in args.workers}
+
+    report["stub_429s"] = stub.state.rate_limited
+    print(json.dumps(report, indent=2))
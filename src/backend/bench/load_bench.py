@@ -0,0 +1,260 @@
+"""End-to-end load test: boots main.app (lifespan included) against the local TMDB stub and drives
+/api/suggestions, /api/show_details (cold, warm and stale) and /api/cleanup at each concurrency level.
+
+TMDB is the stub served over real HTTP on a background thread, with configurable latency, payload
+size and injected 429s. Mongo is mongomock-motor by default, or a real mongod with --uri. Requests
+go through httpx.ASGITransport in-process, so numbers include client overhead but no network hop
+to the app. The report is JSON: latency percentiles, req/s and status counts per scenario and
+concurrency, plus the top allocation sites from a separate tracemalloc pass with --profile.
+
+    python -m bench.load_bench --concurrency 1 16 64 --requests 400 --latency-ms 20 --rate-limit-ratio 0.02 --profile
+    python -m bench.load_bench --output after.json --baseline before.json --tolerance 0.2
+
+With --baseline, p95 and req/s are compared against an earlier report and the exit status is 1 when
+any scenario regressed by more than --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+os.environ.setdefault("CLEANUP_TOKEN", "bench-token")
+
+import main
+from api.health import Health
+from bench.stats import summarize
+from bench.tmdb_stub import create_stub_app, run_stub_server
+from core.freshness import SHOW_MAX_AGE, SHOW_RETENTION
+from crud import baseQueries, modeledQueries
+from db import mongodb
+from services import tmdb_service, response_service, suggestion_service
+
+QUERIES = ["breaking", "the office", "succession", "severance", "the wire", "mad men", "fargo", "dark",
+           "lost", "house", "andor", "shogun", "the bear", "barry", "veep", "atlanta"]
+
+def use_database(uri):
+
+    if uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(uri)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        from bench.mongomock_db import use_mock_bulk_writes
+        client = AsyncMongoMockClient()
+
+    # Everything that imported the production client or database gets the bench one instead
+    database = client.get_database("bingelogic_bench")
+    mongodb.client = main.client = Health.client = client
+    mongodb.db = baseQueries.db = database
+    if not uri:
+        use_mock_bulk_writes(database)
+
+async def clear_caches():
+    modeledQueries.show_cache.clear()
+    response_service.show_json_cache.clear()
+    suggestion_service.suggestion_cache.clear()
+
+class Scenario:
+
+    def __init__(self, name, request, prepare=None):
+        self.name = name
+        self.request = request
+        self.prepare = prepare
+
+async def drive(client, scenario, requests, concurrency):
+
+    if scenario.prepare:
+        await scenario.prepare()
+
+    samples = []
+    statuses = Counter()
+    issued = iter(range(requests))
+
+    async def worker():
+        for i in issued:
+            start = time.perf_counter()
+            try:
+                res = await scenario.request(client, i)
+                statuses[str(res.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {"concurrency": concurrency, "req_per_s": round(requests / elapsed, 1), "statuses": dict(statuses)} | summarize(samples)
+
+async def profile(client, scenario, requests, concurrency, top):
+
+    tracemalloc.start()
+    try:
+        await drive(client, scenario, requests, concurrency)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = snapshot.statistics("lineno")
+    return {
+        "requests": requests,
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(current / 1024, 1),
+        "top": [{"where": f"{os.sep.join(stat.traceback[0].filename.rsplit(os.sep, 2)[-2:])}:{stat.traceback[0].lineno}",
+                 "kb": round(stat.size / 1024, 1), "blocks": stat.count} for stat in stats[:top]]
+    }
+
+def build_scenarios(shows, expired, rng):
+
+    cold_ids = iter(range(1, 10_000_000))
+    known = []
+
+    async def suggestions(client, i):
+        return await client.get("/api/suggestions", params={"query": rng.choice(QUERIES)})
+
+    async def cold(client, i):
+        show_id = next(cold_ids)
+        known.append(show_id)
+        return await client.get("/api/show_details", params={"show_id": show_id})
+
+    async def warm(client, i):
+        return await client.get("/api/show_details", params={"show_id": rng.choice(known[:shows])})
+
+    async def seed_known():
+        # Warm reads need stored shows, whichever scenarios ran first
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            while len(known) < shows:
+                await cold(client, 0)
+
+    async def age_shows():
+        # Past the refresh age but inside retention, so reads are served stale and a refresh is scheduled
+        await seed_known()
+        stale = datetime.now(timezone.utc) - SHOW_MAX_AGE - timedelta(hours=1)
+        await baseQueries.db["shows"].update_many({"_id": {"$in": known[:shows]}}, {"$set": {"last_updated": stale}})
+        await clear_caches()
+
+    async def seed_expired():
+        expired_at = datetime.now(timezone.utc) - SHOW_RETENTION - timedelta(days=1)
+        start = 20_000_000 + rng.randrange(1_000_000) * expired
+        await baseQueries.db["shows"].insert_many([
+            {"_id": start + n, "title": f"Expired {n}", "episodes": [], "last_updated": expired_at} for n in range(expired)
+        ])
+
+    async def cleanup(client, i):
+        return await client.post("/api/cleanup", headers={"Authorization": f"Bearer {os.environ['CLEANUP_TOKEN']}"})
+
+    return {
+        "suggestions": Scenario("suggestions", suggestions, clear_caches),
+        "cold": Scenario("cold", cold),
+        "warm": Scenario("warm", warm, seed_known),
+        "stale": Scenario("stale", warm, age_shows),
+        "cleanup": Scenario("cleanup", cleanup, seed_expired)
+    }
+
+async def run(args):
+
+    scenarios = build_scenarios(args.shows, args.expired, random.Random(args.seed))
+    report = {}
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for name in args.scenarios:
+                scenario = scenarios[name]
+                report[name] = {"runs": []}
+                for concurrency in args.concurrency:
+                    report[name]["runs"].append(await drive(client, scenario, args.requests, concurrency))
+                if args.profile:
+                    report[name]["allocations"] = await profile(client, scenario, args.profile_requests, max(args.concurrency), args.profile_top)
+
+        backlog = main.app.state.refresh_scheduler.depth()
+
+    return report, backlog
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report, baseline, tolerance):
+
+    regressions = []
+    for name, scenario in report["scenarios"].items():
+        if name not in baseline.get("scenarios", {}):
+            continue
+        before = {run["concurrency"]: run for run in baseline["scenarios"][name]["runs"]}
+        for run in scenario["runs"]:
+            old = before.get(run["concurrency"])
+            if not old:
+                continue
+            p95 = run["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+            throughput = 1 - run["req_per_s"] / old["req_per_s"] if old["req_per_s"] else 0.0
+            run["vs_baseline"] = {"p95": round(p95, 3), "req_per_s": round(-throughput, 3)}
+            if p95 > tolerance or throughput > tolerance:
+                regressions.append(f"{name}@{run['concurrency']}")
+
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=["suggestions", "cold", "warm", "stale", "cleanup"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--shows", type=int, default=100)
+    parser.add_argument("--expired", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--episodes-per-season", type=int, default=10)
+    parser.add_argument("--overview-bytes", type=int, default=200)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--uri", default=None)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-requests", type=int, default=100)
+    parser.add_argument("--profile-top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    use_database(args.uri)
+    stub = create_stub_app(args.latency_ms / 1000, args.episodes_per_season, args.rate_limit_ratio, args.seed, args.overview_bytes)
+
+    with run_stub_server(stub) as base_url:
+        tmdb_service.TMDB_BASE_URL = base_url
+        scenarios, backlog = asyncio.run(run(args))
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "stub_rate_limited": stub.state.rate_limited,
+        "refresh_backlog": backlog,
+        "scenarios": scenarios
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,83 @@
+"""Scalar statistics helpers vs NumPy engine scoring time per show, plus catalog batch scoring.
+
+    python -m bench.metrics_bench
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from core.metrics import (getShowMetrics, getShowMetricsForShows, getStinkerScore, getHighlightScore,
+                          getLandThePlaneScore, getMomentum, getRatingConsistency, getRetentionRate,
+                          getBingeIndex, getWatchabilityScore)
+from models.show_model import Episode
+
+def scalar_metrics(episodes):
+
+    ratings = [episode.rating for episode in episodes]
+    average_rating = statistics.mean(ratings)
+    stinker_score = getStinkerScore(ratings)
+    stinkers = [episode.rating for episode in episodes if episode.rating <= stinker_score]
+    highlight_score = getHighlightScore(ratings)
+    highlights = [episode.rating for episode in episodes if episode.rating >= highlight_score]
+
+    return getWatchabilityScore(average_rating, getBingeIndex(episodes), getRatingConsistency(ratings),
+                                getMomentum(ratings), getRetentionRate([episode.vote_count for episode in episodes]),
+                                getLandThePlaneScore(ratings), len(episodes), len(stinkers), len(highlights),
+                                statistics.mean(highlights) if highlights else 0.0)
+
+def make_show(rng, length, seasons=10):
+    return [
+        Episode(id=i, season_number=1 + i * seasons // length, episode_number=i + 1, title="",
+                rating=round(rng.uniform(5, 10), 3), vote_count=rng.randint(1, 5000))
+        for i in range(length)
+    ]
+
+def per_call(fn, episodes, repeat):
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(episodes)
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--catalog", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    report = {"per_show": []}
+
+    for length in (10, 50, 100, 500, 1000, 2000):
+        episodes = make_show(rng, length)
+        repeat = max(5, 20000 // length)
+        scalar = per_call(scalar_metrics, episodes, repeat)
+        engine = per_call(getShowMetrics, episodes, repeat)
+        report["per_show"].append({
+            "episodes": length,
+            "scalar_ms": round(scalar * 1000, 4),
+            "engine_ms": round(engine * 1000, 4),
+            "speedup": round(scalar / engine, 2)
+        })
+
+    catalog = [make_show(rng, rng.randint(6, 200)) for _ in range(args.catalog)]
+
+    start = time.perf_counter()
+    for episodes in catalog:
+        scalar_metrics(episodes)
+    scalar_total = time.perf_counter() - start
+
+    start = time.perf_counter()
+    getShowMetricsForShows(catalog)
+    batch_total = time.perf_counter() - start
+
+    report["catalog"] = {
+        "shows": args.catalog,
+        "scalar_s": round(scalar_total, 3),
+        "batch_s": round(batch_total, 3),
+        "speedup": round(scalar_total / batch_total, 2)
+    }
+
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,86 @@
+"""Incremental summary updates vs a full getShowMetrics recompute, per refresh of a running show.
+
+Each show is stored with its summary, then refreshed the way full_refresh sees a running show:
+one new episode in the latest season ("append") or the latest season's ratings re-fetched with
+small drifts ("edit"). updateShowMetrics gets the previous show and the changed season; the
+baseline is getShowMetrics alone and getShowMetrics plus a summary rebuild. "fallbacks" counts
+refreshes where the summary could not be applied and the update rebuilt from every episode.
+
+    python -m bench.metrics_summary_bench --sizes 100 500 2000 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from core.metrics import getShowMetrics
+from core.metrics_summary import applySeasonUpdates, computeShowMetrics, seasonUpdates, updateShowMetrics
+from models.show_model import Episode, ShowModel
+
+SEASON_LENGTH = 20
+
+def make_episodes(rng, count):
+    return [Episode(id=i, season_number=1 + i // SEASON_LENGTH, episode_number=i % SEASON_LENGTH + 1, title=f"Episode {i}",
+                    rating=round(rng.uniform(5, 9.5), rng.choice([1, 3])), vote_count=rng.randint(1, 900)) for i in range(count)]
+
+def refreshes(rng, count, kind, shows):
+
+    cases = []
+    for _ in range(shows):
+        episodes = make_episodes(rng, count)
+        season = episodes[-1].season_number
+        stored = episodes[:-1] if kind == "append" else episodes
+        if kind == "edit":
+            episodes = [episode if episode.season_number != season else
+                        episode.model_copy(update={"rating": min(10.0, round(episode.rating + rng.uniform(-0.2, 0.2), 1))})
+                        for episode in episodes]
+
+        metrics, summary = computeShowMetrics(stored)
+        previous = ShowModel(id=1, title="Show", number_of_seasons=season, episodes=stored, metrics=metrics, metrics_summary=summary)
+        cases.append((previous, episodes, {season}))
+    return cases
+
+def per_call(fn, cases, repeat):
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            fn(*case)
+    return (time.perf_counter() - start) / (repeat * len(cases))
+
+def fallbacks(cases):
+
+    missed = 0
+    for previous, episodes, changed in cases:
+        updates = seasonUpdates(previous, episodes, changed)
+        if updates is None or applySeasonUpdates(previous.metrics_summary, updates) is None:
+            missed += 1
+    return missed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000, 5000])
+    parser.add_argument("--shows", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    report = []
+    for size in args.sizes:
+        repeat = max(3, 20000 // (size * args.shows))
+        for kind in ("append", "edit"):
+            cases = refreshes(rng, size, kind, args.shows)
+            full = per_call(lambda previous, episodes, changed: getShowMetrics(episodes), cases, repeat)
+            rebuild = per_call(lambda previous, episodes, changed: computeShowMetrics(episodes), cases, repeat)
+            incremental = per_call(updateShowMetrics, cases, repeat)
+            report.append({
+                "episodes": size,
+                "refresh": kind,
+                "get_show_metrics_ms": round(full * 1000, 4),
+                "full_rebuild_ms": round(rebuild * 1000, 4),
+                "incremental_ms": round(incremental * 1000, 4),
+                "speedup_vs_get_show_metrics": round(full / incremental, 2),
+                "fallbacks": fallbacks(cases)
+            })
+
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,43 @@
+"""np.polyfit vs the closed-form slope behind getMomentum, and the cost of a rolling single-episode update.
+
+    python -m bench.momentum_bench
+"""
+
+import json
+import random
+import time
+
+import numpy as np
+from core.metrics import getSlope, RollingMomentum
+
+def timed(fn, repeat):
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+if __name__ == "__main__":
+    rng = random.Random(11)
+    report = []
+
+    for length in (10, 100, 1000, 10000):
+        ratings = [round(rng.uniform(4, 10), 3) for _ in range(length)]
+        x = np.arange(length)
+        y = np.array(ratings)
+        repeat = max(20, 200000 // length)
+
+        rolling = RollingMomentum(ratings)
+        polyfit_slope = np.polyfit(x, y, 1)[0]
+        rolling_slope = rolling.slope()
+        appending = RollingMomentum(ratings)
+
+        report.append({
+            "ratings": length,
+            "polyfit_us": round(timed(lambda: np.polyfit(np.arange(length), np.array(ratings), 1), repeat), 2),
+            "closed_form_us": round(timed(lambda: getSlope(ratings), repeat), 2),
+            "rolling_append_us": round(timed(lambda: (appending.append(8.0), appending.score()), repeat), 2),
+            "max_abs_slope_diff": float(max(abs(getSlope(ratings) - polyfit_slope), abs(rolling_slope - polyfit_slope)))
+        })
+
+    print(json.dumps(report, indent=2))
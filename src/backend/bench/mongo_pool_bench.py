@@ -0,0 +1,109 @@
+"""Hot show reads against a replica set with many concurrent readers, across pool sizes, read
+preferences and wire compressors.
+
+Needs a real replica set (mongomock has no pool, no secondaries and no wire protocol), e.g. a local
+three-member set started with `mongod --replSet rs0` x3 and `rs.initiate(...)`. Shows are seeded into a
+scratch database on the primary, then each configuration runs --readers coroutines that each issue
+--reads find_one calls for random ids, through a client built by db.mongodb.create_client. The report
+is JSON: req/s and latency percentiles per configuration plus the pool checkout waits and failures.
+
+    python -m bench.mongo_pool_bench --uri "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0" \\
+        --readers 1000 --pool-sizes 50 100 200 --preferences primary secondaryPreferred --compressors none zstd snappy
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from bench.stats import summarize
+from bench.show_response_bench import make_show
+from crud.modeledQueries import show_document
+from db.mongodb import PoolMetricsListener, create_client, hot_read_preference
+
+class CheckoutRecorder(PoolMetricsListener):
+
+    def __init__(self):
+        self.waits = []
+        self.failures = {}
+
+    def connection_checked_out(self, event):
+        super().connection_checked_out(event)
+        self.waits.append(event.duration or 0.0)
+
+    def connection_check_out_failed(self, event):
+        super().connection_check_out_failed(event)
+        self.failures[str(event.reason)] = self.failures.get(str(event.reason), 0) + 1
+
+async def seed(uri, database, shows, episodes):
+
+    client = create_client(uri)
+    collection = client[database]["shows"]
+    await collection.drop()
+    show = make_show(random.Random(7), episodes)
+    docs = []
+    for show_id in range(1, shows + 1):
+        doc = show_document(show)
+        doc.update({"_id": show_id, "last_updated": datetime.now(timezone.utc)})
+        docs.append(doc)
+    await collection.insert_many(docs)
+    client.close()
+
+async def run(uri, database, shows, readers, reads, pool_size, preference, compressor):
+
+    recorder = CheckoutRecorder()
+    options = {"maxPoolSize": pool_size, "event_listeners": [recorder]}
+    options["compressors"] = [] if compressor == "none" else [compressor]
+    client = create_client(uri, **options)
+    collection = client[database]["shows"].with_options(read_preference=hot_read_preference(preference))
+    await collection.find_one({"_id": 1})
+
+    latencies = []
+
+    async def reader():
+        for _ in range(reads):
+            start = time.perf_counter()
+            await collection.find_one({"_id": random.randint(1, shows)})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(reader() for _ in range(readers)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    return {
+        "pool_size": pool_size,
+        "preference": preference,
+        "compressor": compressor,
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "latency": summarize(latencies),
+        "checkout_wait": summarize(recorder.waits) if recorder.waits else None,
+        "checkout_failures": recorder.failures
+    }
+
+async def main(args):
+
+    await seed(args.uri, args.database, args.shows, args.episodes)
+    report = []
+    for pool_size in args.pool_sizes:
+        for preference in args.preferences:
+            for compressor in args.compressors:
+                report.append(await run(args.uri, args.database, args.shows, args.readers, args.reads, pool_size, preference, compressor))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", required=True)
+    parser.add_argument("--database", default="bingelogic_pool_bench")
+    parser.add_argument("--shows", type=int, default=500)
+    parser.add_argument("--episodes", type=int, default=60)
+    parser.add_argument("--readers", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=20)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--preferences", nargs="+", default=["primary", "secondaryPreferred"])
+    parser.add_argument("--compressors", nargs="+", default=["none", "zstd", "snappy", "zlib"])
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,29 @@
+"""mongomock-motor stand-in for the BingeLogic database, shared by the benches and the unit tests."""
+
+from mongomock_motor import AsyncMongoMockClient
+from crud import baseQueries
+
+def use_mock_bulk_writes(database, patch=setattr):
+
+    # mongomock's bulk_write rejects the sort field pymongo 4.9+ puts on ReplaceOne and UpdateOne,
+    # so bulk writes fall back to one write per document; the batch sizes are kept on database.bulk_writes
+    database.bulk_writes = []
+
+    async def bulk_replace(collection, docs):
+        database.bulk_writes.append(len(docs))
+        for doc in docs:
+            await baseQueries.db[collection].replace_one({"_id": doc["_id"]}, doc, upsert=True)
+
+    async def bulk_update(collection, updates):
+        database.bulk_writes.append(len(updates))
+        for id_val, data in updates:
+            await baseQueries.db[collection].update_one({"_id": id_val}, {"$set": data})
+
+    patch(baseQueries, "bulk_replace", bulk_replace)
+    patch(baseQueries, "bulk_update", bulk_update)
+
+def use_mock_database(name: str = "bingelogic_bench", client=None, patch=setattr):
+    database = (client or AsyncMongoMockClient()).get_database(name)
+    patch(baseQueries, "db", database)
+    use_mock_bulk_writes(database, patch)
+    return database
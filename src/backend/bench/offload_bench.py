@@ -0,0 +1,70 @@
+"""Event loop responsiveness while large shows are scored: inline vs thread vs process executors.
+
+A probe coroutine sleeps 1ms in a loop and records how late it wakes, standing in for the
+light requests sharing a worker with the refreshes. Both run on one event loop.
+
+    python -m bench.offload_bench --episodes 3000 --refreshes 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from bench.stats import summarize
+from core import executor
+from core.executor import run_cpu_bound
+from core.metrics_summary import updateShowMetrics
+from models.show_model import Episode
+
+def make_episodes(rng, count):
+    return [Episode(id=i, season_number=1 + i // 20, episode_number=i % 20 + 1, title=f"Episode {i}",
+                    rating=round(rng.uniform(5, 9.5), 3), vote_count=rng.randint(1, 900)) for i in range(count)]
+
+async def run(mode, shows, concurrency):
+
+    executor.shutdown_executor()
+    executor.METRICS_EXECUTOR = mode
+    executor.METRICS_INLINE_THRESHOLD = 1
+
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(max(time.perf_counter() - start - 0.001, 0.0))
+
+    async def refreshes():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(episodes):
+            async with semaphore:
+                await run_cpu_bound(updateShowMetrics, None, episodes, None, size=len(episodes))
+
+        await run_cpu_bound(len, [], size=1)
+        start = time.perf_counter()
+        await asyncio.gather(*[one(episodes) for episodes in shows])
+        done.set()
+        return time.perf_counter() - start
+
+    probing = asyncio.create_task(probe())
+    elapsed = await refreshes()
+    await probing
+    executor.shutdown_executor()
+
+    return {"refresh_seconds": round(elapsed, 3), "probe_lag": summarize(lags)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=3000)
+    parser.add_argument("--refreshes", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    rng = random.Random(8)
+    shows = [make_episodes(rng, args.episodes) for _ in range(args.refreshes)]
+    print(json.dumps({mode: asyncio.run(run(mode, shows, args.concurrency)) for mode in args.modes}, indent=2))
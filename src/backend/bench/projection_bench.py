@@ -0,0 +1,73 @@
+"""Response size and read+serialization time for /show_details: the full document vs the
+projected summary vs a single season page.
+
+Runs against mongomock-motor by default, or a real mongod with --uri mongodb://localhost:27017.
+
+    python -m bench.projection_bench --episodes 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from crud import baseQueries, modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_by_id, db_get_show_summary_by_id, db_get_episode_page
+from core.metrics_summary import updateShowMetrics
+from models.show_model import ShowModel, Episode
+
+def make_show(rng, count, per_season):
+    episodes = [Episode(id=i, season_number=1 + i // per_season, episode_number=i % per_season + 1, title=f"Episode {i}",
+                        rating=round(rng.uniform(6, 9.5), 3), air_date="2020-01-01", vote_count=rng.randint(10, 900))
+                for i in range(count)]
+    metrics, summary = updateShowMetrics(None, episodes)
+    return ShowModel(id=88, title="Bench", overview="x" * 400, number_of_seasons=episodes[-1].season_number,
+                     episodes=episodes, metrics=metrics, metrics_summary=summary)
+
+async def measure(load, repeat):
+
+    read_ms = 0.0
+    encode_ms = 0.0
+    body = b""
+
+    for _ in range(repeat):
+        modeledQueries.show_cache.clear()
+        start = time.perf_counter()
+        value = await load()
+        read_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        body = json.dumps(jsonable_encoder(value)).encode()
+        encode_ms += (time.perf_counter() - start) * 1000
+
+    return {"bytes": len(body), "ms_read": round(read_ms / repeat, 3), "ms_serialize": round(encode_ms / repeat, 3)}
+
+async def run(count, per_season, repeat):
+
+    await db_upsert_show(make_show(random.Random(4), count, per_season))
+
+    return {
+        "episodes": count,
+        "full": await measure(lambda: db_get_show_by_id(88), repeat),
+        "summary": await measure(lambda: db_get_show_summary_by_id(88), repeat),
+        "season_page": await measure(lambda: db_get_episode_page(88, 1), repeat)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--per-season", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    if args.uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        baseQueries.db = AsyncIOMotorClient(args.uri).get_database("bingelogic_bench")
+    else:
+        from bench.mongomock_db import use_mock_database
+        use_mock_database()
+
+    print(json.dumps(asyncio.run(run(args.episodes, args.per_season, args.repeat)), indent=2))
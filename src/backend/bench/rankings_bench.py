@@ -0,0 +1,93 @@
+"""Ranking page latency over a synthetic catalog: the in-memory index directly, the /api/rankings
+endpoint served from it (in-process ASGI), and the cost of applying one refreshed show. The load
+figures show the full rebuild time and the longest stretch it holds the event loop.
+
+    python -m bench.rankings_bench --shows 100000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from bench.stats import summarize
+from core.rankings import RankedShow, RANKED_METRICS
+from crud.modeledQueries import ranking_index
+from main import app
+
+GENRES = ["Drama", "Comedy", "Crime", "Animation", "Documentary", "Sci-Fi & Fantasy", "Mystery", "Reality"]
+
+def make_show(rng, show_id):
+    return RankedShow(
+        id = show_id,
+        title = f"Show {show_id}",
+        poster_path = None,
+        genres = tuple(rng.sample(GENRES, rng.randint(1, 3))),
+        scores = {metric: round(rng.uniform(0, 100), 2) for metric in RANKED_METRICS}
+    )
+
+def random_cursor(rng, metric, genre, limit):
+    rows, _ = ranking_index.page(metric, genre, None, rng.randint(1, 2000))
+    return (rows[-1].scores[metric], rows[-1].id) if rows else None
+
+async def run(count, requests, limit):
+
+    rng = random.Random(6)
+    shows = [make_show(rng, i) for i in range(count)]
+
+    ranking_index.begin_load()
+    steps = []
+    start = step = time.perf_counter()
+    for _ in ranking_index.load_steps(shows):
+        steps.append(time.perf_counter() - step)
+        step = time.perf_counter()
+    load_seconds = time.perf_counter() - start
+
+    direct = []
+    for _ in range(requests):
+        metric, genre = rng.choice(list(RANKED_METRICS)), rng.choice([None] + GENRES)
+        after = random_cursor(rng, metric, genre, limit)
+        start = time.perf_counter()
+        ranking_index.page(metric, genre, after, limit)
+        direct.append(time.perf_counter() - start)
+
+    updates = []
+    for _ in range(requests):
+        show = make_show(rng, rng.randrange(count))
+        start = time.perf_counter()
+        ranking_index.update(show)
+        updates.append(time.perf_counter() - start)
+
+    endpoint = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for _ in range(requests):
+            metric, genre = rng.choice(list(RANKED_METRICS)), rng.choice([None] + GENRES)
+            params = {"limit": limit, **({"genre": genre} if genre else {})}
+            first = (await client.get(f"/api/rankings/{metric}", params={**params, "limit": rng.randint(1, 100)})).json()
+            if first["next_cursor"]:
+                params["cursor"] = first["next_cursor"]
+            start = time.perf_counter()
+            res = await client.get(f"/api/rankings/{metric}", params=params)
+            endpoint.append(time.perf_counter() - start)
+            assert res.status_code == 200
+
+    return {
+        "shows": count,
+        "load_seconds": round(load_seconds, 3),
+        "load_longest_step_ms": round(max(steps) * 1000, 1),
+        "page_direct": summarize(direct),
+        "update": summarize(updates),
+        "page_endpoint": summarize(endpoint)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.shows, args.requests, args.limit)), indent=2))
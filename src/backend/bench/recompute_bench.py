@@ -0,0 +1,51 @@
+"""Scoring throughput of the catalog recompute job's process pool at several worker counts.
+
+Chunks are built from synthetic stored-episode documents and pushed through the same
+score_chunk function the job uses, so the numbers isolate CPU scaling from Mongo.
+
+    python -m bench.recompute_bench --shows 20000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.recompute_service import score_chunk
+
+def make_chunks(rng, count, chunk_size):
+    docs = []
+    for show_id in range(count):
+        episodes = [{"id": show_id * 1000 + i, "season_number": 1 + i // 12, "episode_number": i % 12 + 1,
+                     "rating": round(rng.uniform(5, 9.5), 3), "vote_count": rng.randint(1, 900)} for i in range(rng.randint(8, 120))]
+        docs.append((show_id, None, episodes))
+    return [docs[i:i + chunk_size] for i in range(0, len(docs), chunk_size)]
+
+def run(chunks, workers):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        scored = sum(len(result) for result in pool.map(score_chunk, chunks))
+    return scored / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shows", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    chunks = make_chunks(random.Random(7), args.shows, args.chunk_size)
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        score_chunk(chunk)
+    inline = args.shows / (time.perf_counter() - start)
+
+    report = {"cpu_count": os.cpu_count(), "shows": args.shows, "inline_shows_per_s": round(inline, 1)}
+    for workers in args.workers:
+        rate = run(chunks, workers)
+        report[f"workers_{workers}"] = {"shows_per_s": round(rate, 1), "speedup": round(rate / inline, 2)}
+
+    print(json.dumps(report, indent=2))
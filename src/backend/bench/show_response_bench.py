@@ -0,0 +1,95 @@
+"""Single-worker throughput of /api/show_details for the cold (not cached), warm (cached, pre-encoded)
+and 304 (matching If-None-Match) paths, plus the per-request encode cost the fast path avoids.
+
+Requests go through httpx.ASGITransport in-process, so numbers include client overhead but no network.
+Runs against mongomock-motor by default, or a real mongod with --uri mongodb://localhost:27017.
+
+    python -m bench.show_response_bench --episodes 500 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from crud import baseQueries, modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_by_id
+from core.metrics_summary import updateShowMetrics
+from main import app
+from models.show_model import ShowModel, Episode
+from services import response_service
+from services.response_service import encode_show
+
+def make_show(rng, count):
+    episodes = [Episode(id=i, season_number=1 + i // 20, episode_number=i % 20 + 1, title=f"Episode {i}",
+                        rating=round(rng.uniform(6, 9.5), 3), air_date="2020-01-01", vote_count=rng.randint(10, 900))
+                for i in range(count)]
+    metrics, summary = updateShowMetrics(None, episodes)
+    return ShowModel(id=99, title="Bench", number_of_seasons=episodes[-1].season_number, episodes=episodes,
+                     metrics=metrics, metrics_summary=summary)
+
+async def throughput(client, requests, headers=None, cold=False):
+
+    status = None
+    start = time.perf_counter()
+    for _ in range(requests):
+        if cold:
+            modeledQueries.show_cache.clear()
+            response_service.show_json_cache.clear()
+        res = await client.get("/api/show_details", params={"show_id": 99}, headers=headers)
+        status = res.status_code
+    elapsed = time.perf_counter() - start
+
+    return {"status": status, "req_per_s": round(requests / elapsed, 1), "ms_per_req": round(elapsed / requests * 1000, 3)}
+
+def encode_cost(show, repeat):
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.dumps(jsonable_encoder(show), ensure_ascii=False, separators=(",", ":")).encode()
+    default_ms = (time.perf_counter() - start) / repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode_show(show)
+    cached_ms = (time.perf_counter() - start) / repeat * 1000
+
+    return {"ms_default_encode": round(default_ms, 3), "ms_cached_bytes": round(cached_ms, 4)}
+
+async def run(count, requests):
+
+    await db_upsert_show(make_show(random.Random(5), count))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        cold = await throughput(client, max(requests // 10, 10), cold=True)
+        etag = (await client.get("/api/show_details", params={"show_id": 99})).headers["etag"]
+        warm = await throughput(client, requests)
+        not_modified = await throughput(client, requests, headers={"If-None-Match": etag})
+
+    return {
+        "episodes": count,
+        "cold": cold,
+        "warm": warm,
+        "not_modified": not_modified,
+        "encode": encode_cost(await db_get_show_by_id(99), 50)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    if args.uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        baseQueries.db = AsyncIOMotorClient(args.uri).get_database("bingelogic_bench")
+    else:
+        from bench.mongomock_db import use_mock_database
+        use_mock_database()
+
+    print(json.dumps(asyncio.run(run(args.episodes, args.requests)), indent=2))
@@ -0,0 +1,18 @@
+import statistics
+from typing import List, Dict
+
+def percentile(samples: List[float], q: float) -> float:
+
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3)
+    }
@@ -0,0 +1,61 @@
+"""Time to first byte and to the last byte for a cold show via /api/show_details vs /api/show_details/stream.
+
+Both the app and the TMDB stub are served by uvicorn on background threads, so bytes really are flushed
+over a socket. A share of season requests is made slow to stand in for tail latency.
+
+    python -m bench.stream_bench --shows 20 --latency-ms 30 --slow-ratio 0.2 --slow-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import main
+from bench.load_bench import use_database
+from bench.stats import summarize
+from bench.tmdb_stub import create_stub_app, run_stub_server
+from services import tmdb_service
+
+async def timed_get(client, path, show_id):
+
+    start = time.perf_counter()
+    async with client.stream("GET", path, params={"show_id": show_id}) as res:
+        first = None
+        async for _ in res.aiter_raw():
+            if first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+
+async def run(base_url, shows):
+
+    report = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for name, path, offset in (("plain", "/api/show_details", 0), ("stream", "/api/show_details/stream", 100_000)):
+            first, total = [], []
+            for show_id in range(1, shows + 1):
+                ttfb, elapsed = await timed_get(client, path, offset + show_id * 5 + 4)
+                first.append(ttfb)
+                total.append(elapsed)
+            report[name] = {"ttfb": summarize(first), "total": summarize(total)}
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shows", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--episodes-per-season", type=int, default=20)
+    parser.add_argument("--slow-ratio", type=float, default=0.2)
+    parser.add_argument("--slow-latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    use_database(None)
+    stub = create_stub_app(args.latency_ms / 1000, args.episodes_per_season, slow_ratio=args.slow_ratio, slow_latency=args.slow_latency_ms / 1000)
+
+    with run_stub_server(stub) as tmdb_url:
+        tmdb_service.TMDB_BASE_URL = tmdb_url
+        with run_stub_server(main.app) as app_url:
+            report = asyncio.run(run(app_url.removesuffix("/3"), args.shows))
+
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,103 @@
+"""Upstream TMDB search calls for a replayed type-ahead trace, with and without the suggestion cache.
+
+The stand-in search follows TMDB rather than the cache: ignoring case and accents, every query word
+has to start a word of the name, the original name or one of the alternative titles, and the
+alternative titles are not part of the results. Each cached answer is checked against the stand-in, so the report also counts keystrokes
+whose suggestions differ from what TMDB would have returned.
+
+    python -m bench.suggestion_trace_bench --users 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import unicodedata
+
+from models.show_model import SearchResult, SearchPage
+from services import suggestion_service
+
+# (name, original name, alternative titles)
+CATALOG = [
+    ("Breaking Bad", "Breaking Bad", []), ("Better Call Saul", "Better Call Saul", []), ("The Bear", "The Bear", []),
+    ("Severance", "Severance", []), ("Succession", "Succession", []), ("The Wire", "The Wire", []),
+    ("The Sopranos", "The Sopranos", []), ("Mad Men", "Mad Men", []), ("Fargo", "Fargo", []),
+    ("True Detective", "True Detective", []), ("The Leftovers", "The Leftovers", []), ("Twin Peaks", "Twin Peaks", []),
+    ("The Office", "The Office", ["The Office US"]), ("Parks and Recreation", "Parks and Recreation", ["Parks and Rec"]),
+    ("Brooklyn Nine-Nine", "Brooklyn Nine-Nine", ["Brooklyn 99"]), ("Barry", "Barry", []), ("Atlanta", "Atlanta", []),
+    ("BoJack Horseman", "BoJack Horseman", []), ("Band of Brothers", "Band of Brothers", []),
+    ("Battlestar Galactica", "Battlestar Galactica", ["BSG"]), ("Better Things", "Better Things", []),
+    ("Black Mirror", "Black Mirror", []), ("Boardwalk Empire", "Boardwalk Empire", []), ("Broadchurch", "Broadchurch", []),
+    ("Bluey", "Bluey", []), ("Dark", "Dark", []), ("Deadwood", "Deadwood", []), ("Veep", "Veep", []),
+    ("The Americans", "The Americans", []), ("Halt and Catch Fire", "Halt and Catch Fire", []),
+    ("Mr. Robot", "Mr. Robot", ["Mister Robot"]), ("Andor", "Andor", ["Star Wars: Andor"]), ("Shogun", "SHOGUN", ["Shōgun"]),
+    ("Money Heist", "La casa de papel", ["Casa de Papel"]), ("Squid Game", "오징어 게임", []),
+    ("Dark Matter", "Dark Matter", []), ("Baby Reindeer", "Baby Reindeer", [])
+]
+PAGE_SIZE = 20
+
+def words(text: str) -> list:
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return re.findall(r"\w+", "".join(char for char in decomposed if not unicodedata.combining(char)))
+
+def search_catalog(query: str) -> SearchPage:
+
+    query = words(query)
+    matches = [
+        SearchResult(tmdb_id=i, title=name, original_title=original, poster_path=None, release_date=None)
+        for i, (name, original, alternatives) in enumerate(CATALOG)
+        if any(all(any(word.startswith(q) for word in words(title)) for q in query) for title in [name, original, *alternatives])
+    ]
+    return SearchPage(results=matches[:PAGE_SIZE], total_results=len(matches))
+
+def keystroke_trace(users: int, seed: int = 7) -> list:
+
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(users):
+        title = rng.choice([title for name, original, alternatives in CATALOG for title in [name, original, *alternatives]])
+        typed = title[:rng.randint(3, len(title))]
+        trace.extend(typed[:end] for end in range(2, len(typed) + 1))
+
+    return trace
+
+async def replay(trace: list, cached: bool) -> tuple:
+
+    calls = 0
+    mismatches = 0
+
+    async def upstream(query, client=None):
+        nonlocal calls
+        calls += 1
+        return search_catalog(query.casefold())
+
+    suggestion_service.tmdb_search_shows = upstream
+    suggestion_service.suggestion_cache.clear()
+
+    for query in trace:
+        if cached:
+            results = await suggestion_service.get_cached_suggestions(query)
+            expected = search_catalog(suggestion_service.normalize_query(query)).results
+            mismatches += [result.tmdb_id for result in results] != [result.tmdb_id for result in expected]
+        else:
+            await upstream(query)
+
+    return calls, mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    trace = keystroke_trace(args.users)
+    uncached, _ = asyncio.run(replay(trace, cached=False))
+    cached, mismatches = asyncio.run(replay(trace, cached=True))
+
+    print(json.dumps({
+        "keystrokes": len(trace),
+        "upstream_calls_uncached": uncached,
+        "upstream_calls_cached": cached,
+        "reduction_pct": round(100 * (1 - cached / uncached), 2),
+        "mismatched_keystrokes": mismatches
+    }, indent=2))
@@ -0,0 +1,56 @@
+"""Per-request TMDB latency with the shared pooled client vs a client per call.
+
+    python -m bench.tmdb_client_bench --requests 500 --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from bench.stats import summarize
+from bench.tmdb_stub import create_stub_app, run_stub_server
+from services import tmdb_service
+from services.tmdb_service import create_tmdb_client, tmdb_get_show_details, tmdb_get_shows, tmdb_get_episodes_single_season
+
+CALLS = {
+    "search": lambda i, client: tmdb_get_shows(f"show {i}", client),
+    "details": lambda i, client: tmdb_get_show_details(i, client),
+    "season": lambda i, client: tmdb_get_episodes_single_season(i, 1, client)
+}
+
+async def measure(call, requests: int, client) -> list:
+
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await call(i, client)
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+async def run(requests: int) -> dict:
+
+    report = {}
+    for name, call in CALLS.items():
+        per_call = await measure(call, requests, None)
+
+        async with create_tmdb_client() as client:
+            await call(0, client)
+            pooled = await measure(call, requests, client)
+
+        report[name] = {"per_call": summarize(per_call), "pooled": summarize(pooled)}
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with run_stub_server(create_stub_app(args.latency_ms / 1000)) as base_url:
+        tmdb_service.TMDB_BASE_URL = base_url
+        report = asyncio.run(run(args.requests))
+
+    print(json.dumps(report, indent=2))
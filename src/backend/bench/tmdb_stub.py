@@ -0,0 +1,154 @@
+"""Local stand-in for the subset of the TMDB v3 API the backend calls.
+
+Run standalone with ``python -m bench.tmdb_stub --port 8765`` and point the
+backend at it with ``TMDB_BASE_URL=http://127.0.0.1:8765/3``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+def stub_seasons(show_id: int) -> int:
+    return (show_id % 5) + 1
+
+def stub_episode(show_id: int, season: int, number: int, overview_bytes: int = 200) -> dict:
+    seed = (show_id * 31 + season * 7 + number) % 40
+    return {
+        "id": show_id * 10000 + season * 100 + number,
+        "episode_number": number,
+        "name": f"Episode {number}",
+        "vote_average": round(6.0 + seed / 10, 3),
+        "air_date": f"20{10 + season:02d}-01-{number % 28 + 1:02d}",
+        "vote_count": 50 + seed * 3,
+        "overview": "x" * overview_bytes
+    }
+
+def create_stub_app(latency: float = 0.0, episodes_per_season: int = 10, rate_limit_ratio: float = 0.0, seed: int = 0,
+                    overview_bytes: int = 200, error_ratio: float = 0.0, slow_ratio: float = 0.0, slow_latency: float = 0.0,
+                    slow_first: int = 0) -> FastAPI:
+
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.rate_limited = 0
+    app.state.requests = 0
+
+    # Fault settings live on app.state so tests can change them while the stub is serving
+    app.state.error_ratio = error_ratio
+    app.state.slow_ratio = slow_ratio
+    app.state.slow_latency = slow_latency
+    app.state.slow_first = slow_first
+
+    # Mirrors TMDB's 429 responses so clients exercise their retry path
+    @app.middleware("http")
+    async def rate_limit(request: Request, call_next):
+        if rate_limit_ratio and rng.random() < rate_limit_ratio:
+            app.state.rate_limited += 1
+            return Response(status_code=429, content=b'{"status_code":25,"status_message":"Rate limited"}', media_type="application/json")
+        return await call_next(request)
+
+    # Server errors and tail latency; the first slow_first requests are always slow
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        app.state.requests += 1
+        if app.state.requests <= app.state.slow_first or (app.state.slow_ratio and rng.random() < app.state.slow_ratio):
+            await asyncio.sleep(app.state.slow_latency)
+        if app.state.error_ratio and rng.random() < app.state.error_ratio:
+            return Response(status_code=503, content=b'{"status_code":9,"status_message":"Service offline"}', media_type="application/json")
+        return await call_next(request)
+
+    async def delay():
+        if latency:
+            await asyncio.sleep(latency)
+
+    @app.get("/3/search/tv")
+    async def search(query: str):
+        await delay()
+        return {
+            "page": 1,
+            "total_results": 3,
+            "results": [
+                {"id": 1000 + i, "name": f"{query.title()} {i}", "poster_path": None, "first_air_date": "2020-01-01"}
+                for i in range(3)
+            ]
+        }
+
+    @app.get("/3/tv/{show_id}")
+    async def details(show_id: int):
+        await delay()
+        return {
+            "id": show_id,
+            "name": f"Show {show_id}",
+            "overview": "A show served by the local TMDB stub.",
+            "poster_path": None,
+            "backdrop_path": None,
+            "first_air_date": "2011-01-01",
+            "genres": [{"id": 18, "name": "Drama"}],
+            "number_of_seasons": stub_seasons(show_id),
+            "popularity": 42.123,
+            "status": "Returning Series",
+            "last_air_date": "2024-01-01"
+        }
+
+    @app.get("/3/tv/{show_id}/season/{season}")
+    async def season(show_id: int, season: int, request: Request):
+        await delay()
+        body = json.dumps({
+            "season_number": season,
+            "episodes": [stub_episode(show_id, season, n, overview_bytes) for n in range(1, episodes_per_season + 1)]
+        }).encode()
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    return app
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextlib.contextmanager
+def run_stub_server(app: FastAPI, port: int = None):
+
+    port = port or free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", loop="asyncio")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        yield f"http://127.0.0.1:{port}/3"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--episodes-per-season", type=int, default=10)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--overview-bytes", type=int, default=200)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_stub_app(args.latency_ms / 1000, args.episodes_per_season, args.rate_limit_ratio, overview_bytes=args.overview_bytes,
+                          error_ratio=args.error_ratio, slow_ratio=args.slow_ratio, slow_latency=args.slow_latency_ms / 1000)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,99 @@
+"""Mongo write volume and latency for refresh writes: delete+insert vs upsert vs diff-based $set.
+
+Runs against mongomock-motor by default, or a real mongod with --uri mongodb://localhost:27017.
+
+    python -m bench.write_volume_bench --episodes 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import bson
+from crud import baseQueries
+from crud.modeledQueries import show_document, show_changes, db_upsert_show, db_save_show_changes, db_get_show_by_id
+from core.metrics_summary import updateShowMetrics
+from models.show_model import ShowModel, Episode
+
+def make_show(episodes):
+    metrics, summary = updateShowMetrics(None, episodes)
+    return ShowModel(id=77, title="Bench", number_of_seasons=episodes[-1].season_number, episodes=episodes,
+                     metrics=metrics, metrics_summary=summary)
+
+def scenarios(rng, count):
+
+    episodes = [Episode(id=i, season_number=1 + i // 20, episode_number=i % 20 + 1, title=f"Episode {i}",
+                        rating=round(rng.uniform(6, 9.5), 3), vote_count=rng.randint(10, 900)) for i in range(count)]
+
+    unchanged = list(episodes)
+    edited = list(episodes)
+    edited[-3] = edited[-3].model_copy(update={"rating": 9.9, "vote_count": edited[-3].vote_count + 4})
+    appended = episodes + [Episode(id=count + i, season_number=episodes[-1].season_number + 1, episode_number=i + 1,
+                                   title="New", rating=8.1, vote_count=50) for i in range(3)]
+
+    return episodes, {"unchanged": unchanged, "one_rating_changed": edited, "episodes_appended": appended}
+
+async def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+async def run(count, repeat):
+
+    rng = random.Random(2)
+    base_episodes, cases = scenarios(rng, count)
+    report = {}
+
+    for name, episodes in cases.items():
+        await db_upsert_show(make_show(base_episodes))
+        previous = await db_get_show_by_id(77)
+        metrics, summary = updateShowMetrics(previous, episodes)
+        current = make_show(episodes).model_copy(update={"metrics": metrics, "metrics_summary": summary})
+
+        document = show_document(current)
+        changes = show_changes(show_document(previous), document)
+
+        async def delete_insert():
+            await baseQueries.delete("shows", {"_id": 77})
+            await baseQueries.insert("shows", show_document(current))
+
+        async def diff():
+            await db_upsert_show(make_show(base_episodes))
+            stored = await db_get_show_by_id(77)
+            start = time.perf_counter()
+            await db_save_show_changes(stored, current)
+            return time.perf_counter() - start
+
+        diff_ms = 0.0
+        for _ in range(repeat):
+            diff_ms += await diff() * 1000
+
+        report[name] = {
+            "bytes_delete_insert": len(bson.encode({"_id": 77})) + len(bson.encode(document)),
+            "bytes_upsert": len(bson.encode(document)),
+            "bytes_diff_set": len(bson.encode({"$set": changes})) if changes else 0,
+            "ms_delete_insert": round(await timed(delete_insert, repeat), 3),
+            "ms_upsert": round(await timed(lambda: db_upsert_show(current), repeat), 3),
+            "ms_diff_set": round(diff_ms / repeat, 3)
+        }
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+
+    if args.uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        baseQueries.db = AsyncIOMotorClient(args.uri).get_database("bingelogic_bench")
+    else:
+        from bench.mongomock_db import use_mock_database
+        use_mock_database()
+
+    print(json.dumps(asyncio.run(run(args.episodes, args.repeat)), indent=2))
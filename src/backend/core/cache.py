@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from core.instrumentation import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, CACHE_BYTES
+
+class TTLCache:
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_MISSES.labels(self.name).inc()
+            return None
+
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            CACHE_MISSES.labels(self.name).inc()
+            return None
+
+        self._entries.move_to_end(key)
+        CACHE_HITS.labels(self.name).inc()
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+
+        entry = self._entries.get(key)
+        if entry is None or entry[2] <= time.monotonic():
+            return None
+
+        return entry[0]
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        left = entry[2] - time.monotonic()
+        return left if left > 0 else None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 1, generation: Optional[int] = None):
+
+        # A value loaded before an invalidation landed may already be outdated, so it is dropped
+        if generation is not None and generation != self.generation:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._remove(key)
+
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            CACHE_EVICTIONS.labels(self.name).inc()
+
+        CACHE_BYTES.labels(self.name).set(self.bytes)
+
+    def invalidate(self, key: Hashable):
+        self.generation += 1
+        self._remove(key)
+        CACHE_BYTES.labels(self.name).set(self.bytes)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self.bytes = 0
+        CACHE_BYTES.labels(self.name).set(0)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
@@ -0,0 +1,57 @@
+import time
+from core.instrumentation import CIRCUIT_STATE, CIRCUIT_REJECTED
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._state = CLOSED
+        CIRCUIT_STATE.labels(name).set(0)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+
+        state = self.state
+        if state == CLOSED:
+            return True
+
+        # Once the reset timeout passes a single probe goes through; everyone else keeps failing fast
+        if state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+
+        CIRCUIT_REJECTED.labels(self.name).inc()
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+        self._set(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set(OPEN)
+
+    def release(self):
+        # A call that ended without an outcome (e.g. cancelled) hands the probe to the next caller
+        self.probing = False
+
+    def _set(self, state: str):
+        self._state = state
+        CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
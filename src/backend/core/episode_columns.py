@@ -0,0 +1,58 @@
+import os
+import numpy as np
+from bson import Binary
+from models.show_model import Episode
+from typing import Any, Dict, List, Sequence
+
+EPISODE_STORAGE = os.getenv("EPISODE_STORAGE", "documents").lower()
+EPISODE_COLUMNS_FORMAT = 1
+
+# Fixed little-endian dtypes so packed columns read back identically on any host
+NUMERIC_COLUMNS = {
+    "id": np.dtype("<i8"),
+    "season_number": np.dtype("<i4"),
+    "episode_number": np.dtype("<i4"),
+    "rating": np.dtype("<f8"),
+    "vote_count": np.dtype("<i8")
+}
+
+def use_columns() -> bool:
+    return EPISODE_STORAGE == "columnar"
+
+def encode_episode_columns(episodes: Sequence[Episode]) -> Dict[str, Any]:
+
+    columns: Dict[str, Any] = {"format": EPISODE_COLUMNS_FORMAT, "count": len(episodes)}
+    for name, dtype in NUMERIC_COLUMNS.items():
+        values = np.fromiter((getattr(episode, name) for episode in episodes), dtype, len(episodes))
+        columns[name] = Binary(values.tobytes())
+
+    columns["title"] = [episode.title for episode in episodes]
+    columns["air_date"] = [episode.air_date for episode in episodes]
+    return columns
+
+def episode_arrays(columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+
+    # Read-only views over the BSON bytes; nothing is copied
+    return {name: np.frombuffer(columns[name], dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+
+def episode_dicts(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+    arrays = {name: values.tolist() for name, values in episode_arrays(columns).items()}
+    return [
+        {
+            "id": episode_id,
+            "season_number": season_number,
+            "episode_number": episode_number,
+            "title": title,
+            "rating": rating,
+            "air_date": air_date,
+            "vote_count": vote_count
+        }
+        for episode_id, season_number, episode_number, title, rating, air_date, vote_count in zip(
+            arrays["id"], arrays["season_number"], arrays["episode_number"], columns["title"],
+            arrays["rating"], columns["air_date"], arrays["vote_count"]
+        )
+    ]
+
+def decode_episode_columns(columns: Dict[str, Any]) -> List[Episode]:
+    return [Episode(**episode) for episode in episode_dicts(columns)]
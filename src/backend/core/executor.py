@@ -0,0 +1,42 @@
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from core.instrumentation import CPU_TASKS
+from typing import Any, Callable, Optional
+
+# Scoring holds the GIL for most of its run, so only a process pool keeps it from stalling the loop's other requests
+METRICS_EXECUTOR = os.getenv("METRICS_EXECUTOR", "process").lower()
+METRICS_EXECUTOR_WORKERS = int(os.getenv("METRICS_EXECUTOR_WORKERS", "2"))
+METRICS_INLINE_THRESHOLD = int(os.getenv("METRICS_INLINE_THRESHOLD", "300"))
+
+_executor: Optional[Executor] = None
+
+def get_executor() -> Optional[Executor]:
+
+    global _executor
+    if _executor is None and METRICS_EXECUTOR == "process":
+        # Forking would copy the running event loop, the Mongo client and their threads into each worker
+        _executor = ProcessPoolExecutor(max_workers=METRICS_EXECUTOR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    elif _executor is None and METRICS_EXECUTOR == "thread":
+        _executor = ThreadPoolExecutor(max_workers=METRICS_EXECUTOR_WORKERS, thread_name_prefix="metrics")
+    return _executor
+
+def shutdown_executor():
+
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def run_cpu_bound(fn: Callable[..., Any], *args: Any, size: int = 0) -> Any:
+
+    # Small jobs finish faster than a hand-off to another thread or process would take
+    executor = get_executor() if size >= METRICS_INLINE_THRESHOLD else None
+    if executor is None:
+        CPU_TASKS.labels("inline").inc()
+        return fn(*args)
+
+    CPU_TASKS.labels(METRICS_EXECUTOR).inc()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args))
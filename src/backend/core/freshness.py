@@ -0,0 +1,32 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+SHOW_MAX_AGE = timedelta(hours=24)
+ENDED_SHOW_MAX_AGE = timedelta(days=int(os.getenv("ENDED_SHOW_MAX_AGE_DAYS", "7")))
+ENDED_SHOW_QUIET_PERIOD = timedelta(days=365)
+ENDED_STATUSES = {"Ended", "Canceled"}
+SHOW_RETENTION = timedelta(days=int(os.getenv("SHOW_RETENTION_DAYS", "30")))
+
+def show_age(show) -> timedelta:
+    return datetime.now(timezone.utc) - show.last_updated.replace(tzinfo=timezone.utc)
+
+def is_ended(show) -> bool:
+
+    if show.status not in ENDED_STATUSES or not show.last_air_date:
+        return False
+
+    try:
+        last_aired = datetime.strptime(show.last_air_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return False
+
+    return datetime.now(timezone.utc) - last_aired > ENDED_SHOW_QUIET_PERIOD
+
+def max_age(show) -> timedelta:
+    return ENDED_SHOW_MAX_AGE if is_ended(show) else SHOW_MAX_AGE
+
+def is_fresh(show) -> bool:
+    return show_age(show) < max_age(show)
+
+def seconds_until_stale(show) -> float:
+    return (max_age(show) - show_age(show)).total_seconds()
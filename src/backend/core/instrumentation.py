@@ -0,0 +1,219 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+SINGLEFLIGHT_EXECUTED = Counter(
+    "bingelogic_singleflight_executed_total",
+    "Calls that started a new in-flight operation",
+    ["flight"]
+)
+
+SINGLEFLIGHT_COALESCED = Counter(
+    "bingelogic_singleflight_coalesced_total",
+    "Calls that joined an operation already in flight for the same key",
+    ["flight"]
+)
+
+CACHE_HITS = Counter(
+    "bingelogic_cache_hits_total",
+    "In-process cache lookups served from memory",
+    ["cache"]
+)
+
+CACHE_MISSES = Counter(
+    "bingelogic_cache_misses_total",
+    "In-process cache lookups that fell through to the backing store",
+    ["cache"]
+)
+
+CACHE_EVICTIONS = Counter(
+    "bingelogic_cache_evictions_total",
+    "Entries evicted to stay within the cache entry and byte bounds",
+    ["cache"]
+)
+
+CACHE_BYTES = Gauge(
+    "bingelogic_cache_bytes",
+    "Estimated size of the values currently held in the cache",
+    ["cache"]
+)
+
+SUGGESTION_LOOKUPS = Counter(
+    "bingelogic_suggestion_lookups_total",
+    "Autocomplete lookups by where the answer came from",
+    ["source"]
+)
+
+TMDB_SEASON_FETCHES = Counter(
+    "bingelogic_tmdb_season_fetches_total",
+    "Season fetches during refresh by outcome (modified, not_modified, unchanged)",
+    ["outcome"]
+)
+
+REFRESH_BYTES_FETCHED = Histogram(
+    "bingelogic_refresh_bytes_fetched",
+    "Bytes downloaded from TMDB season endpoints per show refresh",
+    buckets=(1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+)
+
+REFRESH_SEASONS_SKIPPED = Histogram(
+    "bingelogic_refresh_seasons_skipped",
+    "Seasons per show refresh that were not re-parsed because they had not changed",
+    buckets=(0, 1, 2, 5, 10, 20, 50)
+)
+
+CLEANUP_DELETED = Counter(
+    "bingelogic_cleanup_deleted_total",
+    "Show documents removed by cleanup for exceeding the retention period"
+)
+
+CLEANUP_BATCHES = Counter(
+    "bingelogic_cleanup_batches_total",
+    "Bounded delete batches issued by cleanup"
+)
+
+CLEANUP_LAST_RUN_DELETED = Gauge(
+    "bingelogic_cleanup_last_run_deleted",
+    "Documents deleted so far by the current or most recent cleanup run"
+)
+
+TMDB_RETRIES = Counter(
+    "bingelogic_tmdb_retries_total",
+    "TMDB requests retried after a rate limit, server error or transport failure",
+    ["reason"]
+)
+
+INGEST_SHOWS = Counter(
+    "bingelogic_ingest_shows_total",
+    "Shows processed by bulk ingestion",
+    ["outcome"]
+)
+
+REFRESH_QUEUE_DEPTH = Gauge(
+    "bingelogic_refresh_queue_depth",
+    "Shows waiting in the background refresh queue"
+)
+
+REFRESH_IN_FLIGHT = Gauge(
+    "bingelogic_refresh_in_flight",
+    "Background refreshes currently running"
+)
+
+REFRESH_TRACKED = Gauge(
+    "bingelogic_refresh_tracked_shows",
+    "Recently requested shows the scheduler keeps fresh"
+)
+
+REFRESH_LAG = Histogram(
+    "bingelogic_refresh_lag_seconds",
+    "How long past its freshness window a show was when its background refresh started",
+    buckets=(0, 1, 5, 30, 60, 300, 900, 3600, 6 * 3600, 24 * 3600)
+)
+
+REFRESH_QUEUE_WAIT = Histogram(
+    "bingelogic_refresh_queue_wait_seconds",
+    "Time a show spent queued before its background refresh started",
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+)
+
+REFRESH_DURATION = Histogram(
+    "bingelogic_refresh_duration_seconds",
+    "Wall time of background refreshes",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+CPU_TASKS = Counter(
+    "bingelogic_cpu_tasks_total",
+    "CPU-bound metrics computations by where they ran",
+    ["executor"]
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "bingelogic_event_loop_lag_seconds",
+    "How late the most recent event loop probe woke up"
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "bingelogic_event_loop_lag_distribution_seconds",
+    "Distribution of event loop probe delays",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+
+SHARED_CACHE_LOOKUPS = Counter(
+    "bingelogic_shared_cache_lookups_total",
+    "Lookups that reached the shared cache tier after an in-process miss",
+    ["cache", "result"]
+)
+
+CACHE_INVALIDATIONS = Counter(
+    "bingelogic_cache_invalidations_total",
+    "Cache invalidations by whether this worker wrote the change or heard about it from another",
+    ["cache", "origin"]
+)
+
+REFRESH_STAGE_SECONDS = Histogram(
+    "bingelogic_refresh_stage_seconds",
+    "Wall time of each stage of a show refresh, by show size in seasons",
+    ["stage", "seasons"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+TMDB_REQUEST_SECONDS = Histogram(
+    "bingelogic_tmdb_request_seconds",
+    "Wall time of TMDB calls including retries, by endpoint",
+    ["endpoint"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+TMDB_RESPONSES = Counter(
+    "bingelogic_tmdb_responses_total",
+    "Final TMDB response status codes by endpoint, or error when no response arrived",
+    ["endpoint", "status"]
+)
+
+PROFILED_REQUESTS = Counter(
+    "bingelogic_profiled_requests_total",
+    "Requests run under the sampling profiler"
+)
+
+CIRCUIT_STATE = Gauge(
+    "bingelogic_circuit_state",
+    "Circuit breaker state (0 closed, 1 open, 2 half open)",
+    ["circuit"]
+)
+
+CIRCUIT_REJECTED = Counter(
+    "bingelogic_circuit_rejected_total",
+    "Calls failed fast because the circuit was open",
+    ["circuit"]
+)
+
+TMDB_HEDGES = Counter(
+    "bingelogic_tmdb_hedges_total",
+    "Hedged TMDB season requests sent after the hedge delay, and how many of them answered first",
+    ["outcome"]
+)
+
+MONGO_POOL_CHECKOUT_SECONDS = Histogram(
+    "bingelogic_mongo_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the Mongo pool",
+    ["server"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+MONGO_POOL_CHECKOUTS = Counter(
+    "bingelogic_mongo_pool_checkouts_total",
+    "Mongo pool checkouts by outcome (ok, or the failure reason)",
+    ["server", "outcome"]
+)
+
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "bingelogic_mongo_pool_checked_out",
+    "Mongo connections currently checked out of the pool",
+    ["server"]
+)
+
+MONGO_POOL_CONNECTIONS = Gauge(
+    "bingelogic_mongo_pool_connections",
+    "Open Mongo connections in the pool",
+    ["server"]
+)
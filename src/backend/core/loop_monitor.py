@@ -0,0 +1,13 @@
+import asyncio
+import time
+from core.instrumentation import EVENT_LOOP_LAG, EVENT_LOOP_LAG_SECONDS
+
+async def monitor_event_loop_lag(interval: float = 0.25):
+
+    # A sleep that wakes late measures how long other callbacks held the loop
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(time.perf_counter() - start - interval, 0.0)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
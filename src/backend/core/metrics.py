@@ -1,7 +1,8 @@
 import statistics
 import numpy as np
 from models.show_model import ShowMetrics, Episode
-from typing import List
+from core.episode_columns import NUMERIC_COLUMNS, episode_arrays
+from typing import Callable, Dict, List, Optional, Sequence, Union
 
 MIN_HIGHLIGHT_SCORE = 8.5
 MAX_STINKER_SCORE = 6.0
@@ -30,38 +31,80 @@ def getLandThePlaneScore(ratings: List[float]) -> float:
     seriesAvg = statistics.mean(ratings)
     landingAvg = statistics.mean(ratings[-episodeCount:])
     
-    base = seriesAvg * 10
-    delta = landingAvg - seriesAvg
-    modifier = 0
+    return round(_landThePlane(seriesAvg, landingAvg, landingAvg - seriesAvg), 2)
 
-    if delta < 0:
-        if abs(delta) < 0.5:
-            modifier = delta * 10
-        else:
-            modifier = delta * 30
-        
-        if landingAvg < 6.5:
-            modifier -= 20
-    else:
-        modifier = min(10, delta * 10)
+def getSlope(ratings: Sequence[float]) -> float:
 
-    score = base + modifier
+    # Least-squares slope against x = 0..n-1 in closed form, where sum((x - x_mean)^2) = n(n^2 - 1)/12
+    n = len(ratings)
+    y = np.asarray(ratings, dtype=np.float64)
+    centered = np.arange(n) - (n - 1) / 2
 
-    return round(max(0.0, min(100.0, score)), 2)
+    return float(np.dot(centered, y - y.mean())) / (n * (n * n - 1) / 12)
+
+def _momentumScore(slope: float, count: int) -> float:
+
+    scale_factor = 100 + (count * 5)
+    score = 50 + (slope * scale_factor)
+    return max(0, min(100, score))
+
+def _polyfitMomentum(ratings: Sequence[float]) -> float:
+
+    slope, _ = np.polyfit(np.arange(len(ratings)), np.asarray(ratings, dtype=np.float64), 1)
+    return round(_momentumScore(slope, len(ratings)), 2)
 
 def getMomentum(ratings: List[float]) -> float:
     
     if len(ratings) < 5:
         return 0.0
 
-    x = np.arange(len(ratings))
-    y = np.array(ratings)
+    # On a half-cent tie the rounding follows polyfit's own float error, which the closed form cannot reproduce
+    score = _momentumScore(getSlope(ratings), len(ratings))
+    return _polyfitMomentum(ratings) if _nearTie(score) else round(score, 2)
 
-    slope, _ = np.polyfit(x, y, 1)
-    
-    scale_factor = 100 + (len(ratings) * 5)
-    score = 50 + (slope * scale_factor)
-    return round(max(0, min(100, score)), 2)
+class RollingMomentum:
+
+    __slots__ = ("count", "sum_y", "sum_xy")
+
+    def __init__(self, ratings: Sequence[float] = ()):
+        self.count = 0
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+
+        for rating in ratings:
+            self.append(rating)
+
+    @classmethod
+    def fromSums(cls, count: int, sum_y: float, sum_xy: float) -> "RollingMomentum":
+        rolling = cls()
+        rolling.count = count
+        rolling.sum_y = sum_y
+        rolling.sum_xy = sum_xy
+        return rolling
+
+    def append(self, rating: float):
+        self.sum_xy += self.count * rating
+        self.sum_y += rating
+        self.count += 1
+
+    def replace(self, index: int, old_rating: float, new_rating: float):
+        self.sum_xy += index * (new_rating - old_rating)
+        self.sum_y += new_rating - old_rating
+
+    def slope(self) -> float:
+
+        n = self.count
+        if n < 2:
+            return 0.0
+
+        return (self.sum_xy - (n - 1) / 2 * self.sum_y) / (n * (n * n - 1) / 12)
+
+    def score(self) -> float:
+
+        if self.count < 5:
+            return 0.0
+
+        return round(_momentumScore(self.slope(), self.count), 2)
 
 
 def getRatingConsistency(ratings: List[float]) -> float:
@@ -99,22 +142,7 @@ def getBingeIndex(episodes: List[Episode]) -> float:
     finales_avg_rating = statistics.mean([episode.rating for episode in finales])
     finales_avg_vote_count = statistics.mean([episode.vote_count for episode in finales])
 
-    rating_ratio = finales_avg_rating / series_avg_rating
-    smooth_constant = 50
-    vote_ratio = (finales_avg_vote_count + smooth_constant) / (series_avg_vote_count + smooth_constant)
-    voting_ratio = np.log10(vote_ratio + 9) 
-
-    if vote_ratio < 0.25 or series_avg_vote_count < 10:
-        return 50.0
-
-    raw_index = (0.7 * rating_ratio) + (0.3 * voting_ratio)
-
-    lower_bound = 0.85
-    upper_bound = 1.10
-    
-    normalized_score = ((raw_index - lower_bound) / (upper_bound - lower_bound)) * 100
-    
-    return round(max(0.0, min(100.0, normalized_score)), 2)
+    return _bingeIndex(series_avg_rating, series_avg_vote_count, finales_avg_rating, finales_avg_vote_count)
 
 def getWatchabilityScore(average_rating: float, 
                          binge_index: float, 
@@ -181,60 +209,322 @@ def getWatchabilityScore(average_rating: float,
 
     return watchability_score
 
-def getShowMetrics(episodes: List[Episode]) -> ShowMetrics:
+class EpisodeBatch:
+
+    __slots__ = ("ids", "ratings", "vote_counts", "season_numbers", "episode_numbers", "counts", "starts", "ends")
+
+    def __init__(self, ids, ratings, vote_counts, season_numbers, episode_numbers, counts):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+        self.vote_counts = np.asarray(vote_counts, dtype=np.int64)
+        self.season_numbers = np.asarray(season_numbers, dtype=np.int64)
+        self.episode_numbers = np.asarray(episode_numbers, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.ends = np.cumsum(self.counts)
+        self.starts = self.ends - self.counts
 
-    ratings = [episode.rating for episode in episodes]
-    vote_counts = [episode.vote_count for episode in episodes]
-    
-    average_rating = statistics.mean(ratings)
-    high_rating = max(ratings)
-    low_rating = min(ratings)
-
-    stinker_score = getStinkerScore(ratings)
-    stinker_episodes = [episode.id for episode in episodes if episode.rating <= stinker_score] 
-    stinker_average = statistics.mean([episode.rating for episode in episodes if episode.rating <= stinker_score]) if stinker_episodes else 0.0
-
-    highlight_score = getHighlightScore(ratings)
-    highlight_episodes = [episode.id for episode in episodes if episode.rating >= highlight_score]
-    highlight_average = statistics.mean([episode.rating for episode in episodes if episode.rating >= highlight_score]) if highlight_episodes else 0.0
-
-    land_the_plane_score = getLandThePlaneScore(ratings)
-
-    momentum_score = getMomentum(ratings)
-
-    rating_consistency = getRatingConsistency(ratings)
-
-    retention_rate = getRetentionRate(vote_counts)
-
-    binge_index = getBingeIndex(episodes)
-
-    watchability_score = getWatchabilityScore(average_rating,
-                                              binge_index,
-                                              rating_consistency,
-                                              momentum_score,
-                                              retention_rate,
-                                              land_the_plane_score,
-                                              len(episodes),
-                                              len(stinker_episodes),
-                                              len(highlight_episodes),
-                                              highlight_average) 
-
-
-    metrics = ShowMetrics(
-        watchability_score = watchability_score,
-        average_rating = round(average_rating, 2),
-        high_rating = round(high_rating, 2),
-        low_rating = round(low_rating, 2),
-        stinker_episodes = stinker_episodes,
-        stinker_rating = round(stinker_average, 2),
-        highlight_episodes = highlight_episodes,
-        highlight_rating = round(highlight_average, 2),
-        rating_consistency = rating_consistency,
-        land_the_plane_score = land_the_plane_score,
-        momentum_score = momentum_score,
-        retention_rate = retention_rate,
-        binge_index = binge_index 
-    )
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @classmethod
+    def fromShows(cls, shows: Sequence[Sequence[Episode]]) -> "EpisodeBatch":
 
-    return metrics
+        flat = [episode for episodes in shows for episode in episodes]
+        total = len(flat)
 
+        return cls(
+            np.fromiter((episode.id for episode in flat), np.int64, total),
+            np.fromiter((episode.rating for episode in flat), np.float64, total),
+            np.fromiter((episode.vote_count for episode in flat), np.int64, total),
+            np.fromiter((episode.season_number for episode in flat), np.int64, total),
+            np.fromiter((episode.episode_number for episode in flat), np.int64, total),
+            [len(episodes) for episodes in shows]
+        )
+
+    @classmethod
+    def fromDocuments(cls, shows: Sequence[Union[Sequence[dict], dict]]) -> "EpisodeBatch":
+
+        # Stored episodes go straight into the arrays, skipping per-episode model validation.
+        # A show may be a list of episode dicts or a packed episode_columns mapping.
+        if any(isinstance(episodes, dict) for episodes in shows):
+            return cls.fromArrays([episode_arrays(episodes) if isinstance(episodes, dict) else _documentArrays(episodes) for episodes in shows])
+
+        flat = [episode for episodes in shows for episode in episodes]
+        total = len(flat)
+
+        return cls(
+            np.fromiter((episode["id"] for episode in flat), np.int64, total),
+            np.fromiter((episode["rating"] for episode in flat), np.float64, total),
+            np.fromiter((episode.get("vote_count", 0) for episode in flat), np.int64, total),
+            np.fromiter((episode["season_number"] for episode in flat), np.int64, total),
+            np.fromiter((episode["episode_number"] for episode in flat), np.int64, total),
+            [len(episodes) for episodes in shows]
+        )
+
+    @classmethod
+    def fromArrays(cls, shows: Sequence[Dict[str, np.ndarray]]) -> "EpisodeBatch":
+
+        # A single show's int64/float64 columns are used as-is, without a copy
+        def column(name):
+            return shows[0][name] if len(shows) == 1 else np.concatenate([arrays[name] for arrays in shows])
+
+        return cls(
+            column("id"),
+            column("rating"),
+            column("vote_count"),
+            column("season_number"),
+            column("episode_number"),
+            [len(arrays["id"]) for arrays in shows]
+        )
+
+def _documentArrays(episodes: Sequence[dict]) -> Dict[str, np.ndarray]:
+    return {
+        name: np.fromiter((episode.get(name, 0) for episode in episodes), dtype, len(episodes))
+        for name, dtype in NUMERIC_COLUMNS.items()
+    }
+
+def _rangeSums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+
+    # reduceat over interleaved (start, end) pairs; the padding lets an end point one past the last value
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    return np.add.reduceat(np.append(values, 0), bounds)[0::2]
+
+def _rangeMeans(values: np.ndarray, owner_counts: np.ndarray, starts: np.ndarray, ends: np.ndarray, reference: np.ndarray) -> np.ndarray:
+
+    # Summing deviations from a per-show reference keeps constant runs exact, as statistics.mean does
+    shifted = values - np.repeat(reference, owner_counts)
+    return reference + _rangeSums(shifted, starts, ends) / (ends - starts)
+
+def _nearTie(value: float, boundary: float = None) -> bool:
+
+    if boundary is not None:
+        return abs(value - boundary) < 1e-9
+
+    cents = value * 100
+    return abs(cents - np.floor(cents) - 0.5) < 1e-6
+
+def _exactMean(values: np.ndarray, fast: float, boundaries: Sequence[float] = ()) -> float:
+
+    # Fall back to the exact rational mean only when float error could flip a rounding or threshold decision
+    if _nearTie(fast) or any(_nearTie(fast, boundary) for boundary in boundaries):
+        return statistics.mean(values.tolist())
+    return float(fast)
+
+def _settle(value: float, reference: Callable[[], float]) -> float:
+
+    # Values sitting on a half-cent are rounded by the scalar implementation so both paths agree
+    return reference() if _nearTie(value) else round(value, 2)
+
+def _selectionMeans(batch: EpisodeBatch, show_index: np.ndarray, mask: np.ndarray):
+
+    selected = batch.ratings[mask]
+    counts = np.bincount(show_index[mask], minlength=len(batch))
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    means = np.zeros(len(batch))
+    present = counts > 0
+    if present.any():
+        means[present] = _rangeMeans(selected, counts[present], starts[present], ends[present], selected[starts[present]])
+
+    return selected, starts, ends, means
+
+def getBatchShowMetrics(batch: EpisodeBatch) -> List[ShowMetrics]:
+
+    if len(batch) == 0:
+        return []
+    if (batch.counts == 0).any():
+        raise statistics.StatisticsError("mean requires at least one data point")
+
+    ratings = batch.ratings
+    counts = batch.counts
+    starts = batch.starts
+    ends = batch.ends
+    show_index = np.repeat(np.arange(len(batch)), counts)
+
+    first_ratings = ratings[starts]
+    means = _rangeMeans(ratings, counts, starts, ends, first_ratings)
+    highs = np.maximum.reduceat(ratings, starts)
+    lows = np.minimum.reduceat(ratings, starts)
+
+    deviations = ratings - np.repeat(means, counts)
+    deviation_sums = _rangeSums(deviations, starts, ends)
+    squares = _rangeSums(deviations * deviations, starts, ends)
+    variances = np.where(counts > 1, (squares - deviation_sums * deviation_sums / counts) / np.maximum(counts - 1, 1), 0.0)
+    stdevs = np.sqrt(np.maximum(variances, 0.0))
+
+    ordered = ratings[np.lexsort((ratings, show_index))]
+    lower_mid = ordered[starts + (counts - 1) // 2]
+    upper_mid = ordered[starts + counts // 2]
+    medians = np.where(counts % 2 == 1, upper_mid, (lower_mid + upper_mid) / 2)
+
+    stinker_scores = np.empty(len(batch))
+    highlight_scores = np.empty(len(batch))
+    for i, (median, stdev) in enumerate(zip(medians.tolist(), stdevs.tolist())):
+        series = ratings[starts[i]:ends[i]]
+        stinker_scores[i] = _settle(max(MAX_STINKER_SCORE, median - (2 * stdev)), lambda: getStinkerScore(series.tolist()))
+        highlight_scores[i] = _settle(min(MIN_HIGHLIGHT_SCORE, median + (2 * stdev)), lambda: getHighlightScore(series.tolist()))
+
+    stinker_mask = ratings <= stinker_scores[show_index]
+    highlight_mask = ratings >= highlight_scores[show_index]
+    stinker_ratings, stinker_starts, stinker_ends, stinker_means = _selectionMeans(batch, show_index, stinker_mask)
+    highlight_ratings, highlight_starts, highlight_ends, highlight_means = _selectionMeans(batch, show_index, highlight_mask)
+    stinker_ids = batch.ids[stinker_mask].tolist()
+    highlight_ids = batch.ids[highlight_mask].tolist()
+
+    landing_counts = np.maximum(2, (counts * 0.1).astype(np.int64))
+    landing_starts = np.maximum(starts, ends - landing_counts)
+    landing_means = _rangeMeans(ratings, counts, landing_starts, ends, ratings[landing_starts])
+
+    positions = np.arange(len(ratings)) - np.repeat(starts, counts)
+    centered = positions - np.repeat((counts - 1) / 2, counts)
+    covariances = _rangeSums(centered * deviations, starts, ends)
+    slopes = covariances / np.maximum(counts * (counts * counts - 1) / 12, 1)
+
+    finale_order = np.lexsort((-np.arange(len(ratings)), batch.episode_numbers, batch.season_numbers, show_index))
+    finale_shows = show_index[finale_order]
+    finale_seasons = batch.season_numbers[finale_order]
+    last_in_group = np.ones(len(ratings), dtype=bool)
+    last_in_group[:-1] = (finale_shows[1:] != finale_shows[:-1]) | (finale_seasons[1:] != finale_seasons[:-1])
+    finales = finale_order[last_in_group]
+    finale_counts = np.bincount(show_index[finales], minlength=len(batch))
+    finale_ratings = ratings[finales]
+    finale_ends = np.cumsum(finale_counts)
+    finale_starts = finale_ends - finale_counts
+    finale_means = _rangeMeans(finale_ratings, finale_counts, finale_starts, finale_ends, finale_ratings[finale_starts])
+    finale_vote_sums = _rangeSums(batch.vote_counts[finales], finale_starts, finale_ends)
+    vote_sums = _rangeSums(batch.vote_counts, starts, ends)
+
+    results = []
+    for i in range(len(batch)):
+
+        n = int(counts[i])
+        start, end = int(starts[i]), int(ends[i])
+        series = ratings[start:end]
+
+        average_rating = _exactMean(series, means[i], (8.0,))
+        stdev = float(stdevs[i])
+
+        stinker_average = _exactMean(stinker_ratings[stinker_starts[i]:stinker_ends[i]], stinker_means[i]) if stinker_ends[i] > stinker_starts[i] else 0.0
+        highlight_average = _exactMean(highlight_ratings[highlight_starts[i]:highlight_ends[i]], highlight_means[i]) if highlight_ends[i] > highlight_starts[i] else 0.0
+
+        if n < 5:
+            land_the_plane_score = round(sum(series.tolist())/n * 10, 2)
+            momentum_score = 0.0
+        else:
+            landing = series[n - int(landing_counts[i]):]
+            landing_avg = _exactMean(landing, landing_means[i], (6.5,))
+            delta = landing_avg - average_rating
+            if _nearTie(delta, 0.0) or _nearTie(abs(delta), 0.5):
+                delta = statistics.mean(landing.tolist()) - statistics.mean(series.tolist())
+            land_the_plane_score = _settle(_landThePlane(average_rating, landing_avg, delta), lambda: getLandThePlaneScore(series.tolist()))
+
+            momentum_score = _settle(_momentumScore(float(slopes[i]), n), lambda: getMomentum(series.tolist()))
+
+        rating_consistency = 100.0 if n < 2 else _settle(max(0.0, min(100.0, 100 * (1 - (stdev / 2.0)))), lambda: getRatingConsistency(series.tolist()))
+
+        votes = batch.vote_counts[start:end]
+        retention_rate = 0.0 if votes[0] == 0 else round(min(int(votes[-1]) / int(votes[0]) * 100, 100.0), 2)
+
+        if n < 3:
+            binge_index = 50.0
+        else:
+            finale_count = int(finale_counts[i])
+            finale_slice = finale_ratings[finale_starts[i]:finale_ends[i]]
+            binge_index = _bingeIndex(
+                average_rating,
+                int(vote_sums[i]) / n,
+                _exactMean(finale_slice, finale_means[i]),
+                int(finale_vote_sums[i]) / finale_count
+            )
+
+        stinker_episodes = stinker_ids[stinker_starts[i]:stinker_ends[i]]
+        highlight_episodes = highlight_ids[highlight_starts[i]:highlight_ends[i]]
+
+        watchability_score = getWatchabilityScore(average_rating,
+                                                  binge_index,
+                                                  rating_consistency,
+                                                  momentum_score,
+                                                  retention_rate,
+                                                  land_the_plane_score,
+                                                  n,
+                                                  len(stinker_episodes),
+                                                  len(highlight_episodes),
+                                                  highlight_average)
+
+        results.append(ShowMetrics(
+            watchability_score = watchability_score,
+            average_rating = round(average_rating, 2),
+            high_rating = round(float(highs[i]), 2),
+            low_rating = round(float(lows[i]), 2),
+            stinker_episodes = stinker_episodes,
+            stinker_rating = round(stinker_average, 2),
+            highlight_episodes = highlight_episodes,
+            highlight_rating = round(highlight_average, 2),
+            rating_consistency = rating_consistency,
+            land_the_plane_score = land_the_plane_score,
+            momentum_score = momentum_score,
+            retention_rate = retention_rate,
+            binge_index = binge_index
+        ))
+
+    return results
+
+def _landThePlane(series_avg: float, landing_avg: float, delta: float) -> float:
+
+    base = series_avg * 10
+    modifier = 0
+
+    if delta < 0:
+        if abs(delta) < 0.5:
+            modifier = delta * 10
+        else:
+            modifier = delta * 30
+
+        if landing_avg < 6.5:
+            modifier -= 20
+    else:
+        modifier = min(10, delta * 10)
+
+    score = base + modifier
+
+    return max(0.0, min(100.0, score))
+
+def _bingeIndex(series_avg_rating: float, series_avg_vote_count: float, finales_avg_rating: float, finales_avg_vote_count: float) -> float:
+
+    rating_ratio = finales_avg_rating / series_avg_rating
+    smooth_constant = 50
+    vote_ratio = (finales_avg_vote_count + smooth_constant) / (series_avg_vote_count + smooth_constant)
+    voting_ratio = np.log10(vote_ratio + 9)
+
+    if vote_ratio < 0.25 or series_avg_vote_count < 10:
+        return 50.0
+
+    raw_index = (0.7 * rating_ratio) + (0.3 * voting_ratio)
+
+    lower_bound = 0.85
+    upper_bound = 1.10
+
+    normalized_score = ((raw_index - lower_bound) / (upper_bound - lower_bound)) * 100
+
+    return round(max(0.0, min(100.0, normalized_score)), 2)
+
+def getShowMetricsForShows(shows: Sequence[Sequence[Episode]]) -> List[Optional[ShowMetrics]]:
+
+    scored = [episodes for episodes in shows if len(episodes) > 0]
+    metrics = iter(getBatchShowMetrics(EpisodeBatch.fromShows(scored)))
+
+    return [next(metrics) if len(episodes) > 0 else None for episodes in shows]
+
+def getShowMetricsForDocuments(shows: Sequence[Union[Sequence[dict], dict]]) -> List[Optional[dict]]:
+
+    counts = [episodes["count"] if isinstance(episodes, dict) else len(episodes) for episodes in shows]
+    scored = [episodes for episodes, count in zip(shows, counts) if count > 0]
+    metrics = iter(getBatchShowMetrics(EpisodeBatch.fromDocuments(scored)))
+
+    return [next(metrics).model_dump() if count > 0 else None for count in counts]
+
+def getShowMetrics(episodes: List[Episode]) -> ShowMetrics:
+    return getBatchShowMetrics(EpisodeBatch.fromShows([episodes]))[0]
@@ -0,0 +1,386 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+from itertools import groupby
+from typing import List, Optional, Sequence, Set, Tuple
+from models.show_model import ShowModel, ShowMetrics, MetricsSummary, SeasonSummary, Episode
+from core.metrics import (MIN_HIGHLIGHT_SCORE, MAX_STINKER_SCORE, RollingMomentum, getShowMetrics,
+                          getWatchabilityScore, _landThePlane, _bingeIndex)
+
+SeasonUpdate = Tuple[int, List[Episode], List[Episode]]
+
+def _tailLength(count: int) -> int:
+    return max(2, int(count * 0.1))
+
+def _addToBucket(summary: MetricsSummary, rating: float):
+
+    i = bisect_left(summary.bucket_ratings, rating)
+    if i < len(summary.bucket_ratings) and summary.bucket_ratings[i] == rating:
+        summary.bucket_counts[i] += 1
+    else:
+        summary.bucket_ratings.insert(i, rating)
+        summary.bucket_counts.insert(i, 1)
+
+    if rating < summary.median_anchor:
+        summary.median_below += 1
+
+def _removeFromBucket(summary: MetricsSummary, rating: float):
+
+    i = bisect_left(summary.bucket_ratings, rating)
+    summary.bucket_counts[i] -= 1
+    if not summary.bucket_counts[i]:
+        del summary.bucket_ratings[i]
+        del summary.bucket_counts[i]
+
+    if rating < summary.median_anchor:
+        summary.median_below -= 1
+
+def _select(summary: MetricsSummary, position: int, episode_id: int, rating: float):
+
+    # The entry lists hold every episode on the selected side of the stored scores, in position order
+    if summary.stinker_score is not None and rating <= summary.stinker_score:
+        insort(summary.stinker_entries, (position, episode_id, rating))
+    if summary.highlight_score is not None and rating >= summary.highlight_score:
+        insort(summary.highlight_entries, (position, episode_id, rating))
+
+def _deselect(summary: MetricsSummary, position: int):
+
+    for entries in (summary.stinker_entries, summary.highlight_entries):
+        i = bisect_left(entries, (position,))
+        if i < len(entries) and entries[i][0] == position:
+            del entries[i]
+
+def _append(summary: MetricsSummary, episode: Episode):
+
+    position = summary.count
+    rating = episode.rating
+
+    summary.weighted_rating_sum += position * rating
+    summary.rating_sum += rating
+    summary.rating_sum_sq += rating * rating
+    summary.vote_count_sum += episode.vote_count
+    if position == 0:
+        summary.first_vote_count = episode.vote_count
+    summary.last_vote_count = episode.vote_count
+    summary.count += 1
+
+    _addToBucket(summary, rating)
+    _select(summary, position, episode.id, rating)
+    summary.tail_ratings.append(rating)
+    del summary.tail_ratings[:-_tailLength(summary.count)]
+
+    season = summary.seasons[-1] if summary.seasons else None
+    if season is None or season.season_number != episode.season_number:
+        earlier = next((s for s in summary.seasons if s.season_number == episode.season_number), None)
+        if earlier is None:
+            summary.seasons.append(SeasonSummary(
+                season_number = episode.season_number,
+                start = position,
+                count = 1,
+                finale_episode_number = episode.episode_number,
+                finale_rating = rating,
+                finale_vote_count = episode.vote_count
+            ))
+            return
+
+        # Seasons that are not contiguous cannot be addressed by offset, so later updates rebuild instead
+        season = earlier
+        season.start = -1
+
+    season.count += 1
+    if episode.episode_number > season.finale_episode_number:
+        season.finale_episode_number = episode.episode_number
+        season.finale_rating = rating
+        season.finale_vote_count = episode.vote_count
+
+def _change(summary: MetricsSummary, position: int, old: Episode, new: Episode):
+
+    delta = new.rating - old.rating
+    if delta:
+        summary.rating_sum += delta
+        summary.rating_sum_sq += new.rating * new.rating - old.rating * old.rating
+        summary.weighted_rating_sum += position * delta
+
+        _removeFromBucket(summary, old.rating)
+        _addToBucket(summary, new.rating)
+        _deselect(summary, position)
+        _select(summary, position, new.id, new.rating)
+
+        tail_start = summary.count - len(summary.tail_ratings)
+        if position >= tail_start:
+            summary.tail_ratings[position - tail_start] = new.rating
+
+    if new.vote_count != old.vote_count:
+        summary.vote_count_sum += new.vote_count - old.vote_count
+        if position == 0:
+            summary.first_vote_count = new.vote_count
+        if position == summary.count - 1:
+            summary.last_vote_count = new.vote_count
+
+def _refreshFinale(season: SeasonSummary, episodes: Sequence[Episode]):
+
+    finale = episodes[0]
+    for episode in episodes:
+        if episode.episode_number > finale.episode_number:
+            finale = episode
+
+    season.finale_episode_number = finale.episode_number
+    season.finale_rating = finale.rating
+    season.finale_vote_count = finale.vote_count
+
+def _stdev(summary: MetricsSummary) -> float:
+
+    n = summary.count
+    variance = (summary.rating_sum_sq - summary.rating_sum * summary.rating_sum / n) / (n - 1) if n > 1 else 0.0
+    return math.sqrt(max(0.0, variance))
+
+def _rank(summary: MetricsSummary, k: int) -> float:
+
+    # Walks the buckets from the last median found, so a refresh moves it past the few buckets it changed
+    ratings, counts = summary.bucket_ratings, summary.bucket_counts
+    i = bisect_left(ratings, summary.median_anchor)
+    below = summary.median_below
+
+    while i < len(counts) and below + counts[i] <= k:
+        below += counts[i]
+        i += 1
+    while below > k:
+        i -= 1
+        below -= counts[i]
+
+    summary.median_anchor = ratings[i]
+    summary.median_below = below
+    return ratings[i]
+
+def _median(summary: MetricsSummary) -> float:
+
+    n = summary.count
+    lower = _rank(summary, (n - 1) // 2)
+    upper = _rank(summary, n // 2)
+    return upper if n % 2 == 1 else (lower + upper) / 2
+
+def _scores(summary: MetricsSummary) -> Tuple[float, float]:
+
+    median = _median(summary)
+    stdev = _stdev(summary)
+    return round(max(MAX_STINKER_SCORE, median - (2 * stdev)), 2), round(min(MIN_HIGHLIGHT_SCORE, median + (2 * stdev)), 2)
+
+def _narrowStinkers(summary: MetricsSummary, score: float) -> bool:
+
+    if score > summary.stinker_score:
+        # A higher score pulls in episodes the entries never held; that is only free when there are none
+        first = bisect_right(summary.bucket_ratings, summary.stinker_score)
+        if sum(summary.bucket_counts[first:bisect_right(summary.bucket_ratings, score)]):
+            return False
+    elif score < summary.stinker_score:
+        summary.stinker_entries = [entry for entry in summary.stinker_entries if entry[2] <= score]
+
+    summary.stinker_score = score
+    return True
+
+def _narrowHighlights(summary: MetricsSummary, score: float) -> bool:
+
+    if score < summary.highlight_score:
+        last = bisect_left(summary.bucket_ratings, summary.highlight_score)
+        if sum(summary.bucket_counts[bisect_left(summary.bucket_ratings, score):last]):
+            return False
+    elif score > summary.highlight_score:
+        summary.highlight_entries = [entry for entry in summary.highlight_entries if entry[2] >= score]
+
+    summary.highlight_score = score
+    return True
+
+def _average(entries: Sequence[Tuple[int, int, float]]) -> float:
+    return sum(entry[2] for entry in entries) / len(entries) if entries else 0.0
+
+def buildMetricsSummary(episodes: Sequence[Episode]) -> MetricsSummary:
+
+    summary = MetricsSummary(
+        count = 0,
+        rating_sum = 0.0,
+        rating_sum_sq = 0.0,
+        weighted_rating_sum = 0.0,
+        vote_count_sum = 0,
+        first_vote_count = 0,
+        last_vote_count = 0
+    )
+
+    for episode in episodes:
+        _append(summary, episode)
+
+    if summary.count:
+        summary.stinker_score, summary.highlight_score = _scores(summary)
+        for position, episode in enumerate(episodes):
+            _select(summary, position, episode.id, episode.rating)
+
+    return summary
+
+def applySeasonUpdate(summary: MetricsSummary, season_number: int, old_episodes: Sequence[Episode], new_episodes: Sequence[Episode]) -> bool:
+
+    season = next((s for s in summary.seasons if s.season_number == season_number), None)
+
+    if season is None:
+        if old_episodes or (summary.seasons and season_number < summary.seasons[-1].season_number):
+            return False
+        for episode in new_episodes:
+            _append(summary, episode)
+        return True
+
+    # Everything is validated before the first mutation so a rejected update leaves the summary untouched
+    shared = len(old_episodes)
+    if season.start < 0 or shared != season.count or len(new_episodes) < shared:
+        return False
+    if len(new_episodes) > shared and season is not summary.seasons[-1]:
+        return False
+    if any(old.id != new.id for old, new in zip(old_episodes, new_episodes)):
+        return False
+
+    for offset, (old, new) in enumerate(zip(old_episodes, new_episodes)):
+        if old.rating != new.rating or old.vote_count != new.vote_count:
+            _change(summary, season.start + offset, old, new)
+
+    for episode in new_episodes[shared:]:
+        _append(summary, episode)
+
+    _refreshFinale(season, new_episodes)
+    return True
+
+def getSummaryMetrics(summary: MetricsSummary) -> Optional[ShowMetrics]:
+
+    # None means the stinker or highlight score moved across episodes the summary cannot name
+    n = summary.count
+    average_rating = summary.rating_sum / n
+    stdev = _stdev(summary)
+
+    stinker_score, highlight_score = _scores(summary)
+    if not _narrowStinkers(summary, stinker_score) or not _narrowHighlights(summary, highlight_score):
+        return None
+    stinker_average = _average(summary.stinker_entries)
+    highlight_average = _average(summary.highlight_entries)
+
+    if n < 5:
+        land_the_plane_score = round(average_rating * 10, 2)
+    else:
+        landing = summary.tail_ratings[-_tailLength(n):]
+        landing_avg = sum(landing) / len(landing)
+        land_the_plane_score = round(_landThePlane(average_rating, landing_avg, landing_avg - average_rating), 2)
+
+    momentum_score = RollingMomentum.fromSums(n, summary.rating_sum, summary.weighted_rating_sum).score()
+    rating_consistency = 100.0 if n < 2 else round(max(0.0, min(100.0, 100 * (1 - (stdev / 2.0)))), 2)
+    retention_rate = 0.0 if summary.first_vote_count == 0 else round(min(summary.last_vote_count / summary.first_vote_count * 100, 100.0), 2)
+
+    if n < 3:
+        binge_index = 50.0
+    else:
+        seasons = summary.seasons
+        binge_index = _bingeIndex(
+            average_rating,
+            summary.vote_count_sum / n,
+            sum(season.finale_rating for season in seasons) / len(seasons),
+            sum(season.finale_vote_count for season in seasons) / len(seasons)
+        )
+
+    watchability_score = getWatchabilityScore(average_rating,
+                                              binge_index,
+                                              rating_consistency,
+                                              momentum_score,
+                                              retention_rate,
+                                              land_the_plane_score,
+                                              n,
+                                              len(summary.stinker_entries),
+                                              len(summary.highlight_entries),
+                                              highlight_average)
+
+    return ShowMetrics(
+        watchability_score = watchability_score,
+        average_rating = round(average_rating, 2),
+        high_rating = round(summary.bucket_ratings[-1], 2),
+        low_rating = round(summary.bucket_ratings[0], 2),
+        stinker_episodes = [entry[1] for entry in summary.stinker_entries],
+        stinker_rating = round(stinker_average, 2),
+        highlight_episodes = [entry[1] for entry in summary.highlight_entries],
+        highlight_rating = round(highlight_average, 2),
+        rating_consistency = rating_consistency,
+        land_the_plane_score = land_the_plane_score,
+        momentum_score = momentum_score,
+        retention_rate = retention_rate,
+        binge_index = binge_index
+    )
+
+def _metricsKey(episodes: Sequence[Episode]) -> List[tuple]:
+    return [(e.id, e.episode_number, e.rating, e.vote_count) for e in episodes]
+
+def _usable(summary: Optional[MetricsSummary]) -> bool:
+
+    # Summaries stored before the bucket counts and entry lists existed are rebuilt on their next refresh
+    return (summary is not None and bool(summary.seasons) and summary.stinker_score is not None and summary.highlight_score is not None
+            and len(summary.bucket_counts) == len(summary.bucket_ratings) and all(season.start >= 0 for season in summary.seasons))
+
+def seasonUpdates(previous: Optional[ShowModel], episodes: Sequence[Episode], changed_seasons: Optional[Set[int]] = None) -> Optional[List[SeasonUpdate]]:
+
+    # Slices out only the seasons a refresh touched, using the offsets the summary keeps; None means rebuild
+    summary = previous.metrics_summary if previous else None
+    if not episodes or not _usable(summary) or len(previous.episodes) != summary.count:
+        return None
+
+    last = summary.seasons[-1]
+    if changed_seasons is None:
+        changed_seasons = {season.season_number for season in summary.seasons}
+
+    end = last.start + last.count
+    if len(episodes) <= last.start or episodes[last.start].season_number != last.season_number or \
+            (last.start and episodes[last.start - 1].season_number == last.season_number):
+        return None
+    while end < len(episodes) and episodes[end].season_number == last.season_number:
+        end += 1
+
+    updates = []
+    for season in summary.seasons:
+        if season.season_number not in changed_seasons:
+            continue
+
+        stop = end if season is last else season.start + season.count
+        new = episodes[season.start:stop]
+        if len(new) != stop - season.start or new[0].season_number != season.season_number or new[-1].season_number != season.season_number:
+            return None
+        if stop < len(episodes) and episodes[stop].season_number == season.season_number:
+            return None
+
+        old = previous.episodes[season.start:season.start + season.count]
+        if _metricsKey(old) != _metricsKey(new):
+            updates.append((season.season_number, old, new))
+
+    for season_number, group in groupby(episodes[end:], key=lambda episode: episode.season_number):
+        updates.append((season_number, [], list(group)))
+
+    return updates
+
+def applySeasonUpdates(summary: MetricsSummary, updates: Sequence[SeasonUpdate]) -> Optional[Tuple[ShowMetrics, MetricsSummary]]:
+
+    # Copies only what an update writes to, so the stored summary is never changed and nothing is deep-copied
+    touched = {season_number for season_number, _, _ in updates}
+    last = summary.seasons[-1]
+    summary = summary.model_copy(update={
+        "seasons": [season.model_copy() if season.season_number in touched or season is last else season for season in summary.seasons],
+        "bucket_ratings": list(summary.bucket_ratings),
+        "bucket_counts": list(summary.bucket_counts),
+        "tail_ratings": list(summary.tail_ratings),
+        "stinker_entries": list(summary.stinker_entries),
+        "highlight_entries": list(summary.highlight_entries)
+    })
+
+    for season_number, old, new in updates:
+        if not applySeasonUpdate(summary, season_number, old, new):
+            return None
+
+    metrics = getSummaryMetrics(summary)
+    return (metrics, summary) if metrics else None
+
+def computeShowMetrics(episodes: List[Episode]) -> Tuple[ShowMetrics, MetricsSummary]:
+    return getShowMetrics(episodes), buildMetricsSummary(episodes)
+
+def updateShowMetrics(previous: Optional[ShowModel], episodes: List[Episode], changed_seasons: Optional[Set[int]] = None) -> Tuple[ShowMetrics, MetricsSummary]:
+
+    updates = seasonUpdates(previous, episodes, changed_seasons)
+    updated = applySeasonUpdates(previous.metrics_summary, updates) if updates is not None else None
+
+    return updated or computeShowMetrics(episodes)
@@ -0,0 +1,104 @@
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import logging
+import tempfile
+import threading
+from collections import Counter
+from fastapi import FastAPI, Request
+from core.instrumentation import PROFILED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "bingelogic-profiles"))
+
+class StackSampler:
+
+    # Samples one thread's stack from a background thread, so the profiled code runs unmodified.
+    # On the event loop thread that includes whatever other requests run concurrently.
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def write_profile(request: Request, sampler: StackSampler, elapsed: float) -> str:
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{request.method.lower()}-{name}-{int(elapsed * 1000)}ms.folded")
+    with open(path, "w") as f:
+        f.write(sampler.folded())
+    return path
+
+def install_request_profiler(app: FastAPI, rate: float = PROFILE_SAMPLE_RATE):
+
+    # Nothing is registered when sampling is off, so the default path pays nothing
+    if rate <= 0:
+        return
+
+    active = threading.Lock()
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+
+        if random.random() >= rate or not active.acquire(blocking=False):
+            return await call_next(request)
+
+        sampler = StackSampler(threading.get_ident())
+        start = time.perf_counter()
+
+        async def finish():
+            sampler.stop()
+            active.release()
+            PROFILED_REQUESTS.inc()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, write_profile, request, sampler, time.perf_counter() - start)
+            except OSError as e:
+                logger.warning("Could not write request profile: %s", e)
+
+        # Sampling runs until the body has been sent, so streamed responses include their generators
+        async def profiled_body(body):
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await finish()
+
+        sampler.start()
+        try:
+            response = await call_next(request)
+        except BaseException:
+            await finish()
+            raise
+
+        response.body_iterator = profiled_body(response.body_iterator)
+        return response
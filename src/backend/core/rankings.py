@@ -0,0 +1,155 @@
+import numpy as np
+from bisect import bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+RANKED_METRICS = {
+    "watchability": "watchability_score",
+    "finales": "land_the_plane_score",
+    "binge": "binge_index",
+    "momentum": "momentum_score",
+    "consistency": "rating_consistency",
+    "rating": "average_rating",
+    "retention": "retention_rate"
+}
+
+class RankedShow(NamedTuple):
+    id: int
+    title: str
+    poster_path: Optional[str]
+    genres: Tuple[str, ...]
+    scores: Dict[str, float]
+
+def ranked_show(data: dict) -> Optional[RankedShow]:
+
+    metrics = data.get("metrics")
+    if not metrics:
+        return None
+
+    return RankedShow(
+        id = data["_id"],
+        title = data["title"],
+        poster_path = data.get("poster_path"),
+        genres = tuple(data.get("genres") or ()),
+        scores = {name: metrics[field] for name, field in RANKED_METRICS.items()}
+    )
+
+class RankingIndex:
+
+    def __init__(self):
+        self.loaded = False
+        self._shows: Dict[int, RankedShow] = {}
+        self._rankings: Dict[Tuple[str, Optional[str]], List[Tuple[float, int]]] = defaultdict(list)
+        self._pending: Optional[Dict[int, Optional[RankedShow]]] = None
+
+    def __len__(self) -> int:
+        return len(self._shows)
+
+    @staticmethod
+    def _entries(show: RankedShow):
+
+        # Stored negated so ascending list order is score desc, id desc
+        for metric, score in show.scores.items():
+            key = (-score, -show.id)
+            yield (metric, None), key
+            for genre in show.genres:
+                yield (metric, genre), key
+
+    def update(self, show: RankedShow):
+
+        self._discard(show.id)
+        self._shows[show.id] = show
+        for ranking, key in self._entries(show):
+            insort(self._rankings[ranking], key)
+
+        if self._pending is not None:
+            self._pending[show.id] = show
+
+    def get(self, show_id: int) -> Optional[RankedShow]:
+        return self._shows.get(show_id)
+
+    def remove(self, show_id: int):
+
+        self._discard(show_id)
+        if self._pending is not None:
+            self._pending[show_id] = None
+
+    def _discard(self, show_id: int):
+
+        show = self._shows.pop(show_id, None)
+        if show is None:
+            return
+
+        for ranking, key in self._entries(show):
+            rows = self._rankings[ranking]
+            index = bisect_right(rows, key) - 1
+            if index >= 0 and rows[index] == key:
+                del rows[index]
+
+    def clear(self):
+        self.loaded = False
+        self._shows = {}
+        self._rankings = defaultdict(list)
+        self._pending = None
+
+    def begin_load(self):
+        self._pending = {}
+
+    def finish_load(self, shows: Iterable[RankedShow]):
+        for _ in self.load_steps(shows):
+            pass
+
+    def load_steps(self, shows: Iterable[RankedShow], chunk: int = 5000) -> Iterator[None]:
+
+        # Yields between chunks so an async caller can keep serving while a large catalog is rebuilt
+        by_id: Dict[int, RankedShow] = {}
+        for count, show in enumerate(shows, 1):
+            by_id[show.id] = show
+            if count % chunk == 0:
+                yield
+
+        rebuilt: Dict[Tuple[str, Optional[str]], List[Tuple[float, int]]] = defaultdict(list)
+        for metric in RANKED_METRICS:
+            keys = []
+            for count, show in enumerate(by_id.values(), 1):
+                keys.append((-show.scores[metric], -show.id))
+                if count % chunk == 0:
+                    yield
+
+            # Sorting the key tuples directly holds the loop for far longer than an argsort
+            order = np.lexsort((np.fromiter((key[1] for key in keys), np.int64, len(keys)),
+                                np.fromiter((key[0] for key in keys), np.float64, len(keys))))
+            yield
+
+            rows = []
+            for start in range(0, len(order), chunk):
+                rows.extend(keys[i] for i in order[start:start + chunk].tolist())
+                yield
+            rebuilt[(metric, None)] = rows
+
+            # Filtering the overall order keeps every per-genre list sorted without another sort
+            for count, key in enumerate(rows, 1):
+                for genre in by_id[-key[1]].genres:
+                    rebuilt[(metric, genre)].append(key)
+                if count % chunk == 0:
+                    yield
+
+        # Writes that landed while the snapshot was being read are newer than it
+        pending, self._pending = self._pending or {}, None
+        self._shows, self._rankings = by_id, rebuilt
+        for show_id, show in pending.items():
+            if show is None:
+                self.remove(show_id)
+            else:
+                self.update(show)
+
+        self.loaded = True
+
+    def page(self, metric: str, genre: Optional[str] = None, after: Optional[Tuple[float, int]] = None,
+             limit: int = 20) -> Tuple[List[RankedShow], bool]:
+
+        rows = self._rankings.get((metric, genre), [])
+        start = bisect_right(rows, (-after[0], -after[1])) if after else 0
+        keys = rows[start:start + limit]
+
+        return [self._shows[-show_id] for _, show_id in keys], start + limit < len(rows)
@@ -0,0 +1,28 @@
+import asyncio
+import time
+from typing import Optional
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        # Below one request a second the bucket must still be able to hold a whole token
+        self.capacity = max(1.0, capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
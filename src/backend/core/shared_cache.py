@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from core.cache import TTLCache
+from core.instrumentation import SHARED_CACHE_LOOKUPS, CACHE_INVALIDATIONS
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+SHARED_CACHE_PREFIX = os.getenv("SHARED_CACHE_PREFIX", "bingelogic")
+SHARED_CACHE_TTL = float(os.getenv("SHARED_CACHE_TTL", "600"))
+SHARED_CACHE_LOCAL_TTL = float(os.getenv("SHARED_CACHE_LOCAL_TTL", "30"))
+SHARED_CACHE_TIMEOUT = float(os.getenv("SHARED_CACHE_TIMEOUT", "0.25"))
+
+INVALIDATION_CHANNEL = f"{SHARED_CACHE_PREFIX}:invalidate"
+WORKER_ID = uuid.uuid4().hex
+
+class LocalPubSub:
+
+    def __init__(self, store: "LocalSharedStore"):
+        self._store = store
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels = set()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self._channels.add(channel)
+            self._store._subscribers.setdefault(channel, []).append(self._queue)
+            await self._queue.put({"type": "subscribe", "channel": channel, "data": 1})
+
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self):
+        for channel in self._channels:
+            self._store._subscribers[channel].remove(self._queue)
+        self._channels.clear()
+
+class LocalPipeline:
+
+    def __init__(self, store: "LocalSharedStore"):
+        self._store = store
+        self._commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands.clear()
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self._commands.append((getattr(self._store, name), args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        results = [await command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands.clear()
+        return results
+
+class LocalSharedStore:
+
+    # The subset of the Redis commands the shared tier uses, kept in process for tests and single-host runs
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        entry = self._values.get(name)
+        if entry is None or entry[1] <= time.monotonic():
+            self._values.pop(name, None)
+            return None
+        return entry[0]
+
+    async def mget(self, *names: str) -> List[Optional[bytes]]:
+        return [await self.get(name) for name in names]
+
+    async def incr(self, name: str) -> int:
+        value = int(await self.get(name) or 0) + 1
+        deadline = self._values[name][1] if name in self._values else float("inf")
+        self._values[name] = (str(value).encode(), deadline)
+        return value
+
+    async def expire(self, name: str, seconds: int) -> bool:
+        if await self.get(name) is None:
+            return False
+        self._values[name] = (self._values[name][0], time.monotonic() + seconds)
+        return True
+
+    async def set(self, name: str, value: bytes, ex: Optional[int] = None):
+        self._values[name] = (value, time.monotonic() + ex if ex else float("inf"))
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._values.pop(name, None) is not None for name in names)
+
+    async def publish(self, channel: str, message: str) -> int:
+        queues = self._subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message.encode()})
+        return len(queues)
+
+    def pubsub(self) -> LocalPubSub:
+        return LocalPubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> LocalPipeline:
+        return LocalPipeline(self)
+
+    async def aclose(self):
+        self._values.clear()
+
+def create_shared_store(url: str = SHARED_CACHE_URL, socket_timeout: Optional[float] = SHARED_CACHE_TIMEOUT):
+
+    if not url:
+        return None
+    if url.startswith("local://"):
+        return LocalSharedStore()
+
+    try:
+        from redis import asyncio as redis
+    except ImportError:
+        logger.warning("SHARED_CACHE_URL is set but the redis package is not installed; using the in-process cache only")
+        return None
+
+    return redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=SHARED_CACHE_TIMEOUT)
+
+shared_store = create_shared_store()
+
+def create_subscriber_store(store: Any = shared_store, url: str = SHARED_CACHE_URL):
+
+    # redis-py applies socket_timeout to pub/sub reads too, where a quiet channel would look like a
+    # dropped connection, so the listener gets its own client that waits on reads indefinitely
+    if store is None or isinstance(store, LocalSharedStore):
+        return store
+    return create_shared_store(url, socket_timeout=None)
+
+VERSION_BYTES = 8
+
+def tag_payload(version: int, payload: bytes) -> bytes:
+    return version.to_bytes(VERSION_BYTES, "big") + payload
+
+def untag_payload(tagged: bytes) -> Tuple[int, bytes]:
+    return int.from_bytes(tagged[:VERSION_BYTES], "big"), tagged[VERSION_BYTES:]
+
+class TieredCache:
+
+    def __init__(self, local: TTLCache, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any],
+                 parse_key: Callable[[str], Hashable] = str, ttl_for: Optional[Callable[[Any], float]] = None,
+                 max_local_ttl: Optional[float] = SHARED_CACHE_LOCAL_TTL, store: Any = shared_store, worker_id: str = WORKER_ID,
+                 recent_window: float = 0.0):
+        self.name = local.name
+        self.local = local
+        self.encode = encode
+        self.decode = decode
+        self.parse_key = parse_key
+        self.ttl_for = ttl_for
+        self.max_local_ttl = max_local_ttl
+        self.store = store
+        self.worker_id = worker_id
+        self.recent_window = recent_window
+        self._invalidated: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    @property
+    def generation(self) -> int:
+        return self.local.generation
+
+    def shared_key(self, key: Hashable) -> str:
+        return f"{SHARED_CACHE_PREFIX}:{self.name}:{key}"
+
+    def version_key(self, key: Hashable) -> str:
+        return f"{SHARED_CACHE_PREFIX}:{self.name}:{key}:version"
+
+    def local_ttl(self, ttl: Optional[float]) -> Optional[float]:
+
+        # Invalidation messages are fire-and-forget, so with a shared tier the local copy is
+        # kept only briefly; that bounds how long a missed broadcast can serve an old version
+        if self.store is None or self.max_local_ttl is None:
+            return ttl
+        return self.max_local_ttl if ttl is None else min(ttl, self.max_local_ttl)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        return self.local.peek(key)
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        return self.local.remaining(key)
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        value, _ = await self.lookup(key)
+        return value
+
+    async def lookup(self, key: Hashable) -> Tuple[Optional[Any], Optional[int]]:
+
+        # Also returns the shared version seen on a miss, which the caller hands back to set()
+        value = self.local.get(key)
+        if value is not None or self.store is None:
+            return value, None
+
+        generation = self.local.generation
+        try:
+            tagged, current = await self.store.mget(self.shared_key(key), self.version_key(key))
+        except Exception as e:
+            logger.warning("Shared cache read failed for %s: %s", self.name, e)
+            SHARED_CACHE_LOOKUPS.labels(self.name, "error").inc()
+            return None, None
+
+        # A payload written from a read that raced a broadcast carries the version before it
+        current = int(current or 0)
+        version, payload = untag_payload(tagged) if tagged is not None else (None, None)
+        if version != current:
+            SHARED_CACHE_LOOKUPS.labels(self.name, "miss").inc()
+            return None, current
+
+        SHARED_CACHE_LOOKUPS.labels(self.name, "hit").inc()
+        value = self.decode(payload)
+        ttl = self.ttl_for(value) if self.ttl_for else None
+        self.local.set(key, value, ttl=self.local_ttl(ttl), size=len(payload), generation=generation)
+        return value, current
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 1,
+                  generation: Optional[int] = None, payload: Optional[bytes] = None, version: Optional[int] = None):
+
+        if generation is not None and generation != self.local.generation:
+            return
+
+        self.local.set(key, value, ttl=self.local_ttl(ttl), size=size, generation=generation)
+        if self.store is None:
+            return
+
+        ttl = SHARED_CACHE_TTL if ttl is None else min(ttl, SHARED_CACHE_TTL)
+        if ttl < 1:
+            return
+
+        try:
+            current = int(await self.store.get(self.version_key(key)) or 0)
+            if version is not None and version != current:
+                return
+            payload = payload if payload is not None else self.encode(value)
+            await self.store.set(self.shared_key(key), tag_payload(current, payload), ex=int(ttl))
+        except Exception as e:
+            logger.warning("Shared cache write failed for %s: %s", self.name, e)
+
+    def invalidate(self, key: Hashable):
+        self.local.invalidate(key)
+        if not self.recent_window:
+            return
+
+        # Kept in deadline order, so expired records (and the oldest, past the entry limit) leave from the front
+        now = time.monotonic()
+        self._invalidated.pop(key, None)
+        self._invalidated[key] = now + self.recent_window
+        while self._invalidated and (len(self._invalidated) > self.local.max_entries or next(iter(self._invalidated.values())) <= now):
+            self._invalidated.popitem(last=False)
+
+    def recently_invalidated(self, key: Hashable) -> bool:
+        deadline = self._invalidated.get(key)
+        return deadline is not None and deadline > time.monotonic()
+
+    def clear(self):
+        self.local.clear()
+
+    async def broadcast(self, keys: Iterable[Hashable]):
+
+        # Called after a write lands, so other workers drop their copies of the version it replaced
+        keys = list(keys)
+        if self.store is None or not keys:
+            return
+
+        CACHE_INVALIDATIONS.labels(self.name, "local").inc(len(keys))
+        message = json.dumps({"origin": self.worker_id, "cache": self.name, "keys": [str(key) for key in keys]})
+        try:
+            # Bumping the version also voids a stale copy that a concurrent read writes back afterwards
+            async with self.store.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(self.version_key(key))
+                    pipe.expire(self.version_key(key), int(SHARED_CACHE_TTL * 2))
+                pipe.delete(*[self.shared_key(key) for key in keys])
+                pipe.publish(INVALIDATION_CHANNEL, message)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Shared cache invalidation failed for %s: %s", self.name, e)
+
+def apply_invalidation(caches: Iterable[TieredCache], data: Any) -> int:
+
+    message = json.loads(data)
+    keys = message.get("keys", [])
+    applied = 0
+    for cache in caches:
+        if cache.name != message.get("cache") or cache.worker_id == message.get("origin"):
+            continue
+        for key in keys:
+            cache.invalidate(cache.parse_key(key))
+        CACHE_INVALIDATIONS.labels(cache.name, "remote").inc(len(keys))
+        applied += len(keys)
+    return applied
+
+async def listen_for_invalidations(caches: List[TieredCache], store: Any = shared_store, retry_interval: float = 1.0):
+
+    while True:
+        pubsub = store.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    apply_invalidation(caches, message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache invalidation listener failed, resubscribing: %s", e)
+            # Whatever was broadcast while disconnected was missed, so local copies can no longer be trusted
+            for cache in caches:
+                cache.clear()
+            await asyncio.sleep(retry_interval)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from core.instrumentation import SINGLEFLIGHT_EXECUTED, SINGLEFLIGHT_COALESCED
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            SINGLEFLIGHT_EXECUTED.labels(self.name).inc()
+        else:
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+
+        # Shielded so one caller disconnecting does not cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,57 @@
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+from core.instrumentation import REFRESH_STAGE_SECONDS
+
+TRACE_SPANS = os.getenv("TRACE_SPANS", "false").lower() == "true"
+
+tracer = None
+if TRACE_SPANS:
+    try:
+        from opentelemetry import trace
+        tracer = trace.get_tracer("bingelogic")
+    except ImportError:
+        pass
+
+def span(name: str, **attributes):
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+def season_bucket(seasons: Optional[int]) -> str:
+
+    # Bucketed so the label stays low-cardinality
+    if not seasons:
+        return "unknown"
+    if seasons <= 1:
+        return "1"
+    if seasons <= 5:
+        return "2-5"
+    if seasons <= 10:
+        return "6-10"
+    return "11+"
+
+class StageTimer:
+
+    # Stage times are held until the refresh knows how many seasons the show has, then observed together
+
+    def __init__(self, name: str = "refresh"):
+        self.name = name
+        self.seasons: Optional[int] = None
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            with span(f"{self.name}.{stage}"):
+                yield
+        finally:
+            self.durations[stage] = self.durations.get(stage, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        seasons = season_bucket(self.seasons)
+        for stage, seconds in self.durations.items():
+            REFRESH_STAGE_SECONDS.labels(stage, seasons).observe(seconds)
+        self.durations.clear()
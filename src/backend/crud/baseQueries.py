@@ -1,30 +1,69 @@
-from db.mongodb import db 
-from typing import List, Optional, Any, Dict 
+from db.mongodb import db, HOT_READ_PREFERENCE
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.read_preferences import Primary
+from typing import List, Optional, Any, Dict, Tuple
 
-async def get(collection: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    return await db[collection].find_one(query)
+def read_collection(collection: str, hot: bool = False):
+    # Only hot reads may be routed away from the primary; everything else reads its own writes
+    if hot and HOT_READ_PREFERENCE != Primary():
+        return db[collection].with_options(read_preference=HOT_READ_PREFERENCE)
+    return db[collection]
 
-async def get_many(collection: str, query: Dict[str, Any], limit: int = 100) -> List[Dict[str, Any]]:
-    pointer = db[collection].find(query).limit(limit)
+def hot_read_staleness() -> int:
+    # How far behind the primary a hot read may be; 0 when hot reads stay on the primary
+    return 0 if HOT_READ_PREFERENCE == Primary() else HOT_READ_PREFERENCE.max_staleness
+
+async def get(collection: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None, hot: bool = False) -> Optional[Dict[str, Any]]:
+    return await read_collection(collection, hot).find_one(query, projection)
+
+async def aggregate(collection: str, pipeline: List[Dict[str, Any]], limit: Optional[int] = None, hot: bool = False) -> List[Dict[str, Any]]:
+    return await read_collection(collection, hot).aggregate(pipeline).to_list(length=limit)
+
+async def get_many(collection: str, query: Dict[str, Any], limit: int = 100, projection: Optional[Dict[str, Any]] = None,
+                   sort: Optional[List[Tuple[str, int]]] = None, hot: bool = False) -> List[Dict[str, Any]]:
+    pointer = read_collection(collection, hot).find(query, projection).limit(limit)
+    if sort:
+        pointer = pointer.sort(sort)
     return await pointer.to_list(length=limit)
 
 async def insert(collection: str, data: Dict[str, Any]) -> str:
     result = await db[collection].insert_one(data)
     return str(result.inserted_id)
 
-async def update(collection: str, id_val: Any, data: Dict[str, Any]):
+async def update(collection: str, id_val: Any, data: Dict[str, Any], match: Optional[Dict[str, Any]] = None):
     return await db[collection].update_one(
-        {"_id": id_val},
+        {"_id": id_val, **(match or {})},
         {"$set": data}
     )
 
+async def replace(collection: str, id_val: Any, data: Dict[str, Any], upsert: bool = True):
+    return await db[collection].replace_one(
+        {"_id": id_val},
+        data,
+        upsert=upsert
+    )
+
+async def bulk_replace(collection: str, docs: List[Dict[str, Any]]):
+    requests = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs]
+    return await db[collection].bulk_write(requests, ordered=False)
+
+async def bulk_update(collection: str, updates: List[Tuple[Any, Dict[str, Any]]]):
+    requests = [UpdateOne({"_id": id_val}, {"$set": data}) for id_val, data in updates]
+    return await db[collection].bulk_write(requests, ordered=False)
+
 async def delete(collection: str, query: Dict[str, Any]):
     return await db[collection].delete_one(query)
 
-async def delete_many(collection:str, ids: List[int]):
-    query = {"id": {"$in": ids}}
+async def delete_many(collection:str, ids: List[int], match: Optional[Dict[str, Any]] = None):
+    query = {"_id": {"$in": ids}, **(match or {})}
     return await db[collection].delete_many(query)
 
-def get_cursor(collection: str, projection: Optional[Dict[str, Any]]):
-    return db[collection].find({}, projection)
+def get_cursor(collection: str, projection: Optional[Dict[str, Any]], query: Optional[Dict[str, Any]] = None,
+               sort: Optional[List[Tuple[str, int]]] = None, batch_size: Optional[int] = None, hot: bool = False):
+    pointer = read_collection(collection, hot).find(query or {}, projection)
+    if sort:
+        pointer = pointer.sort(sort)
+    if batch_size:
+        pointer = pointer.batch_size(batch_size)
+    return pointer
 
@@ -1,42 +1,356 @@
+import os
+import bson
+from datetime import datetime
 from crud import baseQueries
-from models.show_model import ShowModel
-from db.mongodb import DatabaseCollections
-from typing import Optional, Dict, List, Any
+from models.show_model import ShowModel, ShowSummary, Episode, EpisodePage
+from db.mongodb import DatabaseCollections, HOT_READ_PREFERENCE
+from core.cache import TTLCache
+from core.shared_cache import TieredCache
+from core.freshness import SHOW_MAX_AGE, seconds_until_stale
+from core.episode_columns import use_columns, encode_episode_columns, decode_episode_columns, episode_dicts
+from core.rankings import RankingIndex, RankedShow, RANKED_METRICS, ranked_show
+from typing import Optional, Dict, List, Any, Tuple
 
-async def db_get_show_by_id(show_id: int) -> Optional[ShowModel]:
-    data = await baseQueries.get(DatabaseCollections.SHOWS, {"_id": show_id})
-    return ShowModel(**data) if data else None
+show_cache = TieredCache(
+    TTLCache(
+        "show",
+        ttl=SHOW_MAX_AGE.total_seconds(),
+        max_entries=int(os.getenv("SHOW_CACHE_MAX_ENTRIES", "2048")),
+        max_bytes=int(os.getenv("SHOW_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    ),
+    encode=lambda show: bson.encode(show_document(show)),
+    decode=lambda payload: show_from_document(bson.decode(payload)),
+    parse_key=int,
+    ttl_for=lambda show: seconds_until_stale(show),
+    recent_window=max(HOT_READ_PREFERENCE.max_staleness, 0)
+)
+
+ranking_index = RankingIndex()
+
+RANKING_PROJECTION = {"_id": 1, "title": 1, "poster_path": 1, "genres": 1, "metrics": 1}
+
+def update_rankings(show: ShowModel):
+    ranked = ranked_show(show.model_dump(by_alias=True, include={"id", "title", "poster_path", "genres", "metrics"}))
+    if ranked:
+        ranking_index.update(ranked)
+    else:
+        ranking_index.remove(show.id)
+
+async def update_ranking_scores(metrics: List[Tuple[int, Dict[str, Any]]]):
+
+    # Title and genres come from the index when the show is already ranked, otherwise from the primary
+    missing = []
+    for show_id, data in metrics:
+        ranked = ranking_index.get(show_id)
+        if ranked:
+            ranking_index.update(ranked_show({**ranked._asdict(), "_id": show_id, "metrics": data}))
+        else:
+            missing.append(show_id)
+
+    if missing:
+        docs = await baseQueries.get_many(DatabaseCollections.SHOWS, {"_id": {"$in": missing}}, len(missing), RANKING_PROJECTION)
+        for doc in docs:
+            ranked = ranked_show(doc)
+            if ranked:
+                ranking_index.update(ranked)
+
+def show_read_staleness(show_id: int) -> int:
+
+    # A secondary may not have caught up with a write this worker has heard about yet, so for the
+    # staleness bound after one the show is read from the primary
+    if show_cache.recently_invalidated(show_id):
+        return 0
+    return baseQueries.hot_read_staleness()
+
+async def db_get_show_by_id(show_id: int, hot: bool = True) -> Optional[ShowModel]:
+
+    generation = show_cache.generation
+    show, version = await show_cache.lookup(show_id)
+    if show:
+        return show
+
+    staleness = show_read_staleness(show_id) if hot else 0
+    data = await baseQueries.get(DatabaseCollections.SHOWS, {"_id": show_id}, hot=staleness > 0)
+    if not data:
+        return None
+
+    # A copy from a secondary is cached no longer than it may lag, so the lag is not stretched to the cache TTL
+    show = show_from_document(data)
+    payload = bson.encode(data)
+    ttl = min(seconds_until_stale(show), staleness) if staleness else seconds_until_stale(show)
+    await show_cache.set(show_id, show, ttl=ttl, size=len(payload), generation=generation, payload=payload, version=version)
+    return show
+
+def show_summary(show: ShowModel) -> ShowSummary:
+    return ShowSummary.model_construct(**{name: getattr(show, name) for name in ShowSummary.model_fields})
+
+SHOW_SUMMARY_PROJECTION = {"episodes": 0, "episode_columns": 0, "metrics_summary": 0, "season_fingerprints": 0, "revision": 0}
+
+async def db_get_show_summary_by_id(show_id: int) -> Optional[ShowSummary]:
+
+    show = show_cache.peek(show_id)
+    if show:
+        return show_summary(show)
+
+    data = await baseQueries.get(DatabaseCollections.SHOWS, {"_id": show_id}, SHOW_SUMMARY_PROJECTION, hot=show_read_staleness(show_id) > 0)
+    if not data:
+        return None
+
+    return ShowSummary(**data)
+
+def episode_page(show_id: int, season_number: int, number_of_seasons: int, episodes: List[Episode]) -> EpisodePage:
+    return EpisodePage(
+        show_id=show_id,
+        season_number=season_number,
+        number_of_seasons=number_of_seasons,
+        next_season=season_number + 1 if season_number < number_of_seasons else None,
+        episodes=episodes
+    )
+
+async def db_get_show_summaries_updated_since(updated_after: datetime, limit: int) -> List[ShowSummary]:
+    docs = await baseQueries.get_many(
+        DatabaseCollections.SHOWS,
+        {"last_updated": {"$gte": updated_after}},
+        limit,
+        SHOW_SUMMARY_PROJECTION
+    )
+    return [ShowSummary(**doc) for doc in docs]
+
+async def db_get_episode_page(show_id: int, season_number: int) -> Optional[EpisodePage]:
+
+    show = show_cache.peek(show_id)
+    if show:
+        episodes = [episode for episode in show.episodes if episode.season_number == season_number]
+        return episode_page(show_id, season_number, show.number_of_seasons, episodes)
+
+    docs = await baseQueries.aggregate(DatabaseCollections.SHOWS, [
+        {"$match": {"_id": show_id}},
+        {"$project": {
+            "number_of_seasons": 1,
+            "episode_columns": 1,
+            "episodes": {"$filter": {"input": "$episodes", "as": "episode", "cond": {"$eq": ["$$episode.season_number", season_number]}}}
+        }}
+    ], 1, hot=show_read_staleness(show_id) > 0)
+    if not docs:
+        return None
+
+    if docs[0].get("episode_columns"):
+        episodes = [episode for episode in decode_episode_columns(docs[0]["episode_columns"]) if episode.season_number == season_number]
+    else:
+        episodes = [Episode(**episode) for episode in docs[0]["episodes"] or []]
+
+    return episode_page(show_id, season_number, docs[0]["number_of_seasons"], episodes)
+
+def new_revision() -> str:
+    return str(bson.ObjectId())
+
+def show_document(show: ShowModel) -> Dict[str, Any]:
+    if use_columns():
+        data = show.model_dump(by_alias=True, exclude={"episodes"})
+        data["episode_columns"] = encode_episode_columns(show.episodes)
+    else:
+        data = show.model_dump(by_alias=True)
+    if show.metrics_summary:
+        data["metrics_summary"] = show.metrics_summary.model_dump()
+    data["season_fingerprints"] = [fingerprint.model_dump() for fingerprint in show.season_fingerprints]
+    if show.revision:
+        data["revision"] = show.revision
+    return data
+
+def show_from_document(data: Dict[str, Any]) -> ShowModel:
+
+    columns = data.get("episode_columns")
+    if columns is not None:
+        data = {key: value for key, value in data.items() if key != "episode_columns"}
+        data["episodes"] = episode_dicts(columns)
+
+    show = ShowModel(**data)
+    show._columnar = columns is not None
+    return show
+
+def show_changes(old: Any, new: Any, path: str = "") -> Dict[str, Any]:
+
+    # Dotted $set paths for everything that differs; lists are diffed per index unless they shrank
+    if old == new:
+        return {}
+
+    if isinstance(old, dict) and isinstance(new, dict) and path and old.keys() <= new.keys():
+        changes = {}
+        for key, value in new.items():
+            changes.update(show_changes(old.get(key), value, f"{path}.{key}"))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and path and len(new) >= len(old):
+        changes = {}
+        for i, value in enumerate(new):
+            changes.update(show_changes(old[i] if i < len(old) else None, value, f"{path}.{i}"))
+        return changes if len(changes) <= len(new) // 2 + 1 else {path: new}
+
+    if not path:
+        changes = {}
+        for key, value in new.items():
+            if key != "_id":
+                changes.update(show_changes(old.get(key), value, key))
+        return changes
+
+    return {path: new}
 
 async def db_insert_show(show: ShowModel):
-    data = show.model_dump(by_alias=True)
-    return await baseQueries.insert(
+    show_cache.invalidate(show.id)
+    show.revision = new_revision()
+    result = await baseQueries.insert(
+        DatabaseCollections.SHOWS,
+        show_document(show)
+    )
+    update_rankings(show)
+    await show_cache.broadcast([show.id])
+    return result
+
+async def db_upsert_show(show: ShowModel):
+    show_cache.invalidate(show.id)
+    show.revision = new_revision()
+    result = await baseQueries.replace(
+        DatabaseCollections.SHOWS,
+        show.id,
+        show_document(show)
+    )
+    update_rankings(show)
+    await show_cache.broadcast([show.id])
+    return result
+
+async def db_upsert_shows(shows: List[ShowModel]):
+    if not shows:
+        return None
+    for show in shows:
+        show_cache.invalidate(show.id)
+        show.revision = new_revision()
+    result = await baseQueries.bulk_replace(
+        DatabaseCollections.SHOWS,
+        [show_document(show) for show in shows]
+    )
+    for show in shows:
+        update_rankings(show)
+    await show_cache.broadcast(show.id for show in shows)
+    return result
+
+async def db_set_show_metrics(metrics: List[Tuple[int, Dict[str, Any]]]):
+    if not metrics:
+        return None
+    for show_id, _ in metrics:
+        show_cache.invalidate(show_id)
+    result = await baseQueries.bulk_update(
+        DatabaseCollections.SHOWS,
+        [(show_id, {"metrics": data, "revision": new_revision()}) for show_id, data in metrics]
+    )
+    await update_ranking_scores(metrics)
+    await show_cache.broadcast(show_id for show_id, _ in metrics)
+    return result
+
+async def db_save_show_changes(previous: ShowModel, show: ShowModel):
+
+    # A diff against a document stored in the other episode layout would leave the old layout behind
+    if previous._columnar is not None and previous._columnar != use_columns():
+        return await db_upsert_show(show)
+
+    changes = show_changes(show_document(previous), show_document(show))
+    if not changes:
+        return None
+    show.revision = changes["revision"] = new_revision()
+
+    # The diff is only valid against the version it was computed from; anything else gets a full replace
+    show_cache.invalidate(show.id)
+    result = await baseQueries.update(
         DatabaseCollections.SHOWS,
-        data
+        show.id,
+        changes,
+        match={"last_updated": previous.last_updated}
     )
+    if result.matched_count == 0:
+        return await db_upsert_show(show)
+
+    update_rankings(show)
+    await show_cache.broadcast([show.id])
+    return result
 
 async def db_update_show(show_id: int, data: Dict[str, Any]):
-    return await baseQueries.update(
+    show_cache.invalidate(show_id)
+    result = await baseQueries.update(
         DatabaseCollections.SHOWS,
         show_id,
-        data
+        {**data, "revision": new_revision()}
     )
+    await show_cache.broadcast([show_id])
+    return result
 
 async def db_delete_show(show_id: int):
-    return await baseQueries.delete(
+    show_cache.invalidate(show_id)
+    ranking_index.remove(show_id)
+    result = await baseQueries.delete(
         DatabaseCollections.SHOWS,
         {"_id": show_id}
     )
+    await show_cache.broadcast([show_id])
+    return result
+
+async def db_delete_many_shows(show_ids: List[int], updated_before: Optional[datetime] = None):
+    for show_id in show_ids:
+        show_cache.invalidate(show_id)
+    result = await baseQueries.delete_many(
+        DatabaseCollections.SHOWS,
+        show_ids,
+        {"last_updated": {"$lt": updated_before}} if updated_before else None
+    )
+
+    # With a cutoff some ids may have been refreshed in the meantime and survived
+    survivors = set()
+    if updated_before and result.deleted_count < len(show_ids):
+        docs = await baseQueries.get_many(DatabaseCollections.SHOWS, {"_id": {"$in": show_ids}}, len(show_ids), {"_id": 1})
+        survivors = {doc["_id"] for doc in docs}
+
+    for show_id in show_ids:
+        if show_id not in survivors:
+            ranking_index.remove(show_id)
+    await show_cache.broadcast(show_id for show_id in show_ids if show_id not in survivors)
+    return result
+
+async def db_get_expired_show_ids(updated_before: datetime, limit: int) -> List[int]:
+    docs = await baseQueries.get_many(
+        DatabaseCollections.SHOWS,
+        {"last_updated": {"$lt": updated_before}},
+        limit,
+        {"_id": 1}
+    )
+    return [doc["_id"] for doc in docs]
+
+async def db_get_ranking_page(metric: str, genre: Optional[str] = None, after: Optional[Tuple[float, int]] = None,
+                              limit: int = 20) -> List[RankedShow]:
+
+    field = f"metrics.{RANKED_METRICS[metric]}"
+    query: Dict[str, Any] = {field: {"$ne": None}}
+    if genre:
+        query["genres"] = genre
+    if after:
+        query["$or"] = [{field: {"$lt": after[0]}}, {field: after[0], "_id": {"$lt": after[1]}}]
 
-async def db_delete_many_shows(show_ids: List[int]):
-    return await baseQueries.delete_many(
+    docs = await baseQueries.get_many(
         DatabaseCollections.SHOWS,
-        show_ids
+        query,
+        limit,
+        RANKING_PROJECTION,
+        [(field, -1), ("_id", -1)],
+        hot=True
     )
+    return [ranked_show(doc) for doc in docs]
 
-def db_get_cursor(projection: Optional[Dict[str, Any]]):
+def db_get_cursor(projection: Optional[Dict[str, Any]], query: Optional[Dict[str, Any]] = None,
+                  sort: Optional[List[Tuple[str, int]]] = None, batch_size: Optional[int] = None, hot: bool = False):
     return baseQueries.get_cursor(
         DatabaseCollections.SHOWS,
-        projection
+        projection,
+        query,
+        sort,
+        batch_size,
+        hot
     )
 
 
@@ -1,7 +1,13 @@
 import os
+import importlib.util
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
 from pymongo.server_api import ServerApi
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
+from core.rankings import RANKED_METRICS
+from core.instrumentation import MONGO_POOL_CHECKOUT_SECONDS, MONGO_POOL_CHECKOUTS, MONGO_POOL_CHECKED_OUT, MONGO_POOL_CONNECTIONS
 
 class DatabaseCollections:
     SHOWS = "shows"
@@ -9,9 +15,125 @@ class DatabaseCollections:
 load_dotenv("backend.env")
 uri = os.getenv("MONGODB_URI")
 
-client = AsyncIOMotorClient(uri, server_api=ServerApi('1'))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "2"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+
+# Hot reads (show lookups, rankings) may go to secondaries; writes and read-modify-write always use the primary
+MONGO_HOT_READ_PREFERENCE = os.getenv("MONGO_HOT_READ_PREFERENCE", "primary")
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "90"))
+
+READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def available_compressors(requested: str) -> list:
+
+    # Asking for a compressor whose module is missing only earns a driver warning, so those are left out
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    return [name for name in names if name in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[name])]
+
+def hot_read_preference(name: str = MONGO_HOT_READ_PREFERENCE, max_staleness: int = MONGO_MAX_STALENESS_SECONDS):
+
+    if name == "primary":
+        return Primary()
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_HOT_READ_PREFERENCE: {name}")
+
+    # Bounded staleness only applies where secondaries may answer; MongoDB requires at least 90 seconds
+    return READ_PREFERENCES[name](max_staleness=max(max_staleness, 90))
+
+def pool_server(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+
+    def connection_checked_out(self, event):
+        server = pool_server(event)
+        MONGO_POOL_CHECKOUT_SECONDS.labels(server).observe(event.duration or 0.0)
+        MONGO_POOL_CHECKOUTS.labels(server, "ok").inc()
+        MONGO_POOL_CHECKED_OUT.labels(server).inc()
+
+    def connection_check_out_failed(self, event):
+        server = pool_server(event)
+        MONGO_POOL_CHECKOUT_SECONDS.labels(server).observe(event.duration or 0.0)
+        MONGO_POOL_CHECKOUTS.labels(server, str(event.reason)).inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(pool_server(event)).dec()
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(pool_server(event)).inc()
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(pool_server(event)).dec()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+def create_client(uri: str, **overrides) -> AsyncIOMotorClient:
+
+    options = {
+        "server_api": ServerApi('1'),
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "maxConnecting": MONGO_MAX_CONNECTING,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "event_listeners": [PoolMetricsListener()]
+    }
+    compressors = available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = compressors
+
+    return AsyncIOMotorClient(uri, **{**options, **overrides})
+
+HOT_READ_PREFERENCE = hot_read_preference()
+
+client = create_client(uri)
 db = client.get_database("bingelogic_db")
 
+async def ensure_indexes():
+
+    # A plain index rather than a TTL one: expiry goes through cleanup(), which keeps stale shows while TMDB
+    # is down and drops the deleted shows from the caches and the rankings index
+    try:
+        await db[DatabaseCollections.SHOWS].create_index("last_updated")
+    except OperationFailure as e:
+        print("Error:  could not create last_updated index, " + str(e))
+
+    # Keyset pagination for /rankings sorts on (metric desc, _id desc), optionally within one genre
+    for field in RANKED_METRICS.values():
+        try:
+            await db[DatabaseCollections.SHOWS].create_index([(f"metrics.{field}", -1), ("_id", -1)])
+            await db[DatabaseCollections.SHOWS].create_index([("genres", 1), (f"metrics.{field}", -1), ("_id", -1)])
+        except OperationFailure as e:
+            print("Error:  could not create ranking index on " + field + ", " + str(e))
+
 async def ping_database():
     try:
         await client.admin.command("ping")
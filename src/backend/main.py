@@ -2,10 +2,22 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 from contextlib import asynccontextmanager
+import asyncio
+from datetime import datetime, timezone
 
-from db.mongodb import client, ping_database
+from db.mongodb import client, ping_database, ensure_indexes
+from services.tmdb_service import create_tmdb_client, TMDB_MAX_RETRIES, TMDB_REQUEST_MAX_BACKOFF
 from api.health.Health import health_router, database_heartbeat
-from api.routes.shows import shows_router
+from api.routes.shows import shows_router, refresh_show
+from api.routes.rankings import rankings_router
+from services.ranking_service import keep_rankings_loaded
+from core.executor import shutdown_executor
+from core.loop_monitor import monitor_event_loop_lag
+from core.profiling import install_request_profiler
+from core.shared_cache import shared_store, create_subscriber_store, listen_for_invalidations
+from services.suggestion_service import suggestion_cache
+from services.refresh_scheduler import RefreshScheduler, REFRESH_ACTIVE_WINDOW, REFRESH_MAX_TRACKED
+from crud.modeledQueries import db_get_show_summaries_updated_since, show_cache
 
 origins = [
     "http://localhost:3000",
@@ -17,11 +29,38 @@ async def lifespan(app: FastAPI):
     res = await ping_database()
     if res:
         print("Successfully connected to database")
+        await ensure_indexes()
     else:
         print("Unsuccessful connection to database")
 
+    app.state.tmdb_client = create_tmdb_client(max_retries=TMDB_MAX_RETRIES, max_backoff=TMDB_REQUEST_MAX_BACKOFF)
+
+    seed = []
+    if res:
+        seed = await db_get_show_summaries_updated_since(datetime.now(timezone.utc) - REFRESH_ACTIVE_WINDOW, REFRESH_MAX_TRACKED)
+
+    app.state.refresh_scheduler = RefreshScheduler(lambda show_id: refresh_show(show_id, app.state.tmdb_client))
+    app.state.refresh_scheduler.start(seed)
+
+    rankings_loader = asyncio.create_task(keep_rankings_loaded()) if res else None
+    loop_monitor = asyncio.create_task(monitor_event_loop_lag())
+    subscriber_store = create_subscriber_store(shared_store)
+    invalidation_listener = asyncio.create_task(listen_for_invalidations([show_cache, suggestion_cache], subscriber_store)) if shared_store else None
+
     yield
 
+    loop_monitor.cancel()
+    if invalidation_listener:
+        invalidation_listener.cancel()
+    if rankings_loader:
+        rankings_loader.cancel()
+    await app.state.refresh_scheduler.stop()
+    await app.state.tmdb_client.aclose()
+    shutdown_executor()
+    if shared_store:
+        await shared_store.aclose()
+    if subscriber_store is not shared_store:
+        await subscriber_store.aclose()
     client.close()
 
 app = FastAPI(
@@ -29,9 +68,11 @@ app = FastAPI(
         lifespan = lifespan)
 
 Instrumentator().instrument(app).expose(app)
+install_request_profiler(app)
 
 app.include_router(health_router, prefix="/api")
 app.include_router(shows_router, prefix="/api")
+app.include_router(rankings_router, prefix="/api")
 
 app.add_middleware(
     CORSMiddleware,
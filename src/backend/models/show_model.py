@@ -1,13 +1,18 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr
+from typing import List, NamedTuple, Optional, Tuple
 from datetime import datetime
 
 class SearchResult(BaseModel):
     tmdb_id: int
     title: str
+    original_title: Optional[str] = None
     poster_path: Optional[str]
     release_date: Optional[str]
 
+class SearchPage(BaseModel):
+    results: List[SearchResult]
+    total_results: int
+
 class Episode(BaseModel):
     id: int
     season_number: int
@@ -32,7 +37,56 @@ class ShowMetrics(BaseModel):
     retention_rate: float
     binge_index: float
 
-class ShowModel(BaseModel):
+class SeasonSummary(BaseModel):
+    season_number: int
+    start: int
+    count: int
+    finale_episode_number: int
+    finale_rating: float
+    finale_vote_count: int
+
+class MetricsSummary(BaseModel):
+    count: int
+    rating_sum: float
+    rating_sum_sq: float
+    weighted_rating_sum: float
+    vote_count_sum: int
+    first_vote_count: int
+    last_vote_count: int
+    seasons: List[SeasonSummary] = []
+    bucket_ratings: List[float] = []
+    bucket_counts: List[int] = []
+    median_anchor: float = 0.0
+    median_below: int = 0
+    tail_ratings: List[float] = []
+    stinker_score: Optional[float] = None
+    stinker_entries: List[Tuple[int, int, float]] = []
+    highlight_score: Optional[float] = None
+    highlight_entries: List[Tuple[int, int, float]] = []
+
+class SeasonFingerprint(BaseModel):
+    season_number: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: str
+
+class EpisodeRecord(NamedTuple):
+    id: int
+    season_number: int
+    episode_number: int
+    title: str
+    rating: float
+    air_date: Optional[str]
+    vote_count: int
+
+class SeasonFetch(NamedTuple):
+    season_number: int
+    fingerprint: Optional[SeasonFingerprint] = None
+    episodes: Optional[List[EpisodeRecord]] = None
+    not_modified: bool = False
+    bytes_fetched: int = 0
+
+class ShowSummary(BaseModel):
 
     id: int = Field(alias="_id")
     title: str
@@ -43,15 +97,48 @@ class ShowModel(BaseModel):
     genres: List[str] = []
     number_of_seasons: int
     popularity: float = Field(default=0.0)
+    status: Optional[str] = None
+    last_air_date: Optional[str] = None
 
     metrics: Optional[ShowMetrics] = None
 
     last_updated: datetime = Field(default_factory=datetime.now)
 
-    episodes: List[Episode] = []
-
     model_config = ConfigDict(
         populate_by_name=True,
         extra="forbid",
         str_strip_whitespace=True
     )
+
+class ShowModel(ShowSummary):
+
+    metrics_summary: Optional[MetricsSummary] = Field(default=None, exclude=True)
+    season_fingerprints: List[SeasonFingerprint] = Field(default=[], exclude=True)
+
+    # Stamped on every write, including ones that leave last_updated alone
+    revision: Optional[str] = Field(default=None, exclude=True)
+
+    episodes: List[Episode] = []
+
+    # Which episode layout the stored document used, when the model was loaded from Mongo
+    _columnar: Optional[bool] = PrivateAttr(default=None)
+
+class EpisodePage(BaseModel):
+    show_id: int
+    season_number: int
+    number_of_seasons: int
+    next_season: Optional[int] = None
+    episodes: List[Episode]
+
+class RankingEntry(BaseModel):
+    show_id: int
+    title: str
+    poster_path: Optional[str] = None
+    genres: List[str] = []
+    score: float
+
+class RankingPage(BaseModel):
+    metric: str
+    genre: Optional[str] = None
+    items: List[RankingEntry]
+    next_cursor: Optional[str] = None
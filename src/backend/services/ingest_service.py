@@ -0,0 +1,128 @@
+import os
+import time
+import json
+import asyncio
+import logging
+import argparse
+import httpx
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from models.show_model import ShowModel
+from services.tmdb_service import create_tmdb_client
+from services.refresh_service import build_show
+from crud.modeledQueries import db_get_show_by_id, db_upsert_shows
+from core.freshness import is_fresh
+from core.ratelimit import TokenBucket
+from core.instrumentation import INGEST_SHOWS
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "16"))
+INGEST_RATE = float(os.getenv("INGEST_RATE", "40"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+class IngestReport(BaseModel):
+    requested: int
+    ingested: int = 0
+    skipped: int = 0
+    failed: List[int] = []
+    batches: int = 0
+    seconds: float = 0.0
+    shows_per_minute: float = 0.0
+
+def create_ingest_client(rate: float = INGEST_RATE, max_retries: int = INGEST_MAX_RETRIES) -> httpx.AsyncClient:
+    return create_tmdb_client(limiter=TokenBucket(rate), max_retries=max_retries)
+
+async def ingest_shows(show_ids: List[int], client: httpx.AsyncClient, workers: int = INGEST_WORKERS,
+                       batch_size: int = INGEST_BATCH_SIZE, force: bool = False) -> IngestReport:
+
+    ids = list(dict.fromkeys(show_ids))
+    report = IngestReport(requested=len(ids))
+    start = time.perf_counter()
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for show_id in ids:
+        pending.put_nowait(show_id)
+
+    # Bounded so fetching cannot run far ahead of the writer
+    built: "asyncio.Queue[Optional[ShowModel]]" = asyncio.Queue(maxsize=batch_size * 2)
+
+    async def worker():
+        while not pending.empty():
+            show_id = pending.get_nowait()
+
+            previous = await db_get_show_by_id(show_id, hot=False)
+            if previous and not force and is_fresh(previous):
+                report.skipped += 1
+                INGEST_SHOWS.labels("skipped").inc()
+                continue
+
+            try:
+                await built.put(await build_show(show_id, previous, client))
+            except HTTPException as e:
+                report.failed.append(show_id)
+                INGEST_SHOWS.labels("failed").inc()
+                logger.warning("Ingesting show %s failed: %s %s", show_id, e.status_code, e.detail)
+
+    async def writer():
+        batch = []
+        while True:
+            show = await built.get()
+            if show is not None:
+                batch.append(show)
+            if batch and (show is None or len(batch) >= batch_size):
+                await db_upsert_shows(batch)
+                report.ingested += len(batch)
+                report.batches += 1
+                INGEST_SHOWS.labels("ingested").inc(len(batch))
+                batch = []
+            if show is None:
+                return
+
+    writing = asyncio.create_task(writer())
+    tasks = [asyncio.create_task(worker()) for _ in range(min(workers, len(ids)) or 1)]
+    fetching = asyncio.gather(*tasks)
+    fetching.add_done_callback(lambda f: f.cancelled() or f.exception())
+    try:
+        # A writer that fails would leave the workers blocked on a full queue, so it is watched as well
+        await asyncio.wait([fetching, writing], return_when=asyncio.FIRST_COMPLETED)
+        if writing.done():
+            writing.result()
+        await fetching
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Shows that were already built still get written when a worker fails
+        if not writing.done():
+            await built.put(None)
+            await writing
+
+    report.seconds = round(time.perf_counter() - start, 3)
+    report.shows_per_minute = round(report.ingested / report.seconds * 60, 1) if report.seconds else 0.0
+    return report
+
+def read_ids(path: str) -> List[int]:
+    with open(path) as f:
+        return [int(line) for line in f.read().split() if line.strip()]
+
+async def main(args):
+    ids = args.ids + (read_ids(args.ids_file) if args.ids_file else [])
+    async with create_ingest_client(args.rate, args.retries) as client:
+        report = await ingest_shows(ids, client, args.workers, args.batch_size, args.force)
+    print(json.dumps(report.model_dump(), indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("ids", type=int, nargs="*")
+    parser.add_argument("--ids-file", default=None)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--rate", type=float, default=INGEST_RATE)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--retries", type=int, default=INGEST_MAX_RETRIES)
+    parser.add_argument("--force", action="store_true")
+    asyncio.run(main(parser.parse_args()))
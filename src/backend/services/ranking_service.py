@@ -0,0 +1,68 @@
+import os
+import base64
+import asyncio
+import logging
+from fastapi import HTTPException
+from models.show_model import RankingEntry, RankingPage
+from crud.modeledQueries import ranking_index, db_get_cursor, db_get_ranking_page, RANKING_PROJECTION
+from core.rankings import RankedShow, RANKED_METRICS, ranked_show
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RANKINGS_RELOAD_INTERVAL = float(os.getenv("RANKINGS_RELOAD_INTERVAL", "900"))
+
+def encode_cursor(show: RankedShow, metric: str) -> str:
+    return base64.urlsafe_b64encode(f"{show.scores[metric]!r}:{show.id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        score, show_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(score), int(show_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def load_rankings():
+
+    ranking_index.begin_load()
+    shows = []
+    async for doc in db_get_cursor(RANKING_PROJECTION, hot=True):
+        show = ranked_show(doc)
+        if show:
+            shows.append(show)
+
+    for _ in ranking_index.load_steps(shows):
+        await asyncio.sleep(0)
+
+async def keep_rankings_loaded(interval: float = RANKINGS_RELOAD_INTERVAL):
+
+    # Periodic reloads pick up writes made by other worker processes
+    while True:
+        try:
+            await load_rankings()
+        except Exception as e:
+            logger.warning("Loading rankings failed: %s", e)
+        await asyncio.sleep(interval)
+
+async def get_rankings(metric: str, genre: Optional[str] = None, cursor: Optional[str] = None, limit: int = 20) -> RankingPage:
+
+    if metric not in RANKED_METRICS:
+        raise HTTPException(status_code=404, detail="Unknown ranking")
+
+    after = decode_cursor(cursor) if cursor else None
+
+    if ranking_index.loaded:
+        shows, more = ranking_index.page(metric, genre, after, limit)
+    else:
+        shows = await db_get_ranking_page(metric, genre, after, limit + 1)
+        shows, more = shows[:limit], len(shows) > limit
+
+    return RankingPage(
+        metric = metric,
+        genre = genre,
+        items = [
+            RankingEntry(show_id=show.id, title=show.title, poster_path=show.poster_path, genres=list(show.genres), score=show.scores[metric])
+            for show in shows
+        ],
+        next_cursor = encode_cursor(shows[-1], metric) if shows and more else None
+    )
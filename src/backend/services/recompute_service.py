@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import BaseModel
+from crud.modeledQueries import db_get_cursor, db_set_show_metrics
+from core.metrics import getShowMetricsForDocuments
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+RECOMPUTE_WORKERS = int(os.getenv("RECOMPUTE_WORKERS", str(os.cpu_count() or 1)))
+RECOMPUTE_CHUNK_SIZE = int(os.getenv("RECOMPUTE_CHUNK_SIZE", "200"))
+RECOMPUTE_CHECKPOINT = os.getenv("RECOMPUTE_CHECKPOINT", "recompute.checkpoint.json")
+
+RECOMPUTE_PROJECTION = {
+    "_id": 1,
+    "metrics": 1,
+    "episodes.id": 1,
+    "episodes.rating": 1,
+    "episodes.vote_count": 1,
+    "episodes.season_number": 1,
+    "episodes.episode_number": 1,
+    "episode_columns.count": 1,
+    "episode_columns.id": 1,
+    "episode_columns.rating": 1,
+    "episode_columns.vote_count": 1,
+    "episode_columns.season_number": 1,
+    "episode_columns.episode_number": 1
+}
+
+class RecomputeReport(BaseModel):
+    resumed_after: Optional[int] = None
+    scanned: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    shows_per_second: float = 0.0
+
+def score_chunk(chunk: List[Tuple[int, Optional[Dict[str, Any]], Union[List[Dict[str, Any]], Dict[str, Any]]]]) -> List[Tuple[int, Dict[str, Any]]]:
+
+    # Only changed metrics travel back to the parent and on to Mongo
+    metrics = getShowMetricsForDocuments([episodes for _, _, episodes in chunk])
+    return [(show_id, new) for (show_id, old, _), new in zip(chunk, metrics) if new is not None and new != old]
+
+def read_checkpoint(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            return json.load(f)["last_id"]
+    except FileNotFoundError:
+        return None
+
+def write_checkpoint(path: str, last_id: int, report: RecomputeReport):
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump({"last_id": last_id, **report.model_dump(include={"scanned", "updated", "chunks"})}, f)
+    os.replace(temp, path)
+
+async def recompute_metrics(workers: int = RECOMPUTE_WORKERS, chunk_size: int = RECOMPUTE_CHUNK_SIZE,
+                            checkpoint: Optional[str] = RECOMPUTE_CHECKPOINT) -> RecomputeReport:
+
+    report = RecomputeReport(resumed_after=read_checkpoint(checkpoint) if checkpoint else None)
+    query = {"_id": {"$gt": report.resumed_after}} if report.resumed_after is not None else {}
+    start = time.perf_counter()
+
+    loop = asyncio.get_running_loop()
+    pending = deque()
+
+    async def drain():
+
+        # Chunks are written in cursor order, so the checkpoint never skips past unwritten shows
+        scoring, last_id, size = pending.popleft()
+        changed = await scoring
+        await db_set_show_metrics(changed)
+
+        report.updated += len(changed)
+        report.unchanged += size - len(changed)
+        report.chunks += 1
+        if checkpoint:
+            write_checkpoint(checkpoint, last_id, report)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        def submit(chunk):
+            pending.append((loop.run_in_executor(pool, score_chunk, chunk), chunk[-1][0], len(chunk)))
+
+        chunk = []
+        async for doc in db_get_cursor(RECOMPUTE_PROJECTION, query, [("_id", 1)], chunk_size):
+            chunk.append((doc["_id"], doc.get("metrics"), doc.get("episode_columns") or doc.get("episodes") or []))
+            report.scanned += 1
+
+            if len(chunk) >= chunk_size:
+                submit(chunk)
+                chunk = []
+                if len(pending) >= workers * 2:
+                    await drain()
+
+        if chunk:
+            submit(chunk)
+        while pending:
+            await drain()
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    report.seconds = round(time.perf_counter() - start, 3)
+    report.shows_per_second = round(report.scanned / report.seconds, 1) if report.seconds else 0.0
+    return report
+
+async def main(args):
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    report = await recompute_metrics(args.workers, args.chunk_size, args.checkpoint)
+    print(json.dumps(report.model_dump(), indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=RECOMPUTE_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default=RECOMPUTE_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true")
+    asyncio.run(main(parser.parse_args()))
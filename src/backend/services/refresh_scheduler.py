@@ -0,0 +1,171 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from fastapi import Request
+from core.freshness import seconds_until_stale, show_age, max_age
+from core.instrumentation import REFRESH_QUEUE_DEPTH, REFRESH_IN_FLIGHT, REFRESH_TRACKED, REFRESH_LAG, REFRESH_QUEUE_WAIT, REFRESH_DURATION
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+REFRESH_MAX_IN_FLIGHT = int(os.getenv("REFRESH_MAX_IN_FLIGHT", "4"))
+REFRESH_LOOKAHEAD = timedelta(seconds=int(os.getenv("REFRESH_LOOKAHEAD_SECONDS", "3600")))
+REFRESH_SCAN_INTERVAL = float(os.getenv("REFRESH_SCAN_INTERVAL", "60"))
+REFRESH_ACTIVE_WINDOW = timedelta(days=int(os.getenv("REFRESH_ACTIVE_WINDOW_DAYS", "3")))
+REFRESH_MAX_TRACKED = int(os.getenv("REFRESH_MAX_TRACKED", "10000"))
+REFRESH_MAX_ATTEMPTS = int(os.getenv("REFRESH_MAX_ATTEMPTS", "3"))
+REFRESH_RETRY_BACKOFF = float(os.getenv("REFRESH_RETRY_BACKOFF", "30"))
+
+class TrackedShow(NamedTuple):
+    last_updated: datetime
+    status: Optional[str]
+    last_air_date: Optional[str]
+    popularity: float
+    last_requested: datetime
+
+def track(show, last_requested: datetime) -> TrackedShow:
+    return TrackedShow(show.last_updated, show.status, show.last_air_date, show.popularity, last_requested)
+
+def refresh_priority(show) -> float:
+    staleness = show_age(show) / max_age(show)
+    return max(staleness, 0.0) * (1.0 + max(show.popularity, 0.0))
+
+class RefreshScheduler:
+
+    def __init__(self, refresh: Callable[[int], Awaitable[Any]], max_in_flight: int = REFRESH_MAX_IN_FLIGHT,
+                 lookahead: timedelta = REFRESH_LOOKAHEAD, scan_interval: float = REFRESH_SCAN_INTERVAL,
+                 active_window: timedelta = REFRESH_ACTIVE_WINDOW, max_tracked: int = REFRESH_MAX_TRACKED,
+                 max_attempts: int = REFRESH_MAX_ATTEMPTS, retry_backoff: float = REFRESH_RETRY_BACKOFF):
+        self.refresh = refresh
+        self.max_in_flight = max_in_flight
+        self.lookahead = lookahead
+        self.scan_interval = scan_interval
+        self.active_window = active_window
+        self.max_tracked = max_tracked
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._queued: Set[int] = set()
+        self._running: Set[int] = set()
+        self._tracked: "OrderedDict[int, TrackedShow]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Dict[int, asyncio.TimerHandle] = {}
+        self._sequence = 0
+
+    def start(self, seed: Optional[List[Any]] = None):
+
+        # Shows refreshed within the active window were being read before a restart, so they stay tracked
+        cutoff = datetime.now(timezone.utc) - self.active_window
+        for show in seed or []:
+            if show.last_updated.replace(tzinfo=timezone.utc) > cutoff:
+                self._track(show.id, track(show, show.last_updated.replace(tzinfo=timezone.utc)))
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)]
+        self._tasks.append(asyncio.create_task(self._scan_loop()))
+
+    async def stop(self):
+
+        for handle in self._retries.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self) -> int:
+        return len(self._queued)
+
+    def is_scheduled(self, show_id: int) -> bool:
+        return show_id in self._queued or show_id in self._running
+
+    def observe(self, show):
+        self._track(show.id, track(show, datetime.now(timezone.utc)))
+
+    def schedule(self, show):
+        self.observe(show)
+        if seconds_until_stale(show) <= self.lookahead.total_seconds():
+            self._enqueue(show.id, refresh_priority(show))
+
+    def scan(self):
+
+        now = datetime.now(timezone.utc)
+        for show_id, tracked in list(self._tracked.items()):
+            if now - tracked.last_requested > self.active_window:
+                del self._tracked[show_id]
+            elif seconds_until_stale(tracked) <= self.lookahead.total_seconds():
+                self._enqueue(show_id, refresh_priority(tracked))
+
+        REFRESH_TRACKED.set(len(self._tracked))
+
+    def _track(self, show_id: int, tracked: TrackedShow):
+
+        self._tracked[show_id] = tracked
+        self._tracked.move_to_end(show_id)
+        while len(self._tracked) > self.max_tracked:
+            self._tracked.popitem(last=False)
+
+        REFRESH_TRACKED.set(len(self._tracked))
+
+    def _enqueue(self, show_id: int, priority: float, attempt: int = 1):
+
+        if self.is_scheduled(show_id) or show_id in self._retries:
+            return
+
+        self._sequence += 1
+        self._queued.add(show_id)
+        self._queue.put_nowait((-priority, self._sequence, show_id, attempt, time.monotonic()))
+        REFRESH_QUEUE_DEPTH.set(len(self._queued))
+
+    def _retry(self, show_id: int, priority: float, attempt: int):
+
+        def requeue():
+            self._retries.pop(show_id, None)
+            self._enqueue(show_id, priority, attempt)
+
+        delay = random.uniform(0.5, 1.5) * self.retry_backoff * 2 ** (attempt - 2)
+        self._retries[show_id] = asyncio.get_running_loop().call_later(delay, requeue)
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(self.scan_interval)
+            self.scan()
+
+    async def _worker(self):
+
+        while True:
+            negative_priority, _, show_id, attempt, queued_at = await self._queue.get()
+            self._queued.discard(show_id)
+            self._running.add(show_id)
+            REFRESH_QUEUE_DEPTH.set(len(self._queued))
+            REFRESH_IN_FLIGHT.inc()
+            REFRESH_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+
+            tracked = self._tracked.get(show_id)
+            if tracked:
+                REFRESH_LAG.observe(max(-seconds_until_stale(tracked), 0.0))
+
+            start = time.perf_counter()
+            try:
+                show = await self.refresh(show_id)
+                REFRESH_DURATION.labels("success").observe(time.perf_counter() - start)
+                if show is not None and show_id in self._tracked:
+                    self._tracked[show_id] = track(show, self._tracked[show_id].last_requested)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                REFRESH_DURATION.labels("failure").observe(time.perf_counter() - start)
+                logger.warning("Background refresh of show %s failed (attempt %s): %s", show_id, attempt, e)
+                if attempt < self.max_attempts:
+                    self._retry(show_id, -negative_priority, attempt + 1)
+            finally:
+                self._running.discard(show_id)
+                REFRESH_IN_FLIGHT.dec()
+
+def get_refresh_scheduler(request: Request) -> Optional[RefreshScheduler]:
+    return getattr(request.app.state, "refresh_scheduler", None)
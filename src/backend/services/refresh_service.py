@@ -0,0 +1,106 @@
+import httpx
+import logging
+from fastapi import HTTPException
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import List, Optional, Set, Tuple, Union
+from models.show_model import ShowModel, Episode, EpisodeRecord, SeasonFetch
+from services.tmdb_service import tmdb_get_show_details, tmdb_get_seasons_conditional
+from core.metrics_summary import seasonUpdates, applySeasonUpdates, computeShowMetrics
+from core.executor import run_cpu_bound
+from core.tracing import StageTimer
+from core.instrumentation import TMDB_SEASON_FETCHES, REFRESH_BYTES_FETCHED, REFRESH_SEASONS_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+def merge_season_fetches(previous: Optional[ShowModel], fetches: List[SeasonFetch]) -> Tuple[List[Union[Episode, EpisodeRecord]], Set[int]]:
+
+    stored = {}
+    if previous:
+        stored = {season: list(group) for season, group in groupby(previous.episodes, key=lambda episode: episode.season_number)}
+
+    episodes = []
+    changed = set()
+    for fetch in fetches:
+        if fetch.episodes is None and fetch.season_number in stored:
+            episodes.extend(stored[fetch.season_number])
+        else:
+            episodes.extend(fetch.episodes or [])
+            changed.add(fetch.season_number)
+
+    return episodes, changed
+
+def episode_models(episodes: List[Union[Episode, EpisodeRecord]]) -> List[Episode]:
+    return [episode if isinstance(episode, Episode) else Episode(**episode._asdict()) for episode in episodes]
+
+class RefreshProgress:
+
+    # Hooks for callers that want a refresh's results as they arrive; they must not block
+
+    def on_show(self, show: ShowModel):
+        pass
+
+    def on_season(self, fetch: SeasonFetch):
+        pass
+
+def report_season_fetches(show_id: int, fetches: List[SeasonFetch], changed: Set[int]):
+
+    fetched_bytes = sum(fetch.bytes_fetched for fetch in fetches)
+    skipped = len(fetches) - len(changed)
+
+    for fetch in fetches:
+        if fetch.season_number in changed:
+            TMDB_SEASON_FETCHES.labels("modified").inc()
+        elif fetch.not_modified:
+            TMDB_SEASON_FETCHES.labels("not_modified").inc()
+        else:
+            TMDB_SEASON_FETCHES.labels("unchanged").inc()
+
+    REFRESH_BYTES_FETCHED.observe(fetched_bytes)
+    REFRESH_SEASONS_SKIPPED.observe(skipped)
+    logger.info("Refreshed show %s: %s bytes fetched, %s of %s seasons skipped", show_id, fetched_bytes, skipped, len(fetches))
+
+async def score_show(previous: Optional[ShowModel], episodes: List[Union[Episode, EpisodeRecord]], changed_seasons: Set[int]):
+
+    # Only the stored summary and the changed seasons cross to the executor; the whole show goes only for a rebuild
+    updates = seasonUpdates(previous, episodes, changed_seasons)
+    if updates is not None:
+        updated = await run_cpu_bound(applySeasonUpdates, previous.metrics_summary, updates, size=sum(len(new) for _, _, new in updates))
+        if updated:
+            return updated
+
+    return await run_cpu_bound(computeShowMetrics, episodes, size=len(episodes))
+
+async def build_show(show_id: int, previous: Optional[ShowModel] = None, client: httpx.AsyncClient = None, stages: Optional[StageTimer] = None,
+                     progress: Optional[RefreshProgress] = None) -> ShowModel:
+
+    stages = stages or StageTimer()
+
+    with stages.stage("tmdb_details"):
+        show = await tmdb_get_show_details(show_id, client)
+    stages.seasons = show.number_of_seasons
+    if progress:
+        progress.on_show(show)
+
+    fingerprints = {fingerprint.season_number: fingerprint for fingerprint in previous.season_fingerprints} if previous else {}
+    with stages.stage("tmdb_seasons"):
+        fetches = await tmdb_get_seasons_conditional(show_id, show.number_of_seasons, fingerprints, client, progress.on_season if progress else None)
+    with stages.stage("merge"):
+        episodes, changed_seasons = merge_season_fetches(previous, fetches)
+    report_season_fetches(show_id, fetches, changed_seasons)
+
+    # Metrics need at least one rated episode; such shows are reported as not found rather than failing in scoring
+    if not episodes:
+        raise HTTPException(status_code=404, detail="Show has no rated episodes")
+
+    with stages.stage("metrics"):
+        metrics, summary = await score_show(previous, episodes, changed_seasons)
+
+    with stages.stage("validate"):
+        show.episodes = episode_models(episodes)
+    show.metrics = metrics
+    show.metrics_summary = summary
+    show.season_fingerprints = [fetch.fingerprint for fetch in fetches if fetch.fingerprint]
+    show.last_updated = datetime.now(timezone.utc)
+
+    return show
@@ -0,0 +1,46 @@
+import os
+import hashlib
+
+from fastapi import Response
+from models.show_model import ShowModel
+from core.cache import TTLCache
+from core.freshness import SHOW_MAX_AGE, seconds_until_stale
+from typing import Optional, Tuple
+
+show_json_cache = TTLCache(
+    "show_json",
+    ttl=SHOW_MAX_AGE.total_seconds(),
+    max_entries=int(os.getenv("SHOW_JSON_CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("SHOW_JSON_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+)
+
+def encode_show(show: ShowModel) -> Tuple[str, bytes]:
+
+    # Keyed by version, so a rewritten show is simply a new entry and the old one ages out
+    key = (show.id, show.last_updated, show.revision)
+    encoded = show_json_cache.get(key)
+    if encoded:
+        return encoded
+
+    body = show.model_dump_json(by_alias=True).encode()
+    encoded = ('"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"', body)
+    show_json_cache.set(key, encoded, ttl=max(seconds_until_stale(show), 60), size=len(body))
+    return encoded
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def show_response(show: ShowModel, if_none_match: Optional[str] = None) -> Response:
+
+    etag, body = encode_show(show)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,103 @@
+import json
+import asyncio
+from itertools import groupby
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from models.show_model import ShowModel, SeasonFetch
+from crud.modeledQueries import show_summary, episode_page
+from services.refresh_service import RefreshProgress, episode_models
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+HEADER_EXCLUDE = {"metrics", "last_updated"}
+
+def encode_event(format: str, event: str, data: str) -> bytes:
+    if format == "sse":
+        return f"event: {event}\ndata: {data}\n\n".encode()
+    return ('{"event":"' + event + '","data":' + data + "}\n").encode()
+
+def header_json(show: ShowModel) -> str:
+    return show_summary(show).model_dump_json(by_alias=True, exclude=HEADER_EXCLUDE)
+
+def season_json(show_id: int, season: int, number_of_seasons: int, episodes: List) -> str:
+    return episode_page(show_id, season, number_of_seasons, episode_models(episodes)).model_dump_json()
+
+def remaining_events(show: ShowModel, sent: set) -> List[Tuple[str, str]]:
+
+    events = []
+    for season, episodes in groupby(show.episodes, key=lambda episode: episode.season_number):
+        if season not in sent:
+            events.append(("season", season_json(show.id, season, show.number_of_seasons, list(episodes))))
+    if show.metrics:
+        events.append(("metrics", show.metrics.model_dump_json()))
+    return events
+
+async def stored_events(show: ShowModel) -> AsyncIterator[Tuple[str, str]]:
+    yield "show", header_json(show)
+    for event in remaining_events(show, set()):
+        yield event
+
+class StreamProgress(RefreshProgress):
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def on_show(self, show: ShowModel):
+        self.queue.put_nowait(("show", show))
+
+    def on_season(self, fetch: SeasonFetch):
+        self.queue.put_nowait(("season", fetch))
+
+    def finished(self, task: asyncio.Future):
+        if not task.cancelled():
+            task.exception()
+        self.queue.put_nowait(("done", None))
+
+async def refresh_events(refresh: Callable[[RefreshProgress], Awaitable[ShowModel]]) -> AsyncIterator[Tuple[str, str]]:
+
+    # The refresh runs on its own task, so a client hanging up mid-stream does not stop it being saved
+    progress = StreamProgress()
+    task = asyncio.ensure_future(refresh(progress))
+    task.add_done_callback(progress.finished)
+
+    header = None
+    sent = set()
+    while True:
+        kind, item = await progress.queue.get()
+        if kind == "show":
+            header = item
+            yield "show", header_json(item)
+        elif kind == "season" and item.episodes is not None:
+            sent.add(item.season_number)
+            yield "season", season_json(header.id, item.season_number, header.number_of_seasons, item.episodes)
+        elif kind == "done":
+            break
+
+    # A refresh already in flight elsewhere reports nothing here, so whatever was missed comes from the result
+    show = task.result()
+    if header is None:
+        yield "show", header_json(show)
+    for event in remaining_events(show, sent):
+        yield event
+
+async def stream_response(events: AsyncIterator[Tuple[str, str]], format: str) -> StreamingResponse:
+
+    # Failures before the first event still get a real status code
+    first = await anext(events)
+
+    async def body():
+        yield encode_event(format, *first)
+        try:
+            async for event, data in events:
+                yield encode_event(format, event, data)
+        except HTTPException as e:
+            yield encode_event(format, "error", json.dumps({"status_code": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            yield encode_event(format, "error", json.dumps({"status_code": 500, "detail": f"Unexpected Error: {str(e)}"}))
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[format], headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,92 @@
+import os
+import re
+import httpx
+import unicodedata
+
+from models.show_model import SearchResult, SearchPage
+from services.tmdb_service import tmdb_search_shows
+from core.cache import TTLCache
+from core.shared_cache import TieredCache
+from core.singleflight import SingleFlight
+from core.instrumentation import SUGGESTION_LOOKUPS
+from typing import List, Optional, Tuple
+
+MIN_QUERY_LENGTH = 2
+
+# Search results are never invalidated, only aged out, so the local copy keeps its full TTL
+suggestion_cache = TieredCache(
+    TTLCache(
+        "suggestions",
+        ttl=float(os.getenv("SUGGESTION_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "10000"))
+    ),
+    encode=lambda page: page.model_dump_json().encode(),
+    decode=SearchPage.model_validate_json,
+    max_local_ttl=None
+)
+suggestion_flight = SingleFlight("suggestions")
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+def is_complete(page: SearchPage) -> bool:
+    return page.total_results <= len(page.results)
+
+def fold(text: str) -> str:
+
+    # TMDB ignores case and accents, so "Shō" finds "Shogun"
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def query_words(text: str) -> List[str]:
+    return re.findall(r"\w+", fold(text))
+
+def matches(words: List[str], result: SearchResult) -> bool:
+
+    # TMDB matches every query word against the start of some word of the name or the original name
+    for name in (result.title, result.original_title):
+        if name:
+            name_words = query_words(name)
+            if all(any(name_word.startswith(word) for name_word in name_words) for word in words):
+                return True
+    return False
+
+def from_cached_prefix(query: str) -> Optional[Tuple[SearchPage, float]]:
+
+    # Only a complete result set for a shorter prefix can answer a longer query,
+    # since every match for "brea" was already a match for "bre"
+    words = query_words(query)
+    for end in range(len(query) - 1, MIN_QUERY_LENGTH - 1, -1):
+        prefix = query[:end]
+        page = suggestion_cache.peek(prefix)
+        ttl = suggestion_cache.remaining(prefix)
+        if page is None or ttl is None or not is_complete(page) or not page.results:
+            continue
+
+        # TMDB also matches alternative titles that results do not carry, so dropping a result is never provably
+        # right; the prefix answers only when every one of its results still matches the longer query
+        if all(matches(words, result) for result in page.results):
+            return SearchPage(results=page.results, total_results=len(page.results)), ttl
+
+    return None
+
+async def get_cached_suggestions(query: str, client: httpx.AsyncClient = None) -> List[SearchResult]:
+
+    key = normalize_query(query)
+
+    page, version = await suggestion_cache.lookup(key)
+    if page is not None:
+        SUGGESTION_LOOKUPS.labels("cache").inc()
+        return page.results
+
+    # A page derived from a cached prefix expires with it rather than getting a fresh TTL
+    derived = from_cached_prefix(key)
+    if derived is not None:
+        SUGGESTION_LOOKUPS.labels("prefix").inc()
+        page, ttl = derived
+    else:
+        SUGGESTION_LOOKUPS.labels("upstream").inc()
+        page, ttl = await suggestion_flight.do(key, lambda: tmdb_search_shows(key, client)), None
+
+    await suggestion_cache.set(key, page, ttl=ttl, version=version)
+    return page.results
@@ -1,63 +1,268 @@
 import httpx
 import os
 import asyncio
+import hashlib
+import random
+import time
 
-from models.show_model import SearchResult, ShowModel, Episode, ShowMetrics
-from fastapi import HTTPException
-from typing import List
+from models.show_model import SearchResult, SearchPage, ShowModel, Episode, EpisodeRecord, ShowMetrics, SeasonFingerprint, SeasonFetch
+from core.ratelimit import TokenBucket
+from core.instrumentation import TMDB_RETRIES, TMDB_REQUEST_SECONDS, TMDB_RESPONSES, TMDB_HEDGES
+from core.circuit_breaker import CircuitBreaker, CLOSED
+from core.tracing import span
+from fastapi import HTTPException, Request
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Iterable
 
 TMDB_READ_TOKEN = os.getenv("TMDB_READ_TOKEN")
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
 
-async def tmdb_get_shows(query: str, client: httpx.AsyncClient = None) -> List[SearchResult]:
-    
-    url = "https://api.themoviedb.org/3/search/tv"
+TMDB_HTTP2 = os.getenv("TMDB_HTTP2", "true").lower() == "true"
+TMDB_MAX_CONNECTIONS = int(os.getenv("TMDB_MAX_CONNECTIONS", "100"))
+TMDB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TMDB_MAX_KEEPALIVE_CONNECTIONS", "20"))
+TMDB_KEEPALIVE_EXPIRY = float(os.getenv("TMDB_KEEPALIVE_EXPIRY", "60"))
+TMDB_TIMEOUT = float(os.getenv("TMDB_TIMEOUT", "10"))
+TMDB_SEASON_CONCURRENCY = int(os.getenv("TMDB_SEASON_CONCURRENCY", "8"))
+
+TMDB_RETRY_STATUSES = {429, 500, 502, 503, 504}
+TMDB_RETRY_BACKOFF = float(os.getenv("TMDB_RETRY_BACKOFF", "0.5"))
+TMDB_RETRY_MAX_BACKOFF = float(os.getenv("TMDB_RETRY_MAX_BACKOFF", "30"))
+
+# Used by the app's shared client, where a caller is waiting on the answer
+TMDB_MAX_RETRIES = int(os.getenv("TMDB_MAX_RETRIES", "2"))
+TMDB_REQUEST_MAX_BACKOFF = float(os.getenv("TMDB_REQUEST_MAX_BACKOFF", "2"))
+
+TMDB_TIMEOUTS = {
+    "search": float(os.getenv("TMDB_SEARCH_TIMEOUT", "3")),
+    "details": float(os.getenv("TMDB_DETAILS_TIMEOUT", "5")),
+    "season": float(os.getenv("TMDB_SEASON_TIMEOUT", "5"))
+}
+TMDB_SEASON_HEDGE_DELAY = float(os.getenv("TMDB_SEASON_HEDGE_DELAY", "0"))
+
+tmdb_breaker = CircuitBreaker(
+    "tmdb",
+    failure_threshold=int(os.getenv("TMDB_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("TMDB_BREAKER_RESET", "30"))
+)
+
+class TMDBUnavailable(Exception):
+    pass
+
+def tmdb_healthy() -> bool:
+    return tmdb_breaker.state == CLOSED
+
+class RetryingTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: Optional[TokenBucket] = None, max_retries: int = 3,
+                 backoff: float = TMDB_RETRY_BACKOFF, max_backoff: float = TMDB_RETRY_MAX_BACKOFF):
+        self.transport = transport
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+
+        # Full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire()
+
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                TMDB_RETRIES.labels("transport").inc()
+                await asyncio.sleep(self.retry_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in TMDB_RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+
+            await response.aclose()
+            TMDB_RETRIES.labels(str(response.status_code)).inc()
+            await asyncio.sleep(self.retry_delay(attempt, response))
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def create_tmdb_client(limiter: Optional[TokenBucket] = None, max_retries: int = 0, max_backoff: float = TMDB_RETRY_MAX_BACKOFF) -> httpx.AsyncClient:
+
+    limits = httpx.Limits(
+        max_connections=TMDB_MAX_CONNECTIONS,
+        max_keepalive_connections=TMDB_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=TMDB_KEEPALIVE_EXPIRY
+    )
+
+    if limiter is None and not max_retries:
+        return httpx.AsyncClient(http2=TMDB_HTTP2, limits=limits, timeout=TMDB_TIMEOUT)
+
+    transport = RetryingTransport(httpx.AsyncHTTPTransport(http2=TMDB_HTTP2, limits=limits), limiter, max_retries, max_backoff=max_backoff)
+    return httpx.AsyncClient(transport=transport, timeout=TMDB_TIMEOUT)
+
+async def gather_bounded(tasks: Iterable[Awaitable[Any]], limit: int = TMDB_SEASON_CONCURRENCY) -> List[Any]:
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(task):
+        try:
+            async with semaphore:
+                return await task
+        finally:
+            # A coroutine still waiting for a slot when the gather fails or is cancelled is closed, not left un-awaited
+            if asyncio.iscoroutine(task):
+                task.close()
+
+    runs = [asyncio.ensure_future(bounded(task)) for task in tasks]
+    try:
+        return list(await asyncio.gather(*runs))
+    except BaseException:
+        for run in runs:
+            run.cancel()
+        await asyncio.gather(*runs, return_exceptions=True)
+        raise
+
+def tmdb_error(e: Exception) -> HTTPException:
+
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=e.response.status_code, detail="TMDB API Error")
+    if isinstance(e, TMDBUnavailable):
+        return HTTPException(status_code=503, detail="TMDB API Unavailable")
+    if isinstance(e, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail="TMDB API Timeout")
+    return HTTPException(status_code=500, detail=f"Unexpected Error: {str(e)}")
+
+def get_tmdb_client(request: Request) -> Optional[httpx.AsyncClient]:
+    return getattr(request.app.state, "tmdb_client", None)
+
+async def tmdb_get(path: str, client: httpx.AsyncClient = None, params: Optional[Dict[str, Any]] = None, extra_headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+
+    url = f"{TMDB_BASE_URL}{path}"
     headers = {
         "Authorization": f"Bearer {TMDB_READ_TOKEN}",
-        "accept": "application/json"
+        "accept": "application/json",
+        **(extra_headers or {})
     }
-    
-    try:
-        res = None
+
+    endpoint = tmdb_endpoint(path)
+    if not tmdb_breaker.allow():
+        TMDB_RESPONSES.labels(endpoint, "circuit_open").inc()
+        raise TMDBUnavailable("TMDB circuit is open")
+
+    async def fetch():
         if client:
-            res = await client.get(url, headers=headers, params={"query": query})
-        else:
-            async with httpx.AsyncClient() as c:
-                res = await c.get(url, headers=headers, params={"query":query})
+            return await client.get(url, headers=headers, params=params, timeout=TMDB_TIMEOUTS[endpoint])
+        async with create_tmdb_client() as c:
+            return await c.get(url, headers=headers, params=params, timeout=TMDB_TIMEOUTS[endpoint])
+
+    status = "error"
+    start = time.perf_counter()
+    try:
+        with span("tmdb." + endpoint, path=path):
+            if endpoint == "season" and TMDB_SEASON_HEDGE_DELAY > 0:
+                res = await hedged(fetch, TMDB_SEASON_HEDGE_DELAY)
+            else:
+                res = await fetch()
+        status = str(res.status_code)
+    except httpx.TransportError:
+        tmdb_breaker.record_failure()
+        raise
+    except BaseException:
+        tmdb_breaker.release()
+        raise
+    finally:
+        TMDB_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+        TMDB_RESPONSES.labels(endpoint, status).inc()
+
+    # Rate limiting means TMDB is up and answering, so only server errors count against it
+    if res.status_code >= 500:
+        tmdb_breaker.record_failure()
+    else:
+        tmdb_breaker.record_success()
+    return res
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: float) -> Any:
 
+    # A second identical request goes out if the first is still running after the delay;
+    # whichever succeeds first is used and the other is cancelled
+    tasks = {asyncio.ensure_future(call())}
+    hedge = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            hedge = asyncio.ensure_future(call())
+            tasks.add(hedge)
+            TMDB_HEDGES.labels("sent").inc()
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            # Every finished attempt's error is retrieved before returning, so a failed loser is never logged as unhandled
+            finished = [(task, task.exception()) for task in done]
+            for task, exception in finished:
+                if exception is None:
+                    if task is hedge:
+                        TMDB_HEDGES.labels("won").inc()
+                    return task.result()
+                error = exception
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def tmdb_endpoint(path: str) -> str:
+    if path.startswith("/search/"):
+        return "search"
+    if "/season/" in path:
+        return "season"
+    return "details"
+
+async def tmdb_get_shows(query: str, client: httpx.AsyncClient = None) -> List[SearchResult]:
+
+    page = await tmdb_search_shows(query, client)
+    return page.results
+
+async def tmdb_search_shows(query: str, client: httpx.AsyncClient = None) -> SearchPage:
+    
+    try:
+        res = await tmdb_get("/search/tv", client, params={"query": query})
         res.raise_for_status()
 
         data = res.json()
         results = data.get("results", [])
-        return [
+        return SearchPage(
+            results = [
                 SearchResult(
                     tmdb_id=show["id"],
                     title=show["name"],
+                    original_title=show.get("original_name"),
                     poster_path=show.get("poster_path"),
                     release_date=show.get("first_air_date")
                 )
                 for show in results
-        ]      
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail="TMDB API Error")
+            ],
+            total_results = data.get("total_results", len(results))
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected Error: {str(e)}")
+        raise tmdb_error(e) from e
 
 async def tmdb_get_show_details(show_id: int, client: httpx.AsyncClient = None) -> ShowModel:
 
-    url = f"https://api.themoviedb.org/3/tv/{show_id}"
-    headers = {
-        "Authorization": f"Bearer {TMDB_READ_TOKEN}",
-        "accept": "application/json"
-    }
-
     try:
-        res = None
-        if client:
-            res = await client.get(url, headers=headers)
-        else:
-            async with httpx.AsyncClient() as c:
-                res = await c.get(url, headers=headers)
-
+        res = await tmdb_get(f"/tv/{show_id}", client)
         res.raise_for_status()
         data = res.json()
 
@@ -70,64 +275,106 @@ async def tmdb_get_show_details(show_id: int, client: httpx.AsyncClient = None)
             first_air_date = data["first_air_date"],
             genres = [item["name"] for item in data["genres"]],
             number_of_seasons = data["number_of_seasons"],
-            popularity = round(data["popularity"], 2)
+            popularity = round(data["popularity"], 2),
+            status = data.get("status"),
+            last_air_date = data.get("last_air_date")
         )
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail="TMDB API Error")
     except Exception as e:
-        raise HTTPException(status_code=500, details=f"Unexpected Error: {str(e)}")
+        raise tmdb_error(e) from e
 
 async def tmdb_get_episodes_single_season(show_id: int, season: int, client: httpx.AsyncClient = None) -> List[Episode]:
 
-    url = f"https://api.themoviedb.org/3/tv/{show_id}/season/{season}"
-    headers = {
-        "Authorization": f"Bearer {TMDB_READ_TOKEN}",
-        "accept": "application/json"
-    }
+    try:
+        res = await tmdb_get(f"/tv/{show_id}/season/{season}", client)
+        res.raise_for_status()
+
+        return [Episode(**record._asdict()) for record in parse_season_episodes(res.json(), season)]
+
+    except Exception as e:
+        raise tmdb_error(e) from e
+
+def parse_season_episodes(data: Dict[str, Any], season: int) -> List[EpisodeRecord]:
+
+    # Unaired and unrated episodes are dropped before anything is built for them
+    return [
+        EpisodeRecord(
+            item["id"],
+            season,
+            item["episode_number"],
+            item["name"],
+            item["vote_average"],
+            item.get("air_date"),
+            item["vote_count"]
+        )
+        for item in data.get("episodes", [])
+        if item["vote_average"] > 0 and item["vote_count"] > 0
+    ]
+
+async def tmdb_get_season_conditional(show_id: int, season: int, fingerprint: Optional[SeasonFingerprint] = None, client: httpx.AsyncClient = None) -> SeasonFetch:
+
+    headers = {}
+    if fingerprint and fingerprint.etag:
+        headers["If-None-Match"] = fingerprint.etag
+    if fingerprint and fingerprint.last_modified:
+        headers["If-Modified-Since"] = fingerprint.last_modified
 
     try:
-        res = None
-        if client:
-            res = await client.get(url, headers=headers)
-        else:
-            async with httpx.AsyncClient() as c:
-                res = await c.get(url, headers=headers)
-        
+        res = await tmdb_get(f"/tv/{show_id}/season/{season}", client, extra_headers=headers)
+        if res.status_code == 304 and fingerprint:
+            return SeasonFetch(season_number=season, fingerprint=fingerprint, not_modified=True, bytes_fetched=res.num_bytes_downloaded)
+
         res.raise_for_status()
-        data = res.json()
+        fetched = res.num_bytes_downloaded or len(res.content)
+
+        latest = SeasonFingerprint(
+            season_number = season,
+            etag = res.headers.get("etag"),
+            last_modified = res.headers.get("last-modified"),
+            content_hash = hashlib.sha256(res.content).hexdigest()
+        )
+
+        # Servers that ignore the validators still let an identical body skip parsing and validation
+        if fingerprint and fingerprint.content_hash == latest.content_hash:
+            return SeasonFetch(season_number=season, fingerprint=latest, bytes_fetched=fetched)
+
+        return SeasonFetch(
+            season_number = season,
+            fingerprint = latest,
+            episodes = parse_season_episodes(res.json(), season),
+            bytes_fetched = fetched
+        )
 
-        Episodes = [
-            Episode(
-                id=item["id"],
-                season_number=season,
-                episode_number=item["episode_number"],
-                title=item["name"],
-                rating=item["vote_average"],
-                air_date=item.get("air_date"),
-                vote_count=item["vote_count"]
-            )
-            for item in data.get("episodes", [])
-        ]
-
-        return [e for e in Episodes if e.rating > 0 and e.vote_count > 0] 
-
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail="TMDB API Error")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected Error: {str(e)}")
-        
+        raise tmdb_error(e) from e
+
+async def tmdb_get_seasons_conditional(show_id: int, number_of_seasons: int, fingerprints: Dict[int, SeasonFingerprint], client: httpx.AsyncClient = None,
+                                       on_fetch: Optional[Callable[[SeasonFetch], None]] = None) -> List[SeasonFetch]:
+
+    if client is None:
+        async with create_tmdb_client() as c:
+            return await tmdb_get_seasons_conditional(show_id, number_of_seasons, fingerprints, c, on_fetch)
+
+    async def fetch(season):
+        result = await tmdb_get_season_conditional(show_id, season, fingerprints.get(season), client)
+        if on_fetch:
+            on_fetch(result)
+        return result
 
-async def tmdb_get_episodes_all_seasons(show_id: int, number_of_seasons: int) -> List[Episode]:
+    # Results stay in season order whatever order they complete in
+    return await gather_bounded([fetch(i) for i in range(1, number_of_seasons + 1)])
 
-    async with httpx.AsyncClient() as client:
+async def tmdb_get_episodes_all_seasons(show_id: int, number_of_seasons: int, client: httpx.AsyncClient = None) -> List[Episode]:
 
-        tasks = [
-            tmdb_get_episodes_single_season(show_id, i, client)
-            for i in range(1, number_of_seasons + 1)
-        ]
+    if client is None:
+        async with create_tmdb_client() as c:
+            return await tmdb_get_episodes_all_seasons(show_id, number_of_seasons, c)
 
-        all_seasons = await asyncio.gather(*tasks)
+    tasks = [
+        tmdb_get_episodes_single_season(show_id, i, client)
+        for i in range(1, number_of_seasons + 1)
+    ]
 
+    all_seasons = await gather_bounded(tasks)
 
-        return [episode for season in all_seasons for episode in season]
+    return [episode for season in all_seasons for episode in season]
 
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+from crud import modeledQueries
+from api.routes import shows
+
+async def test_cleanup_deletes_only_expired_shows_in_batches(mock_db):
+
+    now = datetime.now(timezone.utc)
+    expired = [{"_id": i, "title": f"Old {i}", "last_updated": now - timedelta(days=31 + i % 5)} for i in range(25)]
+    current = [{"_id": 100 + i, "title": f"New {i}", "last_updated": now - timedelta(days=i % 29)} for i in range(10)]
+    await mock_db["shows"].insert_many(expired + current)
+
+    deleted = await shows.cleanup(batch_size=10)
+
+    assert deleted == 25
+    remaining = sorted(doc["_id"] for doc in await mock_db["shows"].find({}, {"_id": 1}).to_list(length=None))
+    assert remaining == [100 + i for i in range(10)]
+
+async def test_cleanup_skips_show_refreshed_after_lookup(mock_db, monkeypatch):
+
+    now = datetime.now(timezone.utc)
+    await mock_db["shows"].insert_many([{"_id": i, "last_updated": now - timedelta(days=40)} for i in range(3)])
+
+    lookup = modeledQueries.db_get_expired_show_ids
+
+    async def refreshed_during_cleanup(updated_before, limit):
+        ids = await lookup(updated_before, limit)
+        await mock_db["shows"].update_one({"_id": 1}, {"$set": {"last_updated": now}})
+        return ids
+
+    monkeypatch.setattr(shows, "db_get_expired_show_ids", refreshed_during_cleanup)
+
+    assert await shows.cleanup(batch_size=10) == 2
+    assert await mock_db["shows"].find_one({"_id": 1}) is not None
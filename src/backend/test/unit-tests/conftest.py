@@ -0,0 +1,20 @@
+import pytest
+from bench.mongomock_db import use_mock_database
+from crud import modeledQueries
+from services import response_service
+
+@pytest.fixture
+def fresh_db(monkeypatch):
+
+    def create():
+        database = use_mock_database("bingelogic_test", patch=monkeypatch.setattr)
+        modeledQueries.show_cache.clear()
+        response_service.show_json_cache.clear()
+        return database
+
+    yield create
+    modeledQueries.show_cache.clear()
+
+@pytest.fixture
+def mock_db(fresh_db):
+    return fresh_db()
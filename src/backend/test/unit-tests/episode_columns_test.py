@@ -0,0 +1,68 @@
+import random
+import bson
+import numpy as np
+import pytest
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_by_id, db_get_episode_page, db_save_show_changes, show_document
+from core import episode_columns
+from core.episode_columns import encode_episode_columns, decode_episode_columns, episode_arrays
+from core.metrics import EpisodeBatch, getShowMetrics, getShowMetricsForDocuments
+from models.show_model import ShowModel, Episode
+
+@pytest.fixture
+def storage(monkeypatch):
+    def use(layout):
+        monkeypatch.setattr(episode_columns, "EPISODE_STORAGE", layout)
+        modeledQueries.show_cache.clear()
+    return use
+
+def make_episodes(count, seed=1):
+    rng = random.Random(seed)
+    return [Episode(id=1000 + i, season_number=1 + i // 8, episode_number=i % 8 + 1, title=f"Episode {i}",
+                    rating=round(rng.uniform(5, 9.5), 3), air_date=None if i % 5 == 0 else "2020-02-02",
+                    vote_count=rng.randint(1, 900)) for i in range(count)]
+
+def test_columns_round_trip_through_bson_and_score_without_copies():
+
+    episodes = make_episodes(40)
+    columns = bson.decode(bson.encode({"c": encode_episode_columns(episodes)}))["c"]
+
+    assert [episode.model_dump() for episode in decode_episode_columns(columns)] == [episode.model_dump() for episode in episodes]
+
+    arrays = episode_arrays(columns)
+    batch = EpisodeBatch.fromArrays([arrays])
+    assert np.shares_memory(batch.ratings, arrays["rating"]) and np.shares_memory(batch.ids, arrays["id"])
+    assert getShowMetricsForDocuments([columns, [], [episode.model_dump() for episode in episodes]]) == \
+           [getShowMetrics(episodes).model_dump(), None, getShowMetrics(episodes).model_dump()]
+
+async def test_columnar_documents_read_back_as_the_same_show(mock_db, storage):
+
+    storage("columnar")
+    show = ShowModel(id=3, title="Columns", number_of_seasons=5, episodes=make_episodes(40))
+    await db_upsert_show(show)
+
+    stored = await mock_db["shows"].find_one({"_id": 3})
+    assert "episodes" not in stored and stored["episode_columns"]["count"] == 40
+
+    loaded = await db_get_show_by_id(3)
+    assert loaded.model_dump() == show.model_dump(exclude={"last_updated"}) | {"last_updated": loaded.last_updated}
+
+    modeledQueries.show_cache.clear()
+    page = await db_get_episode_page(3, 2)
+    assert page.episodes == [episode for episode in show.episodes if episode.season_number == 2]
+
+async def test_switching_layout_rewrites_the_whole_document(mock_db, storage):
+
+    storage("documents")
+    show = ShowModel(id=4, title="Switch", number_of_seasons=5, episodes=make_episodes(40))
+    await db_upsert_show(show)
+    previous = await db_get_show_by_id(4)
+
+    storage("columnar")
+    await db_save_show_changes(previous, show.model_copy(update={"title": "Switched"}))
+
+    stored = await mock_db["shows"].find_one({"_id": 4})
+    assert "episodes" not in stored and stored["title"] == "Switched"
+    assert (await db_get_show_by_id(4)).episodes == show.episodes
+
+    assert len(bson.encode(show_document(show))) < len(bson.encode(ShowModel.model_dump(show, by_alias=True)))
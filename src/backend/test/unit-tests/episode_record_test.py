@@ -0,0 +1,44 @@
+import random
+from core.metrics import getShowMetrics
+from core.metrics_summary import updateShowMetrics
+from models.show_model import ShowModel, Episode, EpisodeRecord
+from services.refresh_service import episode_models
+from services.tmdb_service import parse_season_episodes
+
+def season_data(count, seed=3):
+    rng = random.Random(seed)
+    return {"episodes": [
+        {"id": 500 + n, "episode_number": n, "name": f"E{n}", "air_date": "2021-05-05",
+         "vote_average": 0 if n % 4 == 0 else round(rng.uniform(5, 9.5), 3),
+         "vote_count": 0 if n % 7 == 0 else rng.randint(1, 400)}
+        for n in range(1, count + 1)
+    ]}
+
+def test_parse_filters_unrated_episodes_before_building_records():
+
+    records = parse_season_episodes(season_data(30), 2)
+
+    assert records and all(type(record) is EpisodeRecord for record in records)
+    assert all(record.rating > 0 and record.vote_count > 0 for record in records)
+    assert [record.episode_number for record in records] == [n for n in range(1, 31) if n % 4 and n % 7]
+    assert all(record.season_number == 2 for record in records)
+
+def test_records_score_like_models():
+
+    records = parse_season_episodes(season_data(40), 1)
+    models = episode_models(records)
+
+    assert all(isinstance(episode, Episode) for episode in models)
+    assert [episode.model_dump() for episode in models] == [record._asdict() for record in records]
+    assert getShowMetrics(records) == getShowMetrics(models)
+
+def test_incremental_update_accepts_records_against_stored_models():
+
+    first = parse_season_episodes(season_data(20, seed=1), 1)
+    _, summary = updateShowMetrics(None, first)
+    previous = ShowModel(id=1, title="Show", number_of_seasons=1, episodes=episode_models(first), metrics_summary=summary)
+
+    second = parse_season_episodes(season_data(20, seed=2), 1)
+    metrics, _ = updateShowMetrics(previous, second, {1})
+
+    assert metrics == getShowMetrics(episode_models(second))
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+import pytest
+from prometheus_client import REGISTRY
+from core import executor
+from core.executor import run_cpu_bound
+from core.loop_monitor import monitor_event_loop_lag
+from core.metrics import getShowMetrics
+from core.metrics_summary import updateShowMetrics
+from models.show_model import Episode, ShowModel
+from services import refresh_service
+
+@pytest.fixture
+def metrics_executor(monkeypatch):
+
+    def configure(kind, threshold=10):
+        executor.shutdown_executor()
+        monkeypatch.setattr(executor, "METRICS_EXECUTOR", kind)
+        monkeypatch.setattr(executor, "METRICS_INLINE_THRESHOLD", threshold)
+
+    yield configure
+    executor.shutdown_executor()
+
+def episodes(count):
+    return [Episode(id=i, season_number=1 + i // 20, episode_number=i % 20 + 1, title=f"E{i}",
+                    rating=round(6 + (i * 37 % 35) / 10, 1), vote_count=10 + i % 90) for i in range(count)]
+
+async def test_small_jobs_stay_inline_and_large_jobs_leave_the_loop(metrics_executor):
+
+    metrics_executor("thread")
+    caller = threading.get_ident()
+
+    assert await run_cpu_bound(threading.get_ident, size=5) == caller
+    assert await run_cpu_bound(threading.get_ident, size=50) != caller
+
+    metrics_executor("inline")
+    assert await run_cpu_bound(threading.get_ident, size=5000) == caller
+
+async def test_process_executor_matches_inline_metrics(metrics_executor):
+
+    metrics_executor("process")
+    show = episodes(400)
+
+    offloaded = await run_cpu_bound(updateShowMetrics, None, show, None, size=len(show))
+    assert offloaded == updateShowMetrics(None, show)
+    assert executor.get_executor()._mp_context.get_start_method() == "spawn"
+
+async def test_loop_lag_gauge_reports_blocking():
+
+    monitor = asyncio.create_task(monitor_event_loop_lag(0.01))
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    monitor.cancel()
+
+    assert REGISTRY.get_sample_value("bingelogic_event_loop_lag_distribution_seconds_bucket", {"le": "0.05"}) < \
+           REGISTRY.get_sample_value("bingelogic_event_loop_lag_distribution_seconds_count")
+
+async def test_refreshes_send_only_the_summary_and_changed_seasons_to_the_executor(monkeypatch):
+
+    sent = []
+
+    async def record(fn, *args, size=0):
+        sent.append((fn.__name__, size, args))
+        return fn(*args)
+
+    monkeypatch.setattr(refresh_service, "run_cpu_bound", record)
+    stored = episodes(400)
+    metrics, summary = updateShowMetrics(None, stored)
+    previous = ShowModel(id=1, title="Show", number_of_seasons=20, episodes=stored, metrics=metrics, metrics_summary=summary)
+    current = stored + [Episode(id=400, season_number=21, episode_number=1, title="E400", rating=7.5, vote_count=40)]
+
+    scored, _ = await refresh_service.score_show(previous, current, {21})
+
+    assert [(name, size) for name, size, _ in sent] == [("applySeasonUpdates", 1)]
+    assert not any(isinstance(arg, ShowModel) for arg in sent[0][2])
+    assert scored == getShowMetrics(current)
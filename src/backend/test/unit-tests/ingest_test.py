@@ -0,0 +1,154 @@
+import asyncio
+import gc
+import warnings
+import json
+import time
+import httpx
+import pytest
+from crud import modeledQueries
+from core.ratelimit import TokenBucket
+from models.show_model import ShowModel
+from services import ingest_service, tmdb_service
+from services.tmdb_service import RetryingTransport, gather_bounded
+from services.ingest_service import ingest_shows
+
+def tmdb_handler(show_ids_failing=(), throttle_every=0, show_ids_empty=()):
+
+    calls = {"requests": 0}
+
+    def handler(request):
+        calls["requests"] += 1
+        if throttle_every and calls["requests"] % throttle_every == 0:
+            return httpx.Response(429, headers={"retry-after": "0"})
+
+        parts = request.url.path.split("/tv/")[1].split("/")
+        show_id = int(parts[0])
+        if show_id in show_ids_failing:
+            return httpx.Response(404)
+
+        if len(parts) == 1:
+            return httpx.Response(200, json={"id": show_id, "name": f"Show {show_id}", "overview": "", "poster_path": None,
+                                             "backdrop_path": None, "first_air_date": "2020-01-01", "genres": [],
+                                             "number_of_seasons": 2, "popularity": 1.0})
+
+        season = int(parts[2])
+        rating = 0.0 if show_id in show_ids_empty else 7.0
+        return httpx.Response(200, content=json.dumps({"episodes": [
+            {"id": show_id * 100 + season * 10 + n, "episode_number": n, "name": f"E{n}", "vote_average": rating and rating + n / 10, "vote_count": 20}
+            for n in range(1, 4)
+        ]}).encode())
+
+    return handler, calls
+
+def retrying_client(handler, max_retries=3):
+    transport = RetryingTransport(httpx.MockTransport(handler), max_retries=max_retries, backoff=0.001)
+    return httpx.AsyncClient(transport=transport)
+
+async def test_token_bucket_paces_requests():
+
+    bucket = TokenBucket(rate=100, capacity=5)
+    start = time.monotonic()
+    await asyncio.gather(*[bucket.acquire() for _ in range(25)])
+
+    assert time.monotonic() - start >= 0.19
+
+async def test_transport_retries_rate_limits_and_gives_up():
+
+    handler, calls = tmdb_handler(throttle_every=2)
+    async with retrying_client(handler) as client:
+        res = await client.get("https://tmdb.test/3/tv/5")
+    assert res.status_code == 200 and calls["requests"] == 1
+
+    attempts = []
+    async with retrying_client(lambda request: attempts.append(1) or httpx.Response(503), max_retries=2) as client:
+        res = await client.get("https://tmdb.test/3/tv/5")
+    assert res.status_code == 503 and len(attempts) == 3
+
+async def test_gather_bounded_limits_concurrency():
+
+    running = {"now": 0, "peak": 0}
+
+    async def task(i):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.001)
+        running["now"] -= 1
+        return i
+
+    assert await gather_bounded([task(i) for i in range(20)], limit=3) == list(range(20))
+    assert running["peak"] == 3
+
+async def test_failed_gather_closes_the_coroutines_it_never_started():
+
+    started = []
+
+    async def task(i):
+        started.append(i)
+        await asyncio.sleep(0.001)
+        if i == 0:
+            raise RuntimeError("boom")
+        return i
+
+    coroutines = [task(i) for i in range(10)]
+    with pytest.raises(RuntimeError):
+        await gather_bounded(coroutines, limit=2)
+
+    assert len(started) < 10
+    assert all(coroutine.cr_frame is None for coroutine in coroutines)
+
+async def test_shows_without_rated_episodes_fail_alone(mock_db, monkeypatch):
+
+    monkeypatch.setattr(tmdb_service, "TMDB_BASE_URL", "https://tmdb.test/3")
+    handler, _ = tmdb_handler(show_ids_empty={3})
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        async with retrying_client(handler) as client:
+            report = await ingest_shows(list(range(1, 7)), client, workers=3, batch_size=4)
+        gc.collect()
+
+    assert report.ingested == 5 and report.failed == [3]
+    assert await mock_db["shows"].count_documents({}) == 5
+    assert not [warning for warning in caught if "never awaited" in str(warning.message)]
+
+async def test_ingest_writes_in_batches_and_reports_failures(mock_db, monkeypatch):
+
+    monkeypatch.setattr(tmdb_service, "TMDB_BASE_URL", "https://tmdb.test/3")
+    handler, calls = tmdb_handler(show_ids_failing={7}, throttle_every=5)
+
+    async with retrying_client(handler) as client:
+        report = await ingest_shows(list(range(1, 11)) + [3], client, workers=4, batch_size=4)
+
+    assert report.requested == 10
+    assert report.ingested == 9 and report.failed == [7]
+    assert report.batches == 3 and mock_db.bulk_writes == [4, 4, 1]
+    assert await mock_db["shows"].count_documents({}) == 9
+
+    stored = await modeledQueries.db_get_show_by_id(4)
+    assert len(stored.episodes) == 6 and stored.metrics is not None
+
+    async with retrying_client(handler) as client:
+        again = await ingest_shows([4], client)
+    assert again.skipped == 1 and again.ingested == 0
+
+async def test_slow_token_bucket_still_grants_a_token():
+
+    bucket = TokenBucket(rate=0.5)
+    await asyncio.wait_for(bucket.acquire(), timeout=1)
+
+async def test_unexpected_worker_error_flushes_and_stops_the_writer(mock_db, monkeypatch):
+
+    async def build(show_id, previous, client):
+        if show_id == 5:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("boom")
+        return ShowModel(id=show_id, title=f"Show {show_id}", number_of_seasons=1)
+
+    monkeypatch.setattr(ingest_service, "build_show", build)
+    before = asyncio.all_tasks()
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(ingest_shows(list(range(1, 6)), None, workers=2, batch_size=10), timeout=2)
+
+    assert await mock_db["shows"].count_documents({}) == 4
+    assert asyncio.all_tasks() <= before
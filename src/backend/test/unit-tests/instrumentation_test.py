@@ -0,0 +1,106 @@
+import os
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from prometheus_client import REGISTRY
+from api.routes import shows
+from core import profiling
+from core.profiling import install_request_profiler
+from services.tmdb_service import tmdb_get
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def tmdb_handler(request):
+    path = request.url.path
+    if "/season/" in path:
+        season = int(path.rsplit("/", 1)[1])
+        return httpx.Response(200, json={"episodes": [
+            {"id": season * 100 + n, "episode_number": n, "name": f"E{n}", "vote_average": 7.5, "vote_count": 30}
+            for n in range(1, 5)
+        ]})
+    if path.endswith("/tv/404"):
+        return httpx.Response(404, json={})
+    return httpx.Response(200, json={
+        "id": 12, "name": "Staged", "overview": "", "poster_path": None, "backdrop_path": None,
+        "first_air_date": "2020-01-01", "genres": [], "number_of_seasons": 3, "popularity": 1.0
+    })
+
+async def test_refresh_stages_and_tmdb_calls_are_observed(mock_db):
+
+    stages = ["db_read", "tmdb_details", "tmdb_seasons", "merge", "metrics", "validate", "db_write"]
+    before = {stage: sample("bingelogic_refresh_stage_seconds_count", stage=stage, seasons="2-5") for stage in stages}
+    seasons_before = sample("bingelogic_tmdb_responses_total", endpoint="season", status="200")
+    details_before = sample("bingelogic_tmdb_request_seconds_count", endpoint="details")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(tmdb_handler)) as client:
+        await shows.full_refresh(12, client)
+
+    for stage in stages:
+        assert sample("bingelogic_refresh_stage_seconds_count", stage=stage, seasons="2-5") == before[stage] + 1
+    assert sample("bingelogic_tmdb_responses_total", endpoint="season", status="200") == seasons_before + 3
+    assert sample("bingelogic_tmdb_request_seconds_count", endpoint="details") == details_before + 1
+
+async def test_upstream_errors_are_counted_by_status():
+
+    not_found = sample("bingelogic_tmdb_responses_total", endpoint="details", status="404")
+    errors = sample("bingelogic_tmdb_responses_total", endpoint="search", status="error")
+
+    def broken(request):
+        raise httpx.ConnectError("refused")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(tmdb_handler)) as client:
+        await tmdb_get("/tv/404", client)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(broken)) as client:
+        with pytest.raises(httpx.ConnectError):
+            await tmdb_get("/search/tv", client)
+
+    assert sample("bingelogic_tmdb_responses_total", endpoint="details", status="404") == not_found + 1
+    assert sample("bingelogic_tmdb_responses_total", endpoint="search", status="error") == errors + 1
+
+async def test_request_profiler_is_off_by_default_and_writes_folded_stacks(monkeypatch, tmp_path):
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow_handler():
+        time.sleep(0.05)
+        return {}
+
+    install_request_profiler(app, rate=0)
+    assert app.user_middleware == []
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    install_request_profiler(app, rate=1)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/slow")).status_code == 200
+
+    [profile] = os.listdir(tmp_path)
+    assert profile.endswith(".folded") and "slow" in profile
+    assert "slow_handler" in (tmp_path / profile).read_text()
+
+async def test_request_profiler_samples_streamed_bodies_until_they_finish(monkeypatch, tmp_path):
+
+    app = FastAPI()
+
+    async def render_chunks():
+        for _ in range(5):
+            time.sleep(0.01)
+            yield b"chunk"
+
+    @app.get("/stream")
+    async def stream_handler():
+        return StreamingResponse(render_chunks())
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    install_request_profiler(app, rate=1)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/stream")).content == b"chunk" * 5
+
+    [profile] = os.listdir(tmp_path)
+    assert int(profile.rsplit("-", 1)[1].removesuffix("ms.folded")) >= 50
+    assert "render_chunks" in (tmp_path / profile).read_text()
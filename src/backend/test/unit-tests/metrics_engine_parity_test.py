@@ -0,0 +1,207 @@
+import random
+import statistics
+import numpy as np
+from core.metrics import getShowMetrics, getShowMetricsForShows
+from models.show_model import ShowMetrics, Episode
+
+# A frozen copy of the original scalar implementation, polyfit momentum included, so the engine
+# is always checked against the behaviour it replaced rather than against the module's own helpers
+
+def reference_stinker_score(ratings):
+    stdev = statistics.stdev(ratings) if len(ratings) > 1 else 0
+    return round(max(6.0, statistics.median(ratings) - (2 * stdev)), 2)
+
+def reference_highlight_score(ratings):
+    stdev = statistics.stdev(ratings) if len(ratings) > 1 else 0
+    return round(min(8.5, statistics.median(ratings) + (2 * stdev)), 2)
+
+def reference_land_the_plane(ratings):
+
+    if len(ratings) < 5:
+        return round(sum(ratings)/len(ratings) * 10, 2)
+
+    series_avg = statistics.mean(ratings)
+    landing_avg = statistics.mean(ratings[-max(2, int(len(ratings) * 0.1)):])
+    delta = landing_avg - series_avg
+
+    if delta < 0:
+        modifier = delta * 10 if abs(delta) < 0.5 else delta * 30
+        if landing_avg < 6.5:
+            modifier -= 20
+    else:
+        modifier = min(10, delta * 10)
+
+    return round(max(0.0, min(100.0, series_avg * 10 + modifier)), 2)
+
+def reference_momentum(ratings):
+
+    if len(ratings) < 5:
+        return 0.0
+
+    slope, _ = np.polyfit(np.arange(len(ratings)), np.array(ratings), 1)
+    return round(max(0, min(100, 50 + (slope * (100 + (len(ratings) * 5))))), 2)
+
+def reference_consistency(ratings):
+
+    if len(ratings) < 2:
+        return 100.0
+    return round(max(0.0, min(100.0, 100 * (1 - (statistics.stdev(ratings) / 2.0)))), 2)
+
+def reference_retention(vote_counts):
+
+    if vote_counts[0] == 0:
+        return 0.0
+    return round(min(vote_counts[-1] / vote_counts[0] * 100, 100.0), 2)
+
+def reference_binge_index(episodes):
+
+    if len(episodes) < 3:
+        return 50.0
+
+    series_avg_rating = statistics.mean([episode.rating for episode in episodes])
+    series_avg_vote_count = statistics.mean([episode.vote_count for episode in episodes])
+
+    season_map = {}
+    for episode in episodes:
+        if episode.season_number not in season_map or episode.episode_number > season_map[episode.season_number].episode_number:
+            season_map[episode.season_number] = episode
+
+    finales = list(season_map.values())
+    rating_ratio = statistics.mean([episode.rating for episode in finales]) / series_avg_rating
+    vote_ratio = (statistics.mean([episode.vote_count for episode in finales]) + 50) / (series_avg_vote_count + 50)
+
+    if vote_ratio < 0.25 or series_avg_vote_count < 10:
+        return 50.0
+
+    raw_index = (0.7 * rating_ratio) + (0.3 * np.log10(vote_ratio + 9))
+    return round(max(0.0, min(100.0, ((raw_index - 0.85) / (1.10 - 0.85)) * 100)), 2)
+
+def reference_watchability(average_rating, binge_index, rating_consistency, momentum_score, retention_rate,
+                           land_the_plane_score, episode_count, stinker_count, highlight_count, highlight_rating):
+
+    is_serialized = binge_index >= 50
+    prestige_factor = min(1.0, max(0.0, (average_rating - 7.5) / 1.0))
+    f_weight = 0.25 + (0.50 * prestige_factor)
+    p_weight = 1.0 - f_weight
+
+    foundation = (average_rating * 10) * f_weight
+    effective_momentum = momentum_score
+    if average_rating >= 8.0 and rating_consistency >= 80:
+        effective_momentum = max(momentum_score, rating_consistency)
+
+    if is_serialized:
+        performance = (land_the_plane_score * 0.70 + effective_momentum * 0.30) * p_weight
+    else:
+        performance = (land_the_plane_score * 0.30 + effective_momentum * 0.70) * p_weight
+
+    highlight_bonus = (highlight_count / episode_count * max(0, highlight_rating - average_rating) * 15)
+    altitude_bonus = max(0, (average_rating - 7.7) * 10) * np.log10(episode_count + 5)
+    retention_bonus = max(0, (retention_rate - 50) / 12)
+
+    trajectory_penalty = 0
+    if is_serialized and land_the_plane_score < (average_rating * 10) - 12:
+        trajectory_penalty = np.sqrt((average_rating * 10) - land_the_plane_score) * 0.85
+
+    tax_multiplier = max(0.4, 1.0 - (average_rating - 7.5)) if average_rating > 7.5 else 1.0
+    consistency_tax = ((100 - rating_consistency) * 0.12) * tax_multiplier
+
+    stinker_penalty = (stinker_count / episode_count * 25)
+    if average_rating >= 8.0: stinker_penalty *= 0.75
+
+    final_score = (foundation + performance + altitude_bonus + highlight_bonus + retention_bonus -
+                   trajectory_penalty - consistency_tax - stinker_penalty)
+
+    if is_serialized and land_the_plane_score < 55:
+        final_score = min(final_score, 79.0)
+
+    return round(max(0.0, min(100.0, final_score)), 2)
+
+def reference_metrics(episodes):
+
+    ratings = [episode.rating for episode in episodes]
+    vote_counts = [episode.vote_count for episode in episodes]
+
+    average_rating = statistics.mean(ratings)
+
+    stinker_score = reference_stinker_score(ratings)
+    stinker_episodes = [episode.id for episode in episodes if episode.rating <= stinker_score]
+    stinker_average = statistics.mean([episode.rating for episode in episodes if episode.rating <= stinker_score]) if stinker_episodes else 0.0
+
+    highlight_score = reference_highlight_score(ratings)
+    highlight_episodes = [episode.id for episode in episodes if episode.rating >= highlight_score]
+    highlight_average = statistics.mean([episode.rating for episode in episodes if episode.rating >= highlight_score]) if highlight_episodes else 0.0
+
+    land_the_plane_score = reference_land_the_plane(ratings)
+    momentum_score = reference_momentum(ratings)
+    rating_consistency = reference_consistency(ratings)
+    retention_rate = reference_retention(vote_counts)
+    binge_index = reference_binge_index(episodes)
+
+    return ShowMetrics(
+        watchability_score = reference_watchability(average_rating, binge_index, rating_consistency, momentum_score,
+                                                    retention_rate, land_the_plane_score, len(episodes),
+                                                    len(stinker_episodes), len(highlight_episodes), highlight_average),
+        average_rating = round(average_rating, 2),
+        high_rating = round(max(ratings), 2),
+        low_rating = round(min(ratings), 2),
+        stinker_episodes = stinker_episodes,
+        stinker_rating = round(stinker_average, 2),
+        highlight_episodes = highlight_episodes,
+        highlight_rating = round(highlight_average, 2),
+        rating_consistency = rating_consistency,
+        land_the_plane_score = land_the_plane_score,
+        momentum_score = momentum_score,
+        retention_rate = retention_rate,
+        binge_index = binge_index
+    )
+
+def random_show(rng, show_id):
+
+    length = rng.choice([1, 2, 3, 4, 5, 6, 10, 24, 62, 150, 400])
+    seasons = max(1, min(length, rng.randint(1, 12)))
+    pattern = rng.choice(["noisy", "constant", "rising", "crash", "alternating"])
+    base = rng.uniform(5.5, 9.5)
+    precision = rng.choice([1, 3])
+
+    episodes = []
+    for i in range(length):
+        if pattern == "constant":
+            rating = base
+        elif pattern == "rising":
+            rating = base - 1 + 2 * i / length + rng.gauss(0, 0.2)
+        elif pattern == "crash":
+            rating = base if i < length * 0.8 else base - 3
+        elif pattern == "alternating":
+            rating = base + (0.25 if i % 2 else -0.25)
+        else:
+            rating = base + rng.gauss(0, 0.7)
+
+        season = 1 + i * seasons // length
+        episodes.append(Episode(
+            id = show_id * 1000 + i,
+            season_number = season,
+            episode_number = i + 1,
+            title = f"Episode {i + 1}",
+            rating = round(min(10.0, max(0.1, rating)), precision),
+            vote_count = rng.choice([0, rng.randint(1, 20), rng.randint(20, 4000)]) if i == 0 else rng.randint(1, 3000)
+        ))
+
+    return episodes
+
+def test_engine_matches_reference_implementation():
+
+    rng = random.Random(20240611)
+    shows = [random_show(rng, show_id) for show_id in range(400)]
+
+    for episodes in shows:
+        assert getShowMetrics(episodes) == reference_metrics(episodes)
+
+def test_batch_matches_single_show_scoring():
+
+    rng = random.Random(7)
+    shows = [random_show(rng, show_id) for show_id in range(200)] + [[]]
+
+    batch = getShowMetricsForShows(shows)
+
+    assert batch[-1] is None
+    assert batch[:-1] == [getShowMetrics(episodes) for episodes in shows[:-1]]
@@ -0,0 +1,107 @@
+import random
+from core.metrics import getShowMetrics
+from core.metrics_summary import buildMetricsSummary, applySeasonUpdate, applySeasonUpdates, getSummaryMetrics, seasonUpdates, updateShowMetrics
+from models.show_model import ShowModel, Episode
+
+def make_season(rng, show_id, season, count, start_number=1):
+    return [
+        Episode(id=show_id * 10000 + season * 100 + n, season_number=season, episode_number=n, title=f"S{season}E{n}",
+                rating=round(rng.uniform(5.5, 9.8), rng.choice([1, 3])), vote_count=rng.randint(5, 2000))
+        for n in range(start_number, start_number + count)
+    ]
+
+def assert_close(incremental, full):
+    for field, value in full.model_dump().items():
+        other = getattr(incremental, field)
+        if isinstance(value, list):
+            assert other == value, field
+        else:
+            assert abs(other - value) <= 0.011, field
+
+def test_summary_matches_full_recompute():
+    rng = random.Random(17)
+    for show_id in range(60):
+        episodes = [e for season in range(1, rng.randint(2, 8)) for e in make_season(rng, show_id, season, rng.randint(1, 24))]
+        assert_close(getSummaryMetrics(buildMetricsSummary(episodes)), getShowMetrics(episodes))
+
+def test_appended_and_edited_episodes_update_incrementally():
+    rng = random.Random(23)
+    for show_id in range(60):
+        seasons = {season: make_season(rng, show_id, season, rng.randint(4, 16)) for season in range(1, rng.randint(3, 7))}
+        last = max(seasons)
+        aired = {season: episodes for season, episodes in seasons.items() if season < last}
+        aired_last = seasons[last][:2]
+        previous = [e for season in sorted(aired) for e in aired[season]] + aired_last
+
+        summary = buildMetricsSummary(previous)
+
+        edited = [e.model_copy(update={"rating": round(e.rating - 0.4, 1), "vote_count": e.vote_count + 7}) for e in aired[1]]
+        assert applySeasonUpdate(summary, 1, aired[1], edited)
+        assert applySeasonUpdate(summary, last, aired_last, seasons[last])
+        premiere = make_season(rng, show_id, last + 1, 3)
+        assert applySeasonUpdate(summary, last + 1, [], premiere)
+
+        current = edited + [e for season in sorted(aired) if season > 1 for e in aired[season]] + seasons[last] + premiere
+        assert summary.count == len(current)
+        assert_close(getSummaryMetrics(summary), getShowMetrics(current))
+
+def test_structural_changes_fall_back_to_full_recompute():
+    rng = random.Random(29)
+    first = make_season(rng, 1, 1, 6)
+    second = make_season(rng, 1, 2, 6)
+    summary = buildMetricsSummary(first + second)
+    before = summary.model_copy(deep=True)
+
+    assert not applySeasonUpdate(summary, 1, first, first + make_season(rng, 1, 1, 1, start_number=7))
+    assert not applySeasonUpdate(summary, 2, second, second[:3])
+    assert summary == before
+
+    previous = ShowModel(id=1, title="Show", number_of_seasons=2, episodes=first + second, metrics_summary=summary)
+    current = first[1:] + second
+    metrics, rebuilt = updateShowMetrics(previous, current)
+
+    assert metrics == getShowMetrics(current)
+    assert rebuilt.count == len(current)
+
+def test_refreshes_touch_only_the_changed_seasons_and_leave_the_stored_summary_alone():
+    rng = random.Random(31)
+    seasons = [make_season(rng, 2, season, 10) for season in range(1, 6)]
+    stored = [e for season in seasons for e in season]
+    _, summary = updateShowMetrics(None, stored)
+    previous = ShowModel(id=2, title="Show", number_of_seasons=5, episodes=stored, metrics_summary=summary)
+    before = summary.model_copy(deep=True)
+
+    edited = [e.model_copy(update={"rating": round(e.rating - 0.3, 1)}) for e in seasons[4]]
+    current = stored[:40] + edited + make_season(rng, 2, 5, 2, start_number=11)
+    updates = seasonUpdates(previous, current, {5})
+
+    assert [(season, len(old), len(new)) for season, old, new in updates] == [(5, 10, 12)]
+    metrics, updated = updateShowMetrics(previous, current, {5})
+    assert_close(metrics, getShowMetrics(current))
+    assert updated.count == 52 and sum(updated.bucket_counts) == 52
+    assert previous.metrics_summary == before
+
+def test_scores_moving_across_unselected_episodes_fall_back_to_full_recompute():
+    episodes = [Episode(id=n, season_number=1, episode_number=n, title=f"E{n}", rating=8.0, vote_count=100) for n in range(1, 11)]
+    episodes += [Episode(id=11, season_number=1, episode_number=11, title="E11", rating=7.0, vote_count=100),
+                 Episode(id=12, season_number=1, episode_number=12, title="E12", rating=3.0, vote_count=100)]
+    _, summary = updateShowMetrics(None, episodes)
+    previous = ShowModel(id=3, title="Show", number_of_seasons=1, episodes=episodes, metrics_summary=summary)
+    assert [entry[1] for entry in summary.stinker_entries] == [12]
+
+    current = episodes[:-1] + [episodes[-1].model_copy(update={"rating": 8.0})]
+    assert applySeasonUpdates(summary, seasonUpdates(previous, current, {1})) is None
+
+    metrics, _ = updateShowMetrics(previous, current, {1})
+    assert metrics == getShowMetrics(current)
+    assert metrics.stinker_episodes == [11]
+
+def test_summaries_without_bucket_counts_are_rebuilt():
+    rng = random.Random(37)
+    episodes = make_season(rng, 4, 1, 8)
+    _, summary = updateShowMetrics(None, episodes)
+    legacy = summary.model_copy(update={"bucket_counts": [], "stinker_score": None})
+    previous = ShowModel(id=4, title="Show", number_of_seasons=1, episodes=episodes, metrics_summary=legacy)
+
+    assert seasonUpdates(previous, episodes, {1}) is None
+    assert updateShowMetrics(previous, episodes, {1})[1] == summary
@@ -1,4 +1,6 @@
-from core.metrics import getShowMetrics
+import random
+import numpy as np
+from core.metrics import getShowMetrics, getMomentum, getSlope, RollingMomentum
 
 class MockEpisode:
 
@@ -73,3 +75,41 @@ def test_high_variance_consistency():
     episodes = create_mock_show(ratings)
     metrics = getShowMetrics(episodes)
     assert metrics.rating_consistency < 50
+
+def test_closed_form_momentum_matches_polyfit():
+    rng = random.Random(3)
+    for length in (5, 10, 100, 1000, 10000):
+        ratings = [round(rng.uniform(4, 10), 3) for _ in range(length)]
+        slope, _ = np.polyfit(np.arange(length), np.array(ratings), 1)
+
+        assert abs(getSlope(ratings) - slope) < 1e-12
+        assert getMomentum(ratings) == round(max(0, min(100, 50 + slope * (100 + length * 5))), 2)
+
+def test_momentum_on_half_cent_ties_rounds_like_polyfit():
+    rng = random.Random(11)
+    ties = 0
+    for _ in range(400):
+        length = rng.choice([5, 6, 8, 10, 20])
+        ratings = [round(rng.randint(110, 190) * 0.05, 2) for _ in range(length)]
+        slope, _ = np.polyfit(np.arange(length), np.array(ratings), 1)
+        score = max(0, min(100, 50 + slope * (100 + length * 5)))
+        ties += abs(score * 100 % 1 - 0.5) < 1e-6
+
+        assert getMomentum(ratings) == round(score, 2)
+        assert getShowMetrics(create_mock_show(ratings)).momentum_score == round(score, 2)
+
+    assert ties > 20
+
+def test_rolling_momentum_tracks_appends_and_edits():
+    rng = random.Random(5)
+    ratings = [round(rng.uniform(6, 9), 1) for _ in range(40)]
+    rolling = RollingMomentum(ratings[:4])
+
+    for rating in ratings[4:]:
+        rolling.append(rating)
+    assert abs(rolling.slope() - getSlope(ratings)) < 1e-12
+    assert rolling.score() == getMomentum(ratings)
+
+    rolling.replace(7, ratings[7], 9.9)
+    ratings[7] = 9.9
+    assert rolling.score() == getMomentum(ratings)
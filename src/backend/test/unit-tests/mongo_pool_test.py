@@ -0,0 +1,117 @@
+import time
+import pytest
+from datetime import datetime, timezone
+from prometheus_client import REGISTRY
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from crud import baseQueries, modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_by_id, db_get_ranking_page
+from db import mongodb
+from db.mongodb import PoolMetricsListener, available_compressors, hot_read_preference
+from models.show_model import ShowModel
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+class RoutedCollection:
+
+    def __init__(self, collection, routed):
+        self.collection = collection
+        self.routed = routed
+
+    def with_options(self, read_preference):
+        self.routed.append(read_preference)
+        return self.collection
+
+    def __getattr__(self, name):
+        self.routed.append(None)
+        return getattr(self.collection, name)
+
+class RoutedDatabase:
+
+    def __init__(self, database):
+        self.database = database
+        self.routed = []
+
+    def __getitem__(self, name):
+        return RoutedCollection(self.database[name], self.routed)
+
+@pytest.fixture
+def routed_db(mock_db, monkeypatch):
+    database = RoutedDatabase(mock_db)
+    monkeypatch.setattr(baseQueries, "db", database)
+    monkeypatch.setattr(baseQueries, "HOT_READ_PREFERENCE", hot_read_preference("secondaryPreferred", 30))
+    return database
+
+async def test_hot_reads_go_to_secondaries_and_refresh_reads_stay_on_the_primary(routed_db):
+
+    await db_upsert_show(ShowModel(id=6, title="Routed", number_of_seasons=1, last_updated=datetime.now(timezone.utc)))
+    assert all(preference is None for preference in routed_db.routed)
+
+    routed_db.routed.clear()
+    modeledQueries.show_cache.clear()
+    assert (await db_get_show_by_id(6)).title == "Routed"
+    assert routed_db.routed == [SecondaryPreferred(max_staleness=90)]
+
+    routed_db.routed.clear()
+    modeledQueries.show_cache.clear()
+    await db_get_show_by_id(6, hot=False)
+    assert routed_db.routed == [None]
+
+    routed_db.routed.clear()
+    await db_get_ranking_page("watchability")
+    assert routed_db.routed == [SecondaryPreferred(max_staleness=90)]
+
+def test_primary_hot_reads_are_not_rerouted(mock_db, monkeypatch):
+
+    monkeypatch.setattr(baseQueries, "HOT_READ_PREFERENCE", hot_read_preference("primary"))
+
+    assert baseQueries.read_collection("shows", hot=True) is not None
+    assert hot_read_preference("primary") == Primary()
+    with pytest.raises(ValueError):
+        hot_read_preference("secondaryOnly")
+
+def test_unavailable_compressors_are_dropped(monkeypatch):
+
+    monkeypatch.setattr(mongodb.importlib.util, "find_spec", lambda name: name == "zlib")
+    assert available_compressors("zstd, snappy,zlib,lz4") == ["zlib"]
+
+def test_pool_listener_records_checkout_waits_and_connections():
+
+    address = ("mongo-test", 27017)
+    server = "mongo-test:27017"
+    listener = PoolMetricsListener()
+
+    listener.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+    listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1, 0.25))
+    assert sample("bingelogic_mongo_pool_checked_out", server=server) == 1
+    listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+    listener.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(address, monitoring.ConnectionCheckOutFailedReason.TIMEOUT, 1.5))
+
+    assert sample("bingelogic_mongo_pool_checkouts_total", server=server, outcome="ok") == 1
+    assert sample("bingelogic_mongo_pool_checkouts_total", server=server, outcome="timeout") == 1
+    assert sample("bingelogic_mongo_pool_checkout_seconds_count", server=server) == 2
+    assert sample("bingelogic_mongo_pool_checkout_seconds_sum", server=server) == 1.75
+    assert sample("bingelogic_mongo_pool_checked_out", server=server) == 0
+    assert sample("bingelogic_mongo_pool_connections", server=server) == 1
+
+    listener.connection_closed(monitoring.ConnectionClosedEvent(address, 1, monitoring.ConnectionClosedReason.IDLE))
+    assert sample("bingelogic_mongo_pool_connections", server=server) == 0
+
+async def test_reads_right_after_a_write_stay_on_the_primary_and_secondary_copies_are_cached_briefly(routed_db, monkeypatch):
+
+    monkeypatch.setattr(modeledQueries.show_cache, "recent_window", 90)
+    await db_upsert_show(ShowModel(id=7, title="Written", number_of_seasons=1, last_updated=datetime.now(timezone.utc)))
+
+    routed_db.routed.clear()
+    await db_get_show_by_id(7)
+    assert routed_db.routed == [None]
+
+    monkeypatch.setattr(modeledQueries.show_cache, "_invalidated", {})
+    modeledQueries.show_cache.clear()
+    routed_db.routed.clear()
+    await db_get_show_by_id(7)
+    assert routed_db.routed == [SecondaryPreferred(max_staleness=90)]
+
+    _, _, expires_at = modeledQueries.show_cache.local._entries[7]
+    assert expires_at - time.monotonic() <= 90
@@ -0,0 +1,132 @@
+import random
+import httpx
+import pytest
+from crud import modeledQueries
+from crud.modeledQueries import ranking_index, db_get_ranking_page, db_upsert_show, db_delete_show
+from core.rankings import RankingIndex, RANKED_METRICS, ranked_show
+from main import app
+from models.show_model import ShowModel, ShowMetrics
+from services.ranking_service import load_rankings
+
+GENRES = ["Drama", "Comedy", "Crime"]
+
+@pytest.fixture
+def mock_db(mock_db):
+    ranking_index.clear()
+    yield mock_db
+    ranking_index.clear()
+
+def make_show(show_id, rng):
+    score = lambda: round(rng.choice([rng.uniform(0, 100), 50.0]), 2)
+    return ShowModel(
+        id = show_id,
+        title = f"Show {show_id}",
+        number_of_seasons = 1,
+        genres = rng.sample(GENRES, rng.randint(0, 2)),
+        metrics = ShowMetrics(watchability_score=score(), average_rating=round(rng.uniform(5, 9), 2), high_rating=9.0, low_rating=5.0,
+                              stinker_episodes=[], stinker_rating=0.0, highlight_episodes=[], highlight_rating=0.0,
+                              rating_consistency=score(), land_the_plane_score=score(), momentum_score=score(),
+                              retention_rate=score(), binge_index=score())
+    )
+
+def expected_order(shows, metric, genre=None):
+    field = RANKED_METRICS[metric]
+    rows = [show for show in shows if genre is None or genre in show.genres]
+    return [show.id for show in sorted(rows, key=lambda show: (getattr(show.metrics, field), show.id), reverse=True)]
+
+def walk(page_fn, metric, genre, limit):
+    ids, after = [], None
+    while True:
+        rows, more = page_fn(metric, genre, after, limit)
+        ids.extend(row.id for row in rows)
+        if not more:
+            return ids
+        after = (rows[-1].scores[metric], rows[-1].id)
+
+def test_index_pages_match_full_sort_after_updates():
+
+    rng = random.Random(1)
+    shows = {i: make_show(i, rng) for i in range(300)}
+    index = RankingIndex()
+    index.begin_load()
+    index.finish_load(ranked_show(show.model_dump(by_alias=True)) for show in shows.values())
+
+    for show_id in rng.sample(range(300), 60):
+        shows[show_id] = make_show(show_id, rng)
+        index.update(ranked_show(shows[show_id].model_dump(by_alias=True)))
+    for show_id in range(10):
+        del shows[show_id]
+        index.remove(show_id)
+
+    for metric in RANKED_METRICS:
+        for genre in [None] + GENRES:
+            assert walk(index.page, metric, genre, 17) == expected_order(shows.values(), metric, genre)
+
+def test_writes_during_load_survive_the_snapshot():
+
+    rng = random.Random(2)
+    old, new = make_show(1, rng), make_show(1, rng)
+    index = RankingIndex()
+
+    index.begin_load()
+    index.update(ranked_show(new.model_dump(by_alias=True)))
+    index.remove(2)
+    index.finish_load([ranked_show(old.model_dump(by_alias=True)), ranked_show(make_show(2, rng).model_dump(by_alias=True))])
+
+    assert len(index) == 1
+    assert index.page("watchability")[0][0].scores == ranked_show(new.model_dump(by_alias=True)).scores
+
+async def test_mongo_fallback_matches_index_and_writes_maintain_it(mock_db):
+
+    rng = random.Random(3)
+    shows = [make_show(i, rng) for i in range(80)]
+    for show in shows:
+        await db_upsert_show(show)
+    await load_rankings()
+
+    async def mongo_walk(metric, genre, limit):
+        ids, after = [], None
+        while True:
+            rows = await db_get_ranking_page(metric, genre, after, limit)
+            ids.extend(row.id for row in rows)
+            if len(rows) < limit:
+                return ids
+            after = (rows[-1].scores[metric], rows[-1].id)
+
+    for metric in ["watchability", "finales", "binge"]:
+        for genre in [None, "Drama"]:
+            assert await mongo_walk(metric, genre, 9) == walk(ranking_index.page, metric, genre, 9) == expected_order(shows, metric, genre)
+
+    top = make_show(5, rng).model_copy(update={"metrics": shows[5].metrics.model_copy(update={"watchability_score": 100.0})})
+    await db_upsert_show(top)
+    await db_delete_show(6)
+    assert ranking_index.page("watchability", limit=1)[0][0].id == 5
+    assert 6 not in walk(ranking_index.page, "watchability", None, 50)
+
+async def test_rankings_endpoint_paginates_with_cursor(mock_db):
+
+    rng = random.Random(4)
+    shows = [make_show(i, rng) for i in range(25)]
+    for show in shows:
+        await db_upsert_show(show)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def collect():
+            ids, cursor = [], None
+            while True:
+                page = (await client.get("/api/rankings/finales", params={"limit": 10, **({"cursor": cursor} if cursor else {})})).json()
+                ids.extend(item["show_id"] for item in page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return ids
+
+        from_mongo = await collect()
+        await load_rankings()
+        from_memory = await collect()
+
+        assert (await client.get("/api/rankings/unknown")).status_code == 404
+        assert (await client.get("/api/rankings/finales", params={"cursor": "bad"})).status_code == 400
+
+    assert from_mongo == from_memory == expected_order(shows, "finales")
@@ -0,0 +1,89 @@
+import json
+import random
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, ranking_index
+from core.metrics import getShowMetrics
+from core.rankings import RANKED_METRICS
+from models.show_model import ShowModel, ShowMetrics, Episode
+from services.recompute_service import recompute_metrics, score_chunk
+
+PLACEHOLDER = ShowMetrics(watchability_score=0.0, average_rating=0.0, high_rating=0.0, low_rating=0.0,
+                          stinker_episodes=[], stinker_rating=0.0, highlight_episodes=[], highlight_rating=0.0,
+                          rating_consistency=0.0, land_the_plane_score=0.0, momentum_score=0.0,
+                          retention_rate=0.0, binge_index=0.0)
+
+def make_show(show_id, rng):
+    count = rng.randint(0, 30)
+    episodes = [Episode(id=show_id * 1000 + i, season_number=1 + i // 10, episode_number=i % 10 + 1, title=f"E{i}",
+                        rating=round(rng.uniform(5, 9.5), 1), vote_count=rng.randint(1, 500)) for i in range(count)]
+    return ShowModel(id=show_id, title=f"Show {show_id}", number_of_seasons=max(1, (count + 9) // 10), episodes=episodes,
+                     metrics=PLACEHOLDER if episodes else None)
+
+async def stored_metrics(database):
+    return {doc["_id"]: doc["metrics"] async for doc in database["shows"].find({}, {"metrics": 1})}
+
+def test_score_chunk_returns_only_changed_metrics():
+
+    rng = random.Random(1)
+    show = make_show(1, rng)
+    episodes = [episode.model_dump() for episode in show.episodes]
+    current = getShowMetrics(show.episodes).model_dump()
+
+    assert score_chunk([(1, current, episodes)]) == []
+    assert score_chunk([(1, None, episodes), (2, None, [])]) == [(1, current)]
+
+async def test_recompute_rewrites_metrics_and_clears_checkpoint(mock_db, tmp_path):
+
+    rng = random.Random(2)
+    shows = [make_show(i, rng) for i in range(1, 41)]
+    for show in shows:
+        await db_upsert_show(show)
+
+    checkpoint = str(tmp_path / "recompute.json")
+    report = await recompute_metrics(workers=2, chunk_size=7, checkpoint=checkpoint)
+
+    scored = [show for show in shows if show.episodes]
+    assert report.scanned == 40 and report.updated == len(scored) and report.chunks == 6
+    metrics = await stored_metrics(mock_db)
+    assert all(metrics[show.id] == getShowMetrics(show.episodes).model_dump() for show in scored)
+    assert not (tmp_path / "recompute.json").exists()
+
+    again = await recompute_metrics(workers=2, chunk_size=7, checkpoint=checkpoint)
+    assert again.updated == 0 and again.unchanged == 40
+
+async def test_recompute_resumes_after_checkpoint(mock_db, tmp_path):
+
+    rng = random.Random(3)
+    shows = [make_show(i, rng) for i in range(1, 21)]
+    for show in shows:
+        await db_upsert_show(show)
+
+    checkpoint = tmp_path / "recompute.json"
+    checkpoint.write_text(json.dumps({"last_id": 12}))
+    report = await recompute_metrics(workers=1, chunk_size=5, checkpoint=str(checkpoint))
+
+    assert report.resumed_after == 12 and report.scanned == 8
+    metrics = await stored_metrics(mock_db)
+    for show in shows:
+        if show.id <= 12:
+            assert metrics[show.id] == (PLACEHOLDER.model_dump() if show.episodes else None)
+        elif show.episodes:
+            assert metrics[show.id] == getShowMetrics(show.episodes).model_dump()
+
+async def test_recompute_updates_the_ranking_index(mock_db, tmp_path):
+
+    rng = random.Random(4)
+    shows = [make_show(i, rng) for i in range(1, 11)]
+    for show in shows:
+        await db_upsert_show(show)
+    scored = [show for show in shows if show.episodes]
+    ranking_index.remove(scored[0].id)
+
+    await recompute_metrics(workers=1, chunk_size=4, checkpoint=str(tmp_path / "recompute.json"))
+
+    for show in scored:
+        metrics = getShowMetrics(show.episodes)
+        ranked = ranking_index.get(show.id)
+        assert ranked.title == show.title
+        assert ranked.scores == {name: getattr(metrics, field) for name, field in RANKED_METRICS.items()}
+    ranking_index.clear()
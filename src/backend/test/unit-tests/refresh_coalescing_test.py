@@ -0,0 +1,60 @@
+import asyncio
+import httpx
+from prometheus_client import REGISTRY
+from api.routes import shows
+from services import refresh_service
+from main import app
+from models.show_model import ShowModel, Episode, SeasonFetch
+
+def sample(name):
+    return REGISTRY.get_sample_value(name, {"flight": "refresh"}) or 0.0
+
+async def test_concurrent_show_details_share_one_refresh(monkeypatch):
+
+    calls = {"details": 0, "seasons": 0, "insert": 0}
+    stored = {}
+    db_hits = []
+
+    async def fake_details(show_id, client=None):
+        calls["details"] += 1
+        await asyncio.sleep(0.05)
+        return ShowModel(id=show_id, title="Coalesced", number_of_seasons=1)
+
+    async def fake_seasons(show_id, number_of_seasons, fingerprints, client=None, on_fetch=None):
+        calls["seasons"] += 1
+        return [SeasonFetch(season_number=1, episodes=[
+            Episode(id=i, season_number=1, episode_number=i, title=f"E{i}", rating=8.0 + i / 10, vote_count=100)
+            for i in range(1, 9)
+        ])]
+
+    async def fake_get(show_id, hot=True):
+        show = stored.get(show_id)
+        if show:
+            db_hits.append(show_id)
+        return show
+
+    async def fake_insert(show):
+        calls["insert"] += 1
+        stored[show.id] = show
+
+    monkeypatch.setattr(refresh_service, "tmdb_get_show_details", fake_details)
+    monkeypatch.setattr(refresh_service, "tmdb_get_seasons_conditional", fake_seasons)
+    monkeypatch.setattr(shows, "db_get_show_by_id", fake_get)
+    monkeypatch.setattr(shows, "db_upsert_show", fake_insert)
+
+    executed_before = sample("bingelogic_singleflight_executed_total")
+    coalesced_before = sample("bingelogic_singleflight_coalesced_total")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*[
+            client.get("/api/show_details", params={"show_id": 42})
+            for _ in range(500)
+        ])
+
+    assert all(res.status_code == 200 for res in responses)
+    assert all(res.json()["title"] == "Coalesced" for res in responses)
+    assert calls == {"details": 1, "seasons": 1, "insert": 1}
+    assert sample("bingelogic_singleflight_executed_total") - executed_before == 1
+    assert sample("bingelogic_singleflight_coalesced_total") - coalesced_before == 499 - len(db_hits)
+    assert not shows.refresh_flight.in_flight(42)
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from models.show_model import ShowSummary
+from services.refresh_scheduler import RefreshScheduler
+
+def show(show_id, hours_old, popularity=0.0):
+    return ShowSummary(id=show_id, title=f"Show {show_id}", number_of_seasons=1, popularity=popularity,
+                       last_updated=datetime.now(timezone.utc) - timedelta(hours=hours_old))
+
+async def drain(scheduler):
+    while scheduler.depth() or scheduler._running:
+        await asyncio.sleep(0.005)
+
+async def test_refreshes_in_staleness_times_popularity_order():
+
+    order = []
+    gate = asyncio.Event()
+
+    async def refresh(show_id):
+        await gate.wait()
+        order.append(show_id)
+
+    scheduler = RefreshScheduler(refresh, max_in_flight=1, lookahead=timedelta(0))
+    scheduler.start()
+
+    scheduler.schedule(show(1, 25))
+    await asyncio.sleep(0)
+    for candidate in [show(2, 25, popularity=1), show(3, 48, popularity=100), show(4, 30, popularity=10), show(5, 2, popularity=1000)]:
+        scheduler.schedule(candidate)
+
+    gate.set()
+    await drain(scheduler)
+    await scheduler.stop()
+
+    assert order == [1, 3, 4, 2]
+
+async def test_dedups_and_caps_in_flight():
+
+    calls = []
+    running = {"now": 0, "peak": 0}
+
+    async def refresh(show_id):
+        calls.append(show_id)
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+
+    scheduler = RefreshScheduler(refresh, max_in_flight=3)
+    scheduler.start()
+    for _ in range(20):
+        for show_id in range(10):
+            scheduler.schedule(show(show_id, 30))
+
+    await drain(scheduler)
+    await scheduler.stop()
+
+    assert sorted(calls) == list(range(10))
+    assert running["peak"] == 3
+
+async def test_retries_failed_refresh_with_backoff():
+
+    attempts = []
+
+    async def refresh(show_id):
+        attempts.append(show_id)
+        if len(attempts) < 3:
+            raise RuntimeError("TMDB unavailable")
+
+    scheduler = RefreshScheduler(refresh, max_in_flight=1, max_attempts=3, retry_backoff=0.01)
+    scheduler.start()
+    scheduler.schedule(show(7, 30))
+
+    for _ in range(100):
+        if len(attempts) == 3:
+            break
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert attempts == [7, 7, 7]
+
+async def test_refreshes_requested_shows_before_they_expire():
+
+    refreshed = []
+
+    async def refresh(show_id):
+        refreshed.append(show_id)
+
+    scheduler = RefreshScheduler(refresh, lookahead=timedelta(hours=2), active_window=timedelta(days=3))
+    scheduler.start([show(8, 23), show(9, 23).model_copy(update={"last_updated": datetime.now(timezone.utc) - timedelta(days=4)})])
+
+    scheduler.schedule(show(1, 23))
+    scheduler.schedule(show(2, 1))
+    scheduler.scan()
+    await drain(scheduler)
+    await scheduler.stop()
+
+    assert sorted(refreshed) == [1, 8]
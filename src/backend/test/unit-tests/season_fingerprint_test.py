@@ -0,0 +1,66 @@
+import hashlib
+import json
+import httpx
+from datetime import datetime, timedelta, timezone
+from core.freshness import max_age, SHOW_MAX_AGE, ENDED_SHOW_MAX_AGE
+from models.show_model import ShowModel
+from services.refresh_service import merge_season_fetches, episode_models
+from services.tmdb_service import tmdb_get_seasons_conditional
+
+def season_body(season, rating):
+    return json.dumps({"episodes": [
+        {"id": season * 100 + n, "episode_number": n, "name": f"E{n}", "vote_average": rating, "vote_count": 40}
+        for n in range(1, 4)
+    ]}).encode()
+
+def stub_transport(bodies, honour_etags=True):
+
+    def handler(request):
+        season = int(request.url.path.rsplit("/", 1)[1])
+        body = bodies[season]
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if honour_etags and request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"etag": etag})
+        return httpx.Response(200, content=body, headers={"etag": etag, "content-type": "application/json"})
+
+    return httpx.MockTransport(handler)
+
+async def conditional_refresh(bodies, fingerprints, honour_etags=True):
+    async with httpx.AsyncClient(transport=stub_transport(bodies, honour_etags)) as client:
+        return await tmdb_get_seasons_conditional(1, len(bodies), fingerprints, client)
+
+async def test_unchanged_seasons_are_skipped():
+
+    bodies = {1: season_body(1, 8.0), 2: season_body(2, 8.5)}
+    first = await conditional_refresh(bodies, {})
+    assert all(fetch.episodes for fetch in first)
+
+    previous = ShowModel(id=1, title="Show", number_of_seasons=2, episodes=episode_models([e for fetch in first for e in fetch.episodes]))
+    fingerprints = {fetch.season_number: fetch.fingerprint for fetch in first}
+
+    bodies[2] = season_body(2, 9.0)
+    second = await conditional_refresh(bodies, fingerprints)
+    assert second[0].not_modified and second[0].episodes is None and second[0].bytes_fetched == 0
+    assert second[1].episodes[0].rating == 9.0
+
+    episodes, changed = merge_season_fetches(previous, second)
+    assert changed == {2}
+    assert [e.rating for e in episodes] == [8.0] * 3 + [9.0] * 3
+
+async def test_content_hash_skips_parsing_when_validators_are_ignored():
+
+    bodies = {1: season_body(1, 8.0)}
+    first = await conditional_refresh(bodies, {}, honour_etags=False)
+    second = await conditional_refresh(bodies, {1: first[0].fingerprint}, honour_etags=False)
+
+    assert not second[0].not_modified
+    assert second[0].episodes is None
+    assert second[0].bytes_fetched == len(bodies[1])
+
+def test_ended_shows_refresh_less_often():
+    long_ago = (datetime.now(timezone.utc) - timedelta(days=800)).strftime("%Y-%m-%d")
+    recent = (datetime.now(timezone.utc) - timedelta(days=20)).strftime("%Y-%m-%d")
+
+    assert max_age(ShowModel(id=1, title="a", number_of_seasons=1, status="Ended", last_air_date=long_ago)) == ENDED_SHOW_MAX_AGE
+    assert max_age(ShowModel(id=1, title="a", number_of_seasons=1, status="Ended", last_air_date=recent)) == SHOW_MAX_AGE
+    assert max_age(ShowModel(id=1, title="a", number_of_seasons=1, status="Returning Series", last_air_date=long_ago)) == SHOW_MAX_AGE
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_by_id, db_update_show
+from core.cache import TTLCache
+from core.shared_cache import TieredCache, LocalSharedStore, create_subscriber_store, listen_for_invalidations
+from core.metrics_summary import updateShowMetrics
+from models.show_model import ShowModel, Episode
+
+def text_cache(store, worker_id):
+    return TieredCache(TTLCache("shared_test", ttl=60), encode=str.encode, decode=bytes.decode, parse_key=int, store=store, worker_id=worker_id)
+
+async def test_second_worker_reads_through_the_shared_tier_and_hears_invalidations():
+
+    store = LocalSharedStore()
+    first, second = text_cache(store, "a"), text_cache(store, "b")
+    listener = asyncio.create_task(listen_for_invalidations([second], store))
+    await asyncio.sleep(0)
+
+    await first.set(1, "v1")
+    assert await second.get(1) == "v1"
+    assert second.peek(1) == "v1"
+
+    first.invalidate(1)
+    await first.set(1, "v2")
+    await first.broadcast([1])
+    await asyncio.sleep(0)
+
+    assert second.peek(1) is None
+    assert await second.get(1) is None
+    assert first.peek(1) == "v2"
+
+    listener.cancel()
+
+async def test_shared_tier_failures_fall_back_to_a_miss():
+
+    class BrokenStore(LocalSharedStore):
+        async def get(self, name):
+            raise ConnectionError("down")
+        async def set(self, name, value, ex=None):
+            raise ConnectionError("down")
+
+    cache = text_cache(BrokenStore(), "a")
+    await cache.set(1, "v1")
+    assert cache.peek(1) == "v1"
+
+    cache.clear()
+    assert await cache.get(1) is None
+
+@pytest.fixture
+def shared_show_cache(mock_db, monkeypatch):
+    store = LocalSharedStore()
+    monkeypatch.setattr(modeledQueries.show_cache, "store", store)
+    return mock_db, store
+
+async def test_show_reads_are_served_from_the_shared_tier(shared_show_cache):
+
+    database, store = shared_show_cache
+    episodes = [Episode(id=31, season_number=1, episode_number=1, title="E1", rating=8.1, vote_count=20)]
+    metrics, summary = updateShowMetrics(None, episodes)
+    show = ShowModel(id=3, title="Shared", number_of_seasons=1, last_updated=datetime.now(timezone.utc),
+                     episodes=episodes, metrics=metrics, metrics_summary=summary)
+    await db_upsert_show(show)
+    stored = await db_get_show_by_id(3)
+    assert await store.get("bingelogic:show:3")
+
+    # Another worker with a cold in-process cache never reaches Mongo
+    modeledQueries.show_cache.clear()
+    await database["shows"].delete_one({"_id": 3})
+    shared = await db_get_show_by_id(3)
+
+    assert shared.model_dump() == stored.model_dump()
+    assert shared.metrics_summary == stored.metrics_summary
+
+    await db_update_show(3, {"title": "Renamed"})
+    assert await store.get("bingelogic:show:3") is None
+
+async def test_a_read_that_raced_a_broadcast_cannot_repopulate_the_shared_tier():
+
+    store = LocalSharedStore()
+    reader, writer = text_cache(store, "a"), text_cache(store, "b")
+
+    # The reader misses, then the writer's update lands and is broadcast before the reader fills the cache
+    value, version = await reader.lookup(1)
+    assert value is None
+    await writer.broadcast([1])
+    await reader.set(1, "old", version=version)
+    reader.clear()
+    assert await reader.get(1) is None
+
+    # A write-back that slips in after the bump still carries the old version and reads as a miss
+    await store.set(reader.shared_key(1), b"\0" * 8 + b"old")
+    assert await reader.get(1) is None
+
+    value, version = await reader.lookup(1)
+    await reader.set(1, "new", version=version)
+    reader.clear()
+    assert await reader.get(1) == "new"
+
+def test_local_store_is_its_own_subscriber():
+
+    store = LocalSharedStore()
+    assert create_subscriber_store(store) is store
+    assert create_subscriber_store(None) is None
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from core.cache import TTLCache
+from crud import modeledQueries
+from models.show_model import ShowModel
+
+def test_lru_eviction_by_bytes():
+    cache = TTLCache("test_bytes", ttl=60, max_bytes=100)
+    cache.set(1, "a", size=40)
+    cache.set(2, "b", size=40)
+    cache.get(1)
+    cache.set(3, "c", size=40)
+
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    assert cache.get(3) == "c"
+    assert cache.bytes == 80
+
+def test_expired_and_stale_generation_entries_are_dropped():
+    cache = TTLCache("test_ttl", ttl=60)
+    cache.set(1, "a", ttl=0)
+    assert cache.get(1) is None
+
+    generation = cache.generation
+    cache.invalidate(2)
+    cache.set(2, "old", generation=generation)
+    assert cache.get(2) is None
+
+async def test_show_reads_are_cached_until_invalidated(monkeypatch):
+
+    reads = []
+    doc = ShowModel(id=7, title="Cached", number_of_seasons=1, last_updated=datetime.now(timezone.utc)).model_dump(by_alias=True)
+
+    async def fake_get(collection, query, hot=False):
+        reads.append(query["_id"])
+        return dict(doc)
+
+    async def fake_update(collection, id_val, data):
+        return None
+
+    monkeypatch.setattr(modeledQueries.baseQueries, "get", fake_get)
+    monkeypatch.setattr(modeledQueries.baseQueries, "update", fake_update)
+    modeledQueries.show_cache.clear()
+
+    first = await modeledQueries.db_get_show_by_id(7)
+    second = await modeledQueries.db_get_show_by_id(7)
+    assert first is second
+    assert reads == [7]
+
+    await modeledQueries.db_update_show(7, {"title": "Renamed"})
+    await modeledQueries.db_get_show_by_id(7)
+    assert reads == [7, 7]
+
+async def test_stale_shows_are_not_cached(monkeypatch):
+
+    reads = []
+    doc = ShowModel(id=8, title="Stale", number_of_seasons=1, last_updated=datetime.now(timezone.utc) - timedelta(hours=25)).model_dump(by_alias=True)
+
+    async def fake_get(collection, query, hot=False):
+        reads.append(query["_id"])
+        return dict(doc)
+
+    monkeypatch.setattr(modeledQueries.baseQueries, "get", fake_get)
+    modeledQueries.show_cache.clear()
+
+    await modeledQueries.db_get_show_by_id(8)
+    await modeledQueries.db_get_show_by_id(8)
+    assert reads == [8, 8]
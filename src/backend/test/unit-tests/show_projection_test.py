@@ -0,0 +1,54 @@
+import httpx
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, db_get_show_summary_by_id, db_get_episode_page
+from main import app
+from models.show_model import ShowModel, ShowMetrics, Episode
+
+def make_show():
+    return ShowModel(
+        id = 9,
+        title = "Projected",
+        number_of_seasons = 3,
+        episodes = [Episode(id=i, season_number=1 + i // 4, episode_number=i % 4 + 1, title=f"E{i}", rating=7.5, vote_count=10) for i in range(12)],
+        metrics = ShowMetrics(watchability_score=70.0, average_rating=7.5, high_rating=7.5, low_rating=7.5,
+                              stinker_episodes=[], stinker_rating=0.0, highlight_episodes=[], highlight_rating=0.0,
+                              rating_consistency=100.0, land_the_plane_score=50.0, momentum_score=50.0,
+                              retention_rate=100.0, binge_index=50.0)
+    )
+
+async def test_summary_and_season_pages_match_full_document(mock_db):
+
+    show = make_show()
+    await db_upsert_show(show)
+
+    summary = await db_get_show_summary_by_id(9)
+    assert summary.model_dump(exclude={"last_updated"}) == show.model_dump(exclude={"episodes", "last_updated"})
+
+    page = await db_get_episode_page(9, 2)
+    assert page.episodes == [episode for episode in show.episodes if episode.season_number == 2]
+    assert page.next_season == 3
+    assert (await db_get_episode_page(9, 3)).next_season is None
+    assert await db_get_episode_page(10, 1) is None
+
+    cached = await modeledQueries.db_get_show_by_id(9)
+    assert (await db_get_show_summary_by_id(9)).model_dump() == summary.model_dump()
+    assert (await db_get_episode_page(9, 2)).episodes == page.episodes
+    assert cached.episodes == show.episodes
+
+async def test_show_details_without_episodes_and_episode_pages(mock_db):
+
+    show = make_show()
+    await db_upsert_show(show)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        full = (await client.get("/api/show_details", params={"show_id": 9})).json()
+        header = (await client.get("/api/show_details", params={"show_id": 9, "episodes": "false"})).json()
+        pages = [(await client.get("/api/show_details/9/episodes", params={"season": season})).json() for season in (1, 2, 3)]
+        missing = await client.get("/api/show_details/9/episodes", params={"season": 4})
+
+    assert header == {key: value for key, value in full.items() if key != "episodes"}
+    assert header["_id"] == 9
+    assert [episode for page in pages for episode in page["episodes"]] == full["episodes"]
+    assert [page["next_season"] for page in pages] == [2, 3, None]
+    assert missing.status_code == 404
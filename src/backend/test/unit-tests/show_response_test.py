@@ -0,0 +1,74 @@
+import json
+import httpx
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, db_set_show_metrics
+from main import app
+from models.show_model import ShowModel, ShowMetrics, Episode
+from services import response_service
+from services.response_service import encode_show, etag_matches
+
+def make_show(title="Encoded é", last_updated=None):
+    return ShowModel(
+        id = 12,
+        title = title,
+        number_of_seasons = 1,
+        last_updated = last_updated or datetime.now(timezone.utc),
+        episodes = [Episode(id=i, season_number=1, episode_number=i + 1, title=f"E{i}", rating=7.25, vote_count=3) for i in range(5)],
+        metrics = ShowMetrics(watchability_score=70.0, average_rating=7.25, high_rating=7.25, low_rating=7.25,
+                              stinker_episodes=[], stinker_rating=0.0, highlight_episodes=[], highlight_rating=0.0,
+                              rating_consistency=100.0, land_the_plane_score=50.0, momentum_score=50.0,
+                              retention_rate=100.0, binge_index=50.0)
+    )
+
+def test_encoded_body_matches_default_response_encoding():
+
+    show = make_show()
+    etag, body = encode_show(show)
+
+    default = json.dumps(jsonable_encoder(show), ensure_ascii=False, separators=(",", ":")).encode()
+    assert body == default
+    assert encode_show(show) == (etag, body)
+    assert encode_show(make_show(last_updated=datetime(2030, 1, 1)))[0] != etag
+
+def test_etag_matching():
+
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+async def test_show_details_serves_etag_and_304(mock_db):
+
+    await db_upsert_show(make_show())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/api/show_details", params={"show_id": 12})
+        second = await client.get("/api/show_details", params={"show_id": 12}, headers={"If-None-Match": first.headers["etag"]})
+
+        await db_upsert_show(make_show(title="Renamed"))
+        third = await client.get("/api/show_details", params={"show_id": 12}, headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert first.json()["_id"] == 12 and "metrics_summary" not in first.json()
+    assert second.status_code == 304 and second.content == b""
+    assert third.status_code == 200 and third.json()["title"] == "Renamed"
+    assert third.headers["etag"] != first.headers["etag"]
+
+async def test_metrics_only_write_changes_the_served_body_and_etag(mock_db):
+
+    show = make_show()
+    await db_upsert_show(show)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/api/show_details", params={"show_id": 12})
+        await db_set_show_metrics([(12, {**show.metrics.model_dump(), "watchability_score": 1.0})])
+        second = await client.get("/api/show_details", params={"show_id": 12}, headers={"If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.json()["metrics"]["watchability_score"] == 1.0
+    assert second.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,76 @@
+import json
+import httpx
+import pytest
+from bench.tmdb_stub import create_stub_app
+from main import app
+from services import tmdb_service
+from services.tmdb_service import get_tmdb_client
+
+@pytest.fixture
+def tmdb(monkeypatch):
+    monkeypatch.setattr(tmdb_service, "TMDB_BASE_URL", "http://tmdb/3")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_stub_app(episodes_per_season=6)))
+    app.dependency_overrides[get_tmdb_client] = lambda: client
+    yield client
+    app.dependency_overrides.clear()
+
+def api_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def test_cold_stream_emits_header_seasons_then_metrics_and_persists_the_same_document(tmdb, fresh_db):
+
+    database = fresh_db()
+    async with api_client() as client:
+        res = await client.get("/api/show_details/stream", params={"show_id": 14})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in res.text.splitlines()]
+
+    assert events[0]["event"] == "show" and events[0]["data"]["title"] == "Show 14"
+    assert "metrics" not in events[0]["data"]
+    seasons = [event["data"] for event in events[1:-1]]
+    assert all(event["event"] == "season" for event in events[1:-1])
+    assert sorted(season["season_number"] for season in seasons) == [1, 2, 3, 4, 5]
+    assert events[-1]["event"] == "metrics"
+
+    streamed = await database["shows"].find_one({"_id": 14})
+
+    database = fresh_db()
+    async with api_client() as client:
+        plain = await client.get("/api/show_details", params={"show_id": 14})
+    stored = await database["shows"].find_one({"_id": 14})
+
+    for document in (streamed, stored):
+        document.pop("last_updated")
+        document.pop("revision")
+    assert streamed == stored
+    assert events[-1]["data"] == plain.json()["metrics"]
+    assert [episode for season in sorted(seasons, key=lambda s: s["season_number"]) for episode in season["episodes"]] == plain.json()["episodes"]
+
+async def test_stored_show_streams_as_server_sent_events(tmdb, mock_db):
+
+    async with api_client() as client:
+        stored = (await client.get("/api/show_details", params={"show_id": 12})).json()
+        res = await client.get("/api/show_details/stream", params={"show_id": 12}, headers={"Accept": "text/event-stream"})
+
+    assert res.headers["content-type"].startswith("text/event-stream")
+    blocks = [block.split("\n") for block in res.text.strip().split("\n\n")]
+    events = [(lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))) for lines in blocks]
+
+    assert [name for name, _ in events] == ["show", "season", "season", "season", "metrics"]
+    assert events[0][1]["_id"] == 12
+    assert [data["next_season"] for name, data in events if name == "season"] == [2, 3, None]
+    assert events[-1][1] == stored["metrics"]
+
+async def test_upstream_failure_before_the_first_event_keeps_its_status_code(mock_db):
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404, json={})))
+    app.dependency_overrides[get_tmdb_client] = lambda: client
+    try:
+        async with api_client() as api:
+            res = await api.get("/api/show_details/stream", params={"show_id": 999, "format": "ndjson"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert res.status_code == 404
@@ -0,0 +1,46 @@
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show, db_save_show_changes, db_get_show_by_id, show_document
+from models.show_model import ShowModel, ShowMetrics, Episode
+
+def make_show(ratings, watchability=80.0):
+    return ShowModel(
+        id = 5,
+        title = "Write Path",
+        number_of_seasons = 1,
+        episodes = [Episode(id=i, season_number=1, episode_number=i + 1, title=f"E{i}", rating=r, vote_count=10) for i, r in enumerate(ratings)],
+        metrics = ShowMetrics(watchability_score=watchability, average_rating=8.0, high_rating=9.0, low_rating=7.0,
+                              stinker_episodes=[], stinker_rating=0.0, highlight_episodes=[1], highlight_rating=9.0,
+                              rating_consistency=90.0, land_the_plane_score=80.0, momentum_score=50.0,
+                              retention_rate=100.0, binge_index=50.0)
+    )
+
+async def test_upsert_then_partial_update(mock_db):
+
+    await db_upsert_show(make_show([8.0, 9.0]))
+    await db_upsert_show(make_show([8.0, 9.0]))
+    assert await mock_db["shows"].count_documents({}) == 1
+
+    previous = await db_get_show_by_id(5)
+    current = make_show([8.0, 9.5, 7.0], watchability=82.5)
+
+    changes = modeledQueries.show_changes(show_document(previous), show_document(current))
+    assert "episodes" not in changes and "metrics" not in changes
+    assert changes["episodes.1.rating"] == 9.5
+    assert changes["metrics.watchability_score"] == 82.5
+
+    await db_save_show_changes(previous, current)
+    stored = await mock_db["shows"].find_one({"_id": 5})
+    assert stored["episodes"] == show_document(current)["episodes"]
+    assert stored["metrics"]["watchability_score"] == 82.5
+
+async def test_partial_update_against_outdated_version_replaces(mock_db):
+
+    await db_upsert_show(make_show([8.0]))
+    outdated = await db_get_show_by_id(5)
+    await mock_db["shows"].update_one({"_id": 5}, {"$set": {"last_updated": outdated.last_updated.replace(year=2001), "episodes": []}})
+
+    current = make_show([8.0, 8.5])
+    await db_save_show_changes(outdated, current)
+
+    stored = await mock_db["shows"].find_one({"_id": 5})
+    assert stored["episodes"] == show_document(current)["episodes"]
@@ -0,0 +1,78 @@
+import pytest
+from models.show_model import SearchResult, SearchPage
+from services import suggestion_service
+from services.suggestion_service import get_cached_suggestions, suggestion_cache
+
+def result(tmdb_id, title, original_title=None):
+    return SearchResult(tmdb_id=tmdb_id, title=title, original_title=original_title, poster_path=None, release_date=None)
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    pages = {}
+
+    async def search(query, client=None):
+        calls.append(query)
+        return pages[query]
+
+    monkeypatch.setattr(suggestion_service, "tmdb_search_shows", search)
+    suggestion_cache.clear()
+    yield pages, calls
+    suggestion_cache.clear()
+
+def titles(results):
+    return [show.title for show in results]
+
+async def test_prefixes_answer_only_when_every_result_still_matches(upstream):
+
+    pages, calls = upstream
+    pages["ca"] = SearchPage(results=[result(1, "Money Heist", "La casa de papel"), result(2, "Catch-22"), result(3, "Californication")], total_results=3)
+    pages["cas"] = SearchPage(results=[result(1, "Money Heist", "La casa de papel")], total_results=1)
+
+    await get_cached_suggestions("ca")
+    assert [show.tmdb_id for show in await get_cached_suggestions("Cas")] == [1]
+    assert [show.tmdb_id for show in await get_cached_suggestions("casa")] == [1]
+    assert calls == ["ca", "cas"]
+
+async def test_accents_fold_the_way_tmdb_folds_them(upstream):
+
+    pages, calls = upstream
+    pages["sh"] = SearchPage(results=[result(5, "Shogun", "SHOGUN"), result(6, "Sherlock")], total_results=2)
+    pages["shō"] = SearchPage(results=[result(5, "Shogun", "SHOGUN")], total_results=1)
+
+    await get_cached_suggestions("sh")
+    for query in ("Shō", "Shōg", "Shōgu"):
+        assert titles(await get_cached_suggestions(query)) == ["Shogun"]
+    assert calls == ["sh", "shō"]
+
+async def test_results_matched_through_alternative_titles_come_from_upstream(upstream):
+
+    pages, calls = upstream
+    pages["the office"] = SearchPage(results=[result(8, "The Office")], total_results=1)
+    pages["the office u"] = SearchPage(results=[result(8, "The Office")], total_results=1)
+
+    await get_cached_suggestions("the office")
+    assert titles(await get_cached_suggestions("The Office U")) == ["The Office"]
+    assert calls == ["the office", "the office u"]
+
+async def test_pages_with_unexplained_matches_are_not_narrowed(upstream):
+
+    pages, calls = upstream
+    pages["mi"] = SearchPage(results=[result(7, "Mr. Robot")], total_results=1)
+    pages["mis"] = SearchPage(results=[result(7, "Mr. Robot")], total_results=1)
+
+    await get_cached_suggestions("mi")
+    assert [show.tmdb_id for show in await get_cached_suggestions("mis")] == [7]
+    assert calls == ["mi", "mis"]
+
+async def test_derived_pages_expire_with_their_prefix(upstream):
+
+    pages, _ = upstream
+    pages["ba"] = SearchPage(results=[result(4, "Barry")], total_results=1)
+
+    await get_cached_suggestions("ba")
+    value, size, expires_at = suggestion_cache.local._entries["ba"]
+    suggestion_cache.local._entries["ba"] = (value, size, expires_at - 3000)
+    await get_cached_suggestions("bar")
+
+    assert suggestion_cache.remaining("bar") == pytest.approx(suggestion_cache.remaining("ba"), abs=1)
@@ -0,0 +1,159 @@
+import asyncio
+import gc
+import time
+import httpx
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from bench.tmdb_stub import create_stub_app, run_stub_server
+from api.routes import shows
+from core.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from crud import modeledQueries
+from crud.modeledQueries import db_upsert_show
+from main import app
+from models.show_model import ShowModel
+from services import tmdb_service
+from services.tmdb_service import RetryingTransport, hedged, tmdb_get_show_details, tmdb_get_season_conditional
+
+@pytest.fixture(scope="module")
+def stub_server():
+    stub = create_stub_app(episodes_per_season=4)
+    with run_stub_server(stub) as base_url:
+        yield stub, base_url
+
+@pytest.fixture
+def stub(stub_server, monkeypatch):
+    stub, base_url = stub_server
+    stub.state.error_ratio = 0.0
+    stub.state.slow_latency = 0.0
+    stub.state.slow_first = 0
+    stub.state.requests = 0
+    monkeypatch.setattr(tmdb_service, "TMDB_BASE_URL", base_url)
+    monkeypatch.setattr(tmdb_service, "tmdb_breaker", CircuitBreaker("tmdb_test", failure_threshold=2, reset_timeout=0.2))
+    return stub
+
+def tmdb_client(max_retries=0):
+    return httpx.AsyncClient(transport=RetryingTransport(httpx.AsyncHTTPTransport(), max_retries=max_retries, backoff=0.001))
+
+def hedges(outcome):
+    return REGISTRY.get_sample_value("bingelogic_tmdb_hedges_total", {"outcome": outcome}) or 0.0
+
+async def test_server_errors_are_retried_a_bounded_number_of_times(stub):
+
+    stub.state.error_ratio = 1.0
+    async with tmdb_client(max_retries=2) as client:
+        with pytest.raises(HTTPException) as e:
+            await tmdb_get_show_details(5, client)
+
+    assert e.value.status_code == 503
+    assert stub.state.requests == 3
+    assert tmdb_service.tmdb_breaker.failures == 1
+
+async def test_slow_season_times_out_and_a_retry_recovers(stub, monkeypatch):
+
+    monkeypatch.setitem(tmdb_service.TMDB_TIMEOUTS, "season", 0.1)
+    stub.state.slow_first, stub.state.slow_latency = 1, 0.5
+
+    async with tmdb_client() as client:
+        with pytest.raises(HTTPException) as e:
+            await tmdb_get_season_conditional(5, 1, client=client)
+    assert e.value.status_code == 504
+
+    stub.state.requests = 0
+    async with tmdb_client(max_retries=1) as client:
+        fetch = await tmdb_get_season_conditional(5, 1, client=client)
+    assert len(fetch.episodes) == 4
+
+async def test_hedged_season_request_beats_a_slow_first_attempt(stub, monkeypatch):
+
+    monkeypatch.setattr(tmdb_service, "TMDB_SEASON_HEDGE_DELAY", 0.05)
+    stub.state.slow_first, stub.state.slow_latency = 1, 1.0
+    sent, won = hedges("sent"), hedges("won")
+
+    async with tmdb_client() as client:
+        start = time.perf_counter()
+        fetch = await tmdb_get_season_conditional(5, 1, client=client)
+        elapsed = time.perf_counter() - start
+
+    assert len(fetch.episodes) == 4
+    assert elapsed < 0.5
+    assert hedges("sent") == sent + 1 and hedges("won") == won + 1
+
+async def test_hedged_retrieves_the_error_of_an_attempt_that_lost():
+
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+    release = asyncio.Event()
+    attempts = []
+
+    async def call():
+        attempts.append(len(attempts))
+        failing = len(attempts) == 1
+        await release.wait()
+        if failing:
+            raise httpx.ConnectError("connection reset")
+        return "hedge"
+
+    try:
+        for _ in range(10):
+            attempts.clear()
+            release.clear()
+            pending = asyncio.ensure_future(hedged(call, 0.01))
+            await asyncio.sleep(0.02)
+            release.set()
+            assert await pending == "hedge"
+            del pending
+            gc.collect()
+    finally:
+        loop.set_exception_handler(None)
+
+    assert unhandled == []
+
+async def test_open_circuit_fails_fast_and_stale_shows_are_still_served(stub, mock_db, monkeypatch):
+
+    refreshes = []
+
+    async def fake_refresh(show_id, client=None):
+        refreshes.append(show_id)
+
+    monkeypatch.setattr(shows, "refresh_show", fake_refresh)
+    await db_upsert_show(ShowModel(id=8, title="Stored", number_of_seasons=1, last_updated=datetime.now(timezone.utc) - timedelta(days=3)))
+
+    stub.state.error_ratio = 1.0
+    async with tmdb_client() as client:
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await tmdb_get_show_details(8, client)
+        assert tmdb_service.tmdb_breaker.state == OPEN
+
+        with pytest.raises(HTTPException) as e:
+            await tmdb_get_show_details(8, client)
+        assert e.value.status_code == 503
+        assert stub.state.requests == 2
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        res = await client.get("/api/show_details", params={"show_id": 8})
+
+    assert res.status_code == 200
+    assert res.json()["title"] == "Stored"
+    assert refreshes == []
+    assert await shows.cleanup() == 0
+
+    stub.state.error_ratio = 0.0
+    await asyncio.sleep(0.25)
+    async with tmdb_client() as client:
+        show = await tmdb_get_show_details(8, client)
+
+    assert show.title == "Show 8"
+    assert tmdb_service.tmdb_breaker.state == CLOSED
+
+async def test_malformed_details_raise_a_500_instead_of_a_type_error():
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={}))) as client:
+        with pytest.raises(HTTPException) as e:
+            await tmdb_get_show_details(1, client)
+
+    assert e.value.status_code == 500